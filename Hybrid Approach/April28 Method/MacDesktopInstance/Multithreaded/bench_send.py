@@ -0,0 +1,73 @@
+# bench_send.py
+# Loopback packets/s ceiling of each send path, i.e. how much headroom the generator has.
+import socket
+import time
+
+import paper_modules  # noqa: F401  (puts Paper/ on sys.path for the shared modules below)
+from udp_batch import BatchSender, PayloadBuffer, have_sendmmsg
+
+# Configuration
+DEST = ('127.0.0.1', 5005)
+PACKET_SIZE = 1024
+RUN_SECONDS = 2.0
+BATCH_SIZES = [1, 8, 32, 64]
+
+
+def make_socket():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1048576)
+    return sock
+
+
+def bench_original(sock):
+    """The original hot loop: new bytes object and one sendto per datagram"""
+    end = time.perf_counter() + RUN_SECONDS
+    count = 0
+    while time.perf_counter() < end:
+        try:
+            sock.sendto(b'A' * PACKET_SIZE, DEST)
+            count += 1
+        except OSError:
+            pass
+    return count
+
+
+def bench_batched(sock, batch, use_mmsg):
+    batcher = BatchSender(sock, DEST, PayloadBuffer(PACKET_SIZE), PACKET_SIZE, batch=batch, use_mmsg=use_mmsg)
+    end = time.perf_counter() + RUN_SECONDS
+    count = 0
+    while time.perf_counter() < end:
+        try:
+            count += batcher.send(batch)
+        except OSError:
+            pass
+    return count
+
+
+def main():
+    # A bound sink keeps the destination port valid; nobody reads it, the kernel just drops
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(DEST)
+    sock = make_socket()
+
+    results = [("sendto + new payload", 1, bench_original(sock))]
+    for batch in BATCH_SIZES:
+        results.append(("sendmsg loop", batch, bench_batched(sock, batch, use_mmsg=False)))
+    if have_sendmmsg():
+        for batch in BATCH_SIZES:
+            results.append(("sendmmsg", batch, bench_batched(sock, batch, use_mmsg=True)))
+
+    print(f"\nLoopback send ceiling ({PACKET_SIZE} B packets, {RUN_SECONDS:.0f}s per run):")
+    print("{:<22} {:<8} {:<12} {:<10} {:<10}".format("Path", "Batch", "Packets/s", "Mbps", "Speedup"))
+    base_pps = results[0][2] / RUN_SECONDS
+    for path, batch, count in results:
+        pps = count / RUN_SECONDS
+        mbps = pps * PACKET_SIZE * 8 / (1024 * 1024)
+        print("{:<22} {:<8} {:<12.0f} {:<10.2f} {:<10.2f}".format(path, batch, pps, mbps, pps / base_pps))
+
+    sock.close()
+    sink.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+# paper_modules.py
+# udp_batch, packet_header and ratelog live once, in Hybrid Approach/Paper, where the
+# receivers share them with these scripts. Importing this module puts that directory on
+# sys.path (after this one, so a module here still wins).
+import os
+import sys
+
+PAPER_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "Paper"))
+if PAPER_DIR not in sys.path:
+    sys.path.append(PAPER_DIR)
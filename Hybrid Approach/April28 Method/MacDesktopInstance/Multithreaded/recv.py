@@ -4,12 +4,21 @@ import threading
 from collections import deque
 from tqdm import tqdm
 
+import paper_modules  # noqa: F401  (puts Paper/ on sys.path for the shared modules below)
+from packet_header import SequenceTracker, print_sequence_table
+from ratelog import RateLimitedLogger
+from udp_batch import BatchReceiver
+
 # Configuration
 PORT = 5005
 PACKET_SIZE = 65535        # Big enough for any UDP datagram
 IDLE_TIMEOUT = 1.0         # Seconds of silence → burst ends
+LOG_EVERY_N = 0            # Per-packet log lines: keep every Nth packet per thread (0/1 = no count sampling)
+LOG_INTERVAL = 1.0         # ...and at most one per thread per this many seconds (None = no time limit)
+DECODE_HEADERS = False     # Decode sender.py --header per datagram (loss/latency table); costs CPU per packet
+RECV_BATCH = 16            # Datagrams per receive syscall (recvmmsg on Linux); 1 = one recvfrom_into each
 
-def receiver_function(stop_event, statistics, lock):
+def receiver_function(stop_event, statistics, lock, seq_stats, logger):
     # Set up UDP socket for broadcast
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -23,35 +32,63 @@ def receiver_function(stop_event, statistics, lock):
     sock.settimeout(IDLE_TIMEOUT)
 
     burst_count = 0
+    burst_bytes = 0
     burst_start = None
     burst_last = None
     thread_name = threading.current_thread().name
+    buf = bytearray(PACKET_SIZE)
+    view = memoryview(buf)
+    tracker = None
+    if DECODE_HEADERS:
+        tracker = SequenceTracker()   # decodes sender.py --header
+        with lock:
+            seq_stats[thread_name] = tracker
+    out = logger.channel(thread_name)
+    batch = BatchReceiver(sock, RECV_BATCH) if RECV_BATCH > 1 else None
 
-    print(f"{thread_name}: Listening for broadcasts on port {PORT}...")
+    out.info("{}: Listening for broadcasts on port {}...", thread_name, PORT)
 
     while not stop_event.is_set():
         try:
-            data, addr = sock.recvfrom(PACKET_SIZE)
-            now = time.time()
-            print(f"{thread_name}: Received packet from {addr}")
+            if batch is not None:
+                n = batch.recv(IDLE_TIMEOUT)
+                if n == 0:
+                    continue
+                now_ns = time.time_ns()
+                if tracker is not None:
+                    for i in range(n):
+                        tracker.observe(batch.view(i), now_ns)
+                nbytes = batch.nbytes
+                out.event("{}: Received {} packets from {}", thread_name, n, batch.addr(0))
+            else:
+                nbytes, addr = sock.recvfrom_into(buf)
+                now_ns = time.time_ns()
+                if tracker is not None:
+                    tracker.observe(view[:nbytes], now_ns)
+                n = 1
+                out.event("{}: Received packet from {}", thread_name, addr)
+            now = now_ns / 1e9
+            # Burst bookkeeping once per batch
             if burst_count == 0:
                 burst_start = now
             burst_last = now
-            burst_count += 1
+            burst_count += n
+            burst_bytes += nbytes
         except socket.timeout:
             if burst_count > 0:
                 elapsed = burst_last - burst_start
-                mb_recv = burst_count * PACKET_SIZE / (1024 * 1024)
-                mbps = mb_recv * 8 / elapsed
+                mb_recv = burst_bytes / (1024 * 1024)   # bytes actually received
+                mbps = mb_recv * 8 / elapsed if elapsed > 0 else 0   # one batch can be the whole burst
                 with lock:
                     statistics.append((thread_name, burst_start, burst_last, burst_count, mb_recv, mbps))
-                print(f"{thread_name}: Burst ended. Packets: {burst_count}, MiB: {mb_recv:.2f}, Mbps: {mbps:.2f}")
+                out.info("{}: Burst ended. Packets: {}, MiB: {:.2f}, Mbps: {:.2f}", thread_name, burst_count, mb_recv, mbps)
                 burst_count = 0
+                burst_bytes = 0
                 burst_start = None
                 burst_last = None
             if stop_event.is_set():
                 break
-            print(f"{thread_name}: Waiting for data...")
+            out.info("{}: Waiting for data...", thread_name)
         except OSError as e:
             if getattr(e, 'winerror', None) == 10040:
                 now = time.time()
@@ -59,11 +96,12 @@ def receiver_function(stop_event, statistics, lock):
                     burst_start = now
                 burst_last = now
                 burst_count += 1
-                print(f"{thread_name}: Received oversized packet")
+                burst_bytes += PACKET_SIZE
+                out.event("{}: Received oversized packet", thread_name)
             else:
                 raise
     sock.close()
-    print(f"{thread_name}: Stopped.")
+    out.info("{}: Stopped.", thread_name)
 
 def main():
     # Prompt user for number of threads
@@ -73,13 +111,16 @@ def main():
     stop_event = threading.Event()
     statistics = deque()
     lock = threading.Lock()
+    seq_stats = {}
+    # Per-packet lines go through a sampled, asynchronous logger so printing doesn't skew the Mbps
+    logger = RateLimitedLogger(every_n=LOG_EVERY_N, interval=LOG_INTERVAL).start()
     threads = []
 
     # Create threads
     for i in range(N):
         thread = threading.Thread(
             target=receiver_function,
-            args=(stop_event, statistics, lock),
+            args=(stop_event, statistics, lock, seq_stats, logger),
             name=f"Thread-{i+1}"
         )
         threads.append(thread)
@@ -99,6 +140,9 @@ def main():
         stop_event.set()
         for thread in threads:
             thread.join()
+    logger.stop()
+    written, suppressed, dropped = logger.totals()
+    print(f"Log: {written} lines written, {suppressed} suppressed by sampling, {dropped} dropped (ring full)")
 
     # Display throughput table
     print("\nSummary of Burst Throughputs:")
@@ -113,5 +157,7 @@ def main():
             thread_name, start_str, end_str, burst_count, mb_recv, mbps
         ))
 
+    print_sequence_table({name: tracker.summary() for name, tracker in seq_stats.items()})
+
 if __name__ == "__main__":
     main()
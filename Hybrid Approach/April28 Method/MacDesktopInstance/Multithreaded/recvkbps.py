@@ -4,12 +4,19 @@ import threading
 from collections import deque
 from tqdm import tqdm
 
+import paper_modules  # noqa: F401  (puts Paper/ on sys.path for the shared modules below)
+from packet_header import SequenceTracker, print_sequence_table
+from ratelog import RateLimitedLogger
+
 # Configuration
 PORT = 5005
 BUFFER_SIZE = 65535        # Socket buffer size (not assumed packet size)
 IDLE_TIMEOUT = 1.0         # Seconds of silence → burst ends
+LOG_EVERY_N = 0            # Per-packet log lines: keep every Nth packet per thread (0/1 = no count sampling)
+LOG_INTERVAL = 1.0         # ...and at most one per thread per this many seconds (None = no time limit)
+DECODE_HEADERS = False     # Decode sender.py --header per datagram (loss/latency table); costs CPU per packet
 
-def receiver_function(stop_event, statistics, lock):
+def receiver_function(stop_event, statistics, lock, seq_stats, logger):
     # Set up UDP socket for broadcast
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -27,14 +34,24 @@ def receiver_function(stop_event, statistics, lock):
     burst_last = None
     total_bytes = 0
     thread_name = threading.current_thread().name
+    buf = bytearray(BUFFER_SIZE)
+    view = memoryview(buf)
+    tracker = None
+    if DECODE_HEADERS:
+        tracker = SequenceTracker()   # decodes sender.py --header
+        with lock:
+            seq_stats[thread_name] = tracker
+    out = logger.channel(thread_name)
 
-    print(f"{thread_name}: Listening for broadcasts on port {PORT}...")
+    out.info("{}: Listening for broadcasts on port {}...", thread_name, PORT)
 
     while not stop_event.is_set():
         try:
-            data, addr = sock.recvfrom(BUFFER_SIZE)
-            now = time.time()
-            packet_size = len(data)
+            packet_size, addr = sock.recvfrom_into(buf)
+            now_ns = time.time_ns()
+            now = now_ns / 1e9
+            if tracker is not None:
+                tracker.observe(view[:packet_size], now_ns)
 
             if burst_count == 0:
                 burst_start = now
@@ -44,7 +61,7 @@ def receiver_function(stop_event, statistics, lock):
             burst_count += 1
             total_bytes += packet_size
 
-            print(f"{thread_name}: Received packet of {packet_size} bytes from {addr}")
+            out.event("{}: Received packet of {} bytes from {}", thread_name, packet_size, addr)
             
         except socket.timeout:
             if burst_count > 0:
@@ -56,7 +73,7 @@ def receiver_function(stop_event, statistics, lock):
                 with lock:
                     statistics.append((thread_name, burst_start, burst_last, burst_count, kB_recv, kbps))
 
-                print(f"{thread_name}: Burst ended. Packets: {burst_count}, kB: {kB_recv:.2f}, kbps: {kbps:.2f}")
+                out.info("{}: Burst ended. Packets: {}, kB: {:.2f}, kbps: {:.2f}", thread_name, burst_count, kB_recv, kbps)
 
                 # Reset burst tracking
                 burst_count = 0
@@ -66,15 +83,15 @@ def receiver_function(stop_event, statistics, lock):
 
             if stop_event.is_set():
                 break
-            print(f"{thread_name}: Waiting for data...")
+            out.info("{}: Waiting for data...", thread_name)
             
         except OSError as e:
-            print(f"{thread_name}: Socket error: {e}")
+            out.info("{}: Socket error: {}", thread_name, e)
             if stop_event.is_set():
                 break
                 
     sock.close()
-    print(f"{thread_name}: Stopped.")
+    out.info("{}: Stopped.", thread_name)
 
 def main():
     N = int(input("Enter the number of threads: "))
@@ -82,12 +99,15 @@ def main():
     stop_event = threading.Event()
     statistics = deque()
     lock = threading.Lock()
+    seq_stats = {}
+    # Per-packet lines go through a sampled, asynchronous logger so printing doesn't skew the Mbps
+    logger = RateLimitedLogger(every_n=LOG_EVERY_N, interval=LOG_INTERVAL).start()
     threads = []
 
     for i in range(N):
         thread = threading.Thread(
             target=receiver_function,
-            args=(stop_event, statistics, lock),
+            args=(stop_event, statistics, lock, seq_stats, logger),
             name=f"Thread-{i+1}"
         )
         threads.append(thread)
@@ -105,6 +125,9 @@ def main():
         stop_event.set()
         for thread in threads:
             thread.join()
+    logger.stop()
+    written, suppressed, dropped = logger.totals()
+    print(f"Log: {written} lines written, {suppressed} suppressed by sampling, {dropped} dropped (ring full)")
 
     print("\nSummary of Burst Throughputs:")
     print("{:<10} {:<20} {:<20} {:<10} {:<10} {:<10}".format(
@@ -118,5 +141,7 @@ def main():
             thread_name, start_str, end_str, burst_count, kB_recv, kbps
         ))
 
+    print_sequence_table({name: tracker.summary() for name, tracker in seq_stats.items()})
+
 if __name__ == "__main__":
     main()
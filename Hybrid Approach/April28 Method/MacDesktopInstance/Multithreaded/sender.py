@@ -1,7 +1,15 @@
 # sender_throughput.py
+import argparse
+import multiprocessing as mp
+import queue
 import socket
+import threading
 import time
 
+import paper_modules  # noqa: F401  (puts Paper/ on sys.path for the shared modules below)
+from packet_header import HEADER_SIZE, new_run_id
+from udp_batch import MAX_BATCH, BatchSender, PayloadBuffer, header_slots
+
 # Configuration
 BROADCAST_IP = '192.168.0.255'   # KM-TEST adapter broadcast
 PORT = 5005
@@ -9,24 +17,250 @@ PACKET_SIZE = 1024               # bytes per packet
 duration = 5.0                   # seconds to send
 send_delay = 0.0005              # 0.5ms pause to prevent buffer overflow
 
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1048576)  # 1 MB send buffer
+# Token-bucket pacing (used when a target rate is given)
+SPIN_THRESHOLD_NS = 200_000      # waits shorter than 0.2ms are spun on perf_counter_ns, longer ones slept
+BURST_WINDOW_NS = 1_000_000      # size bursts to cover ~1ms of traffic at the target rate
+BUCKET_DEPTH = 4                 # bucket holds this many bursts, so oversleeping is caught up
+
+# --workers supervision
+START_TIMEOUT = 10.0             # seconds for every worker to open its socket and reach the start line
+RESULT_GRACE = 5.0               # seconds past start + duration before a silent worker counts as hung
+POLL_INTERVAL = 0.5              # seconds between worker liveness checks
+
+
+class TokenBucket:
+    """Rate pacer: tokens accrue at rate_pps, at most `burst` may be spent at once"""
+
+    def __init__(self, rate_pps, burst):
+        self.interval_ns = 1e9 / rate_pps
+        self.burst = burst
+        self.depth = burst * BUCKET_DEPTH
+        self.tokens = float(burst)
+        self.last_ns = time.perf_counter_ns()
+
+    def acquire(self):
+        """Block until a whole burst of tokens has accrued and return how many packets to send
+
+        Waiting for `burst` tokens (not just one) is what makes each send a full batch.
+        Long waits are slept in full - an oversleep only leaves extra tokens, which the
+        bucket depth lets the next calls catch up on; only waits shorter than
+        SPIN_THRESHOLD_NS are spun.
+        """
+        need = min(self.burst, self.depth)
+        while True:
+            now = time.perf_counter_ns()
+            self.tokens = min(self.depth, self.tokens + (now - self.last_ns) / self.interval_ns)
+            self.last_ns = now
+            if self.tokens >= need:
+                n = min(int(self.tokens), self.burst)
+                self.tokens -= n
+                return n
+            wait_ns = (need - self.tokens) * self.interval_ns
+            if wait_ns > SPIN_THRESHOLD_NS:
+                time.sleep(wait_ns / 1e9)
+
+
+def burst_size(rate_pps):
+    """Packets per burst so one burst covers BURST_WINDOW_NS at the target rate"""
+    return max(1, round(rate_pps * BURST_WINDOW_NS / 1e9))
+
+
+def mbps_to_pps(mbps, packet_size):
+    """Convert a target rate in Mbps (same MiB-based unit as the summary line) to packets/s"""
+    return mbps * 1024 * 1024 / 8 / packet_size
+
+
+def send_fixed_delay(batcher, duration, delay):
+    """Original pacing: fixed sleep after every datagram"""
+    end_time = time.time() + duration
+    count = 0
+    while time.time() < end_time:
+        try:
+            count += batcher.send(1)
+        except OSError as e:
+            print(f"Send failed: {e}")
+            time.sleep(0.01)  # recover before next try
+            continue
+        time.sleep(delay)
+    return count
+
+
+def send_paced(batcher, duration, rate_pps):
+    """Token-bucket pacing: hold rate_pps over the run, one batched syscall per burst"""
+    bucket = TokenBucket(rate_pps, burst_size(rate_pps))
+    end_ns = time.perf_counter_ns() + int(duration * 1e9)
+    count = 0
+    while time.perf_counter_ns() < end_ns:
+        n = bucket.acquire()
+        try:
+            count += batcher.send(n)
+        except OSError as e:
+            print(f"Send failed: {e}")
+            time.sleep(0.01)  # recover before next try
+    return count
+
+
+def send_flood(batcher, duration):
+    """No pacing: full batches back to back, to find the generator's packets/s ceiling"""
+    end_ns = time.perf_counter_ns() + int(duration * 1e9)
+    count = 0
+    while time.perf_counter_ns() < end_ns:
+        try:
+            count += batcher.send(batcher.batch)
+        except OSError:
+            pass  # send buffer full; keep pushing
+    return count
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="UDP broadcast throughput sender")
+    parser.add_argument("--dest", default=BROADCAST_IP, help="destination/broadcast address")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--size", type=int, default=PACKET_SIZE, help="bytes per packet")
+    parser.add_argument("--duration", type=float, default=duration, help="seconds to send")
+    parser.add_argument("--delay", type=float, default=send_delay,
+                        help="fixed pause after each packet (used when no target rate is given)")
+    rate = parser.add_mutually_exclusive_group()
+    rate.add_argument("--rate-mbps", type=float, help="target rate in Mbps (token-bucket pacing)")
+    rate.add_argument("--pps", type=float, help="target rate in packets/s (token-bucket pacing)")
+    rate.add_argument("--flood", action="store_true", help="send unpaced to measure the packets/s ceiling")
+    parser.add_argument("--batch", type=int, default=MAX_BATCH, help="max datagrams per send syscall")
+    parser.add_argument("--no-mmsg", action="store_true", help="force the sendmsg loop instead of sendmmsg")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="sender processes; each gets its own socket and 1/N of the target rate")
+    parser.add_argument("--header", action="store_true",
+                        help="prefix each packet with run id, sender id, sequence number and send time")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.header and args.size < HEADER_SIZE:
+        parser.error(f"--size must be at least {HEADER_SIZE} bytes with --header")
+    args.run_id = new_run_id()
+    return args
 
-end_time = time.time() + duration
-count = 0
 
-while time.time() < end_time:
+def run_sender(args, rate_pps, barrier=None, sender_id=1):
+    """Open a socket, optionally wait on the start barrier, send; return (count, elapsed, path)"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1048576)  # 1 MB send buffer
+
+    dest = (args.dest, args.port)
+    header = (sender_id, args.run_id) if args.header else None
+    payload = PayloadBuffer(args.size * header_slots(args.batch, header))
+    batcher = BatchSender(sock, dest, payload, args.size, batch=args.batch,
+                          use_mmsg=not args.no_mmsg, header=header)
+
+    if barrier is not None:
+        barrier.wait(START_TIMEOUT)  # all workers start sending together; broken if one fails
+    start = time.perf_counter()
+    if args.flood:
+        count = send_flood(batcher, args.duration)
+    elif rate_pps:
+        count = send_paced(batcher, args.duration, rate_pps)
+    else:
+        count = send_fixed_delay(batcher, args.duration, args.delay)
+    elapsed = time.perf_counter() - start
+    sock.close()
+    return count, elapsed, "sendmmsg" if batcher.use_mmsg else "sendmsg loop"
+
+
+def sender_worker(args, rate_pps, barrier, results, sender_id):
+    """Entry point of one --workers process: its own socket, sender id and share of the rate
+
+    Puts (sender id, (count, elapsed, path) or None, error or None) on results.
+    """
     try:
-        sock.sendto(b'A' * PACKET_SIZE, (BROADCAST_IP, PORT))
-        count += 1
-    except OSError as e:
-        print(f"Send failed: {e}")
-        time.sleep(0.01)  # recover before next try
-        continue
-    time.sleep(send_delay)
-
-elapsed = duration
-mb_sent = count * PACKET_SIZE / (1024 * 1024)
-mbps = mb_sent * 8 / elapsed
-print(f"Sent {count} packets ({mb_sent:.2f} MiB) in {elapsed:.2f}s — throughput: {mbps:.2f} Mbps")
+        results.put((sender_id, run_sender(args, rate_pps, barrier, sender_id), None))
+    except threading.BrokenBarrierError:
+        results.put((sender_id, None, "start barrier broken (another worker failed or timed out)"))
+    except Exception as e:
+        barrier.abort()  # release the workers still waiting at the start line
+        results.put((sender_id, None, f"{type(e).__name__}: {e}"))
+
+
+def collect_results(procs, barrier, results, duration):
+    """{sender id: (outcome, error)} for every worker, without hanging on a dead or stuck one
+
+    A worker that exits with a non-zero code (killed, crashed in C) never reports, and one
+    that is still silent START_TIMEOUT + duration + RESULT_GRACE after launch is terminated.
+    """
+    outcomes = {}
+    deadline = time.monotonic() + START_TIMEOUT + duration + RESULT_GRACE
+    while len(outcomes) < len(procs):
+        try:
+            sender_id, outcome, error = results.get(timeout=POLL_INTERVAL)
+            outcomes[sender_id] = (outcome, error)
+            continue
+        except queue.Empty:
+            pass
+        timed_out = time.monotonic() > deadline
+        for sender_id, proc in enumerate(procs, 1):
+            if sender_id in outcomes:
+                continue
+            # exitcode 0 means its result is still in flight: wait for it
+            if not proc.is_alive() and proc.exitcode != 0:
+                outcomes[sender_id] = (None, f"exited with code {proc.exitcode}")
+                barrier.abort()
+            elif timed_out:
+                proc.terminate()
+                outcomes[sender_id] = (None, "no result before the timeout")
+                barrier.abort()
+    return outcomes
+
+
+def run_workers(args, rate_pps):
+    """Fan the send out over args.workers processes and merge the counters of those that finished"""
+    share = rate_pps / args.workers if rate_pps else None
+    barrier = mp.Barrier(args.workers)
+    results = mp.Queue()
+    procs = [mp.Process(target=sender_worker, args=(args, share, barrier, results, i + 1), name=f"Sender-{i+1}")
+             for i in range(args.workers)]
+    for proc in procs:
+        proc.start()
+    # Drain before join so a full queue can't block a worker's exit
+    outcomes = collect_results(procs, barrier, results, args.duration)
+    for proc in procs:
+        proc.join(timeout=POLL_INTERVAL)
+        if proc.is_alive():
+            proc.terminate()
+    for sender_id, (_, error) in sorted(outcomes.items()):
+        if error is not None:
+            print(f"Sender-{sender_id} failed: {error}")
+    done = [outcome for outcome, _ in outcomes.values() if outcome is not None]
+    if not done:
+        raise SystemExit("All sender workers failed")
+    count = sum(c for c, _, _ in done)
+    elapsed = max(e for _, e, _ in done)  # workers start together, so the slowest bounds the run
+    return count, elapsed, done[0][2]
+
+
+def main():
+    args = parse_args()
+
+    rate_pps = args.pps
+    if args.rate_mbps is not None:
+        rate_pps = mbps_to_pps(args.rate_mbps, args.size)
+    if rate_pps:
+        share = rate_pps / args.workers
+        print(f"Pacing to {rate_pps:.0f} packets/s over {args.workers} worker(s) "
+              f"(burst {burst_size(share)} per worker)")
+
+    if args.header:
+        print(f"Sequence header on, run id {args.run_id:08x}")
+
+    if args.workers > 1:
+        count, elapsed, path = run_workers(args, rate_pps)
+    else:
+        count, elapsed, path = run_sender(args, rate_pps)
+
+    mb_sent = count * args.size / (1024 * 1024)
+    mbps = mb_sent * 8 / elapsed if elapsed > 0 else 0
+    print(f"Sent {count} packets ({mb_sent:.2f} MiB) in {elapsed:.2f}s — throughput: {mbps:.2f} Mbps")
+    if args.flood:
+        print(f"Send ceiling: {count / elapsed if elapsed > 0 else 0:.0f} packets/s ({path}, batch {args.batch}, "
+              f"{args.workers} worker(s))")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+# analyze.py
+# Offline analysis for the paper: turns capture files (capture.py, written with
+# recv.CAPTURE_PATH) and saved recv.py output (its "RESULT: N threads -> X Mbps" lines,
+# e.g. from `python recv.py | tee run1.txt`) into the tables and figures we used to copy
+# by hand. Every trial - one capture file or one RESULT line - is a sample for its thread
+# count; the thread-count table reports mean, std and the 95% CI (Student t) across them.
+#
+# From captures it also recovers the per-burst table recv.py computes live (a burst ends
+# after `gap` seconds of silence on a receiver), loss per (receiver, sender) stream from
+# the sequence header, and latency percentiles. All of it is whole-array NumPy work - sort,
+# diff, reduceat, bincount - with no Python loop per packet, so captures of tens of
+# millions of records take seconds. One sender run per capture is assumed for loss.
+#
+#   python analyze.py --captures captures/*.cap --logs run1.txt run2.txt --out analysis/paper
+#
+# Writes <out>_trials.csv, <out>_threads.csv and <out>_bursts.csv, and with matplotlib
+# installed <out>_throughput, <out>_bursts and <out>_latency figures (.pdf and .png).
+import argparse
+import csv
+import os
+import re
+
+import numpy as np
+
+from capture import HAS_HEADER, read_capture
+from recv import IDLE_TIMEOUT, T_95
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import MaxNLocator
+except ImportError:       # tables only
+    plt = None
+
+MIB = 1024 * 1024
+PERCENTILES = (50, 90, 99)
+RESULT_LINE = re.compile(r"RESULT: (\d+) threads -> ([\d.]+) Mbps \((\d+) packets\)")
+FIGURE_SIZE = (3.5, 2.6)          # inches: one column of a two-column paper
+FIGURE_RC = {"font.size": 8, "axes.titlesize": 8, "axes.labelsize": 8, "legend.fontsize": 7,
+             "xtick.labelsize": 7, "ytick.labelsize": 7, "pdf.fonttype": 42}
+
+TRIAL_FIELDS = ["source", "threads", "mbps", "packets", "loss_pct",
+                "lat_p50_ms", "lat_p90_ms", "lat_p99_ms"]
+THREAD_FIELDS = ["threads", "trials", "mean_mbps", "std_mbps", "ci95_mbps", "min_mbps", "max_mbps",
+                 "mean_packets", "loss_pct", "lat_p50_ms", "lat_p90_ms", "lat_p99_ms"]
+BURST_FIELDS = ["source", "threads", "receiver", "start", "end", "packets", "mib", "mbps"]
+
+
+def receiver_time_order(receiver, t):
+    """Indices that sort records by (receiver, time)
+
+    CaptureBuffer writes each receiver's records in receive order, so a stable radix sort on
+    the 16-bit receiver id usually suffices; otherwise sort one packed int64 key (receiver
+    above the time offset) and only fall back to lexsort when that cannot hold the span.
+    """
+    order = np.argsort(receiver, kind="stable")
+    ordered = t[order]
+    same = receiver[order][1:] == receiver[order][:-1]
+    if not (same & (ordered[1:] < ordered[:-1])).any():
+        return order
+    span = int(t.max() - t.min())
+    if span < 1 << 47:
+        return np.argsort((receiver.astype(np.int64) << 47) | (t - t.min()))
+    return np.lexsort((t, receiver))
+
+
+def capture_bursts(records, gap):
+    """Per-burst columns for one capture, as recv.py's burst tuples would have them
+
+    Records are ordered by (receiver, time); a burst starts at each receiver change or
+    silence of at least `gap` seconds. Mbps is MiB*8 over first-to-last packet time.
+    """
+    if not len(records):
+        empty = np.zeros(0)
+        return {"receiver": empty.astype(np.int64), "start": empty, "end": empty,
+                "packets": empty.astype(np.int64), "mib": empty, "mbps": empty}
+    t = np.asarray(records["t_ns"])
+    receiver = np.asarray(records["receiver"])
+    order = receiver_time_order(receiver, t)
+    t = t[order]
+    receiver = receiver[order]
+    size = np.asarray(records["size"])[order].astype(np.int64)
+
+    new = np.empty(len(t), dtype=bool)
+    new[0] = True
+    new[1:] = (receiver[1:] != receiver[:-1]) | (np.diff(t) >= int(gap * 1e9))
+    starts = np.flatnonzero(new)
+    ends = np.append(starts[1:], len(t)) - 1
+    mib = np.add.reduceat(size, starts) / MIB
+    elapsed = (t[ends] - t[starts]) / 1e9
+    mbps = np.divide(mib * 8, elapsed, out=np.zeros_like(mib), where=elapsed > 0)
+    return {"receiver": receiver[starts].astype(np.int64), "start": t[starts] / 1e9, "end": t[ends] / 1e9,
+            "packets": ends - starts + 1, "mib": mib, "mbps": mbps}
+
+
+def capture_loss(records):
+    """Mean loss % over (receiver, sender) streams with a sequence header, or NaN without one
+
+    A stream's expected count is its sequence range; duplicates count once.
+    """
+    headed = (records["flags"] & HAS_HEADER) != 0
+    if not headed.any():
+        return float("nan")
+    receiver = records["receiver"][headed].astype(np.int64)
+    sender = records["sender"][headed].astype(np.int64)
+    seq = records["seq"][headed]
+    # Dense stream index; per-stream sequence range from min/max, distinct seqs from a seen-bitmap
+    senders = int(sender.max()) + 1
+    stream = receiver * senders + sender
+    streams = (int(receiver.max()) + 1) * senders
+    present = np.bincount(stream, minlength=streams) > 0
+    low = np.full(streams, np.iinfo(np.uint64).max, dtype=np.uint64)
+    high = np.zeros(streams, dtype=np.uint64)
+    np.minimum.at(low, stream, seq)
+    np.maximum.at(high, stream, seq)
+    span = np.where(present, (high - np.where(present, low, 0)).astype(np.int64) + 1, 0)
+    if span.sum() <= 4 * len(seq) + (1 << 20):
+        offsets = np.concatenate(([0], np.cumsum(span)[:-1]))
+        seen = np.zeros(int(span.sum()), dtype=bool)
+        seen[offsets[stream] + (seq - low[stream]).astype(np.int64)] = True
+        received = np.add.reduceat(seen.astype(np.int64), offsets[present])
+        return float(np.mean(100.0 * (1 - received / span[present])))
+    # Sparse ranges (e.g. sequence restarts): sort instead
+    key = stream
+    order = np.lexsort((seq, key))
+    key = key[order]
+    seq = seq[order]
+    same_key = key[1:] == key[:-1]
+    first = np.flatnonzero(np.concatenate(([True], ~same_key)))
+    last = np.append(first[1:], len(key)) - 1
+    fresh = np.concatenate(([True], ~(same_key & (seq[1:] == seq[:-1]))))
+    received = np.add.reduceat(fresh.astype(np.int64), first)
+    expected = (seq[last] - seq[first]).astype(np.float64) + 1
+    return float(np.mean(100.0 * (1 - received / expected)))
+
+
+def capture_latency(records):
+    """p50/p90/p99 one-way latency (ms) over datagrams with a sequence header; NaNs without one"""
+    headed = (records["flags"] & HAS_HEADER) != 0
+    if not headed.any():
+        return [float("nan")] * len(PERCENTILES)
+    transit = (records["t_ns"][headed] - records["sent_ns"][headed]) / 1e6
+    return [float(v) for v in np.percentile(transit, PERCENTILES)]
+
+
+def load_capture(path, gap):
+    """(trial row, burst rows) of one capture file"""
+    records, names, _ = read_capture(path)
+    bursts = capture_bursts(records, gap)
+    source = os.path.basename(path)
+    threads = len(names)
+    p50, p90, p99 = capture_latency(records)
+    trial = {"source": source, "threads": threads,
+             # Same metric as results.calculate_total_throughput: sum of per-burst Mbps
+             "mbps": float(bursts["mbps"].sum()), "packets": len(records),
+             "loss_pct": capture_loss(records), "lat_p50_ms": p50, "lat_p90_ms": p90, "lat_p99_ms": p99}
+    names = np.asarray(names)
+    rows = [{"source": source, "threads": threads, "receiver": name, "start": start, "end": end,
+             "packets": packets, "mib": mib, "mbps": mbps}
+            for name, start, end, packets, mib, mbps in zip(
+                names[bursts["receiver"]].tolist(), bursts["start"].tolist(), bursts["end"].tolist(),
+                bursts["packets"].tolist(), bursts["mib"].tolist(), bursts["mbps"].tolist())]
+    return trial, rows
+
+
+def load_log(path):
+    """Trial rows from the RESULT lines of saved recv.py output"""
+    nan = float("nan")
+    with open(path, errors="replace") as f:
+        text = f.read()
+    return [{"source": os.path.basename(path), "threads": int(threads), "mbps": float(mbps),
+             "packets": int(packets), "loss_pct": nan, "lat_p50_ms": nan, "lat_p90_ms": nan,
+             "lat_p99_ms": nan}
+            for threads, mbps, packets in RESULT_LINE.findall(text)]
+
+
+def group_mean(inverse, values, groups):
+    """Per-group mean ignoring NaNs (NaN where a group has no value)"""
+    known = ~np.isnan(values)
+    count = np.bincount(inverse[known], minlength=groups)
+    total = np.bincount(inverse[known], weights=values[known], minlength=groups)
+    return np.divide(total, count, out=np.full(groups, np.nan), where=count > 0)
+
+
+def thread_table(trials):
+    """Rows per thread count: trials, mean/std/95% CI/min/max Mbps, packets, loss, latency"""
+    threads = np.array([t["threads"] for t in trials])
+    keys, inverse = np.unique(threads, return_inverse=True)
+    groups = len(keys)
+    mbps = np.array([t["mbps"] for t in trials], dtype=np.float64)
+    n = np.bincount(inverse, minlength=groups)
+    mean = np.bincount(inverse, weights=mbps, minlength=groups) / n
+    dev2 = np.bincount(inverse, weights=(mbps - mean[inverse]) ** 2, minlength=groups)
+    std = np.sqrt(np.divide(dev2, n - 1, out=np.full(groups, np.nan), where=n > 1))
+    # Student t for n-1 degrees of freedom (as recv.mean_ci), normal beyond the table
+    t_crit = np.where(n - 2 < len(T_95), np.asarray(T_95)[np.clip(n - 2, 0, len(T_95) - 1)], 1.96)
+    ci = np.where(n > 1, t_crit * std / np.sqrt(n), np.inf)
+    low = np.full(groups, np.inf)
+    high = np.full(groups, -np.inf)
+    np.minimum.at(low, inverse, mbps)
+    np.maximum.at(high, inverse, mbps)
+    packets = np.bincount(inverse, weights=[t["packets"] for t in trials], minlength=groups) / n
+    columns = {"threads": keys, "trials": n, "mean_mbps": mean, "std_mbps": std, "ci95_mbps": ci,
+               "min_mbps": low, "max_mbps": high, "mean_packets": packets}
+    for field in ("loss_pct", "lat_p50_ms", "lat_p90_ms", "lat_p99_ms"):
+        columns[field] = group_mean(inverse, np.array([t[field] for t in trials], dtype=np.float64), groups)
+    return [dict(zip(THREAD_FIELDS, values))
+            for values in zip(*(columns[f].tolist() for f in THREAD_FIELDS))]
+
+
+def write_csv(path, fields, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def save_figure(fig, prefix):
+    fig.tight_layout()
+    for ext in ("pdf", "png"):
+        fig.savefig(f"{prefix}.{ext}", dpi=300)
+    plt.close(fig)
+
+
+def plot_throughput(table, prefix):
+    """Mean throughput per thread count with 95% CI error bars"""
+    x = [row["threads"] for row in table]
+    y = [row["mean_mbps"] for row in table]
+    err = [row["ci95_mbps"] if np.isfinite(row["ci95_mbps"]) else 0.0 for row in table]
+    fig, ax = plt.subplots(figsize=FIGURE_SIZE)
+    ax.errorbar(x, y, yerr=err, marker="o", markersize=3, capsize=3, linewidth=1)
+    ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.set_xlabel("Receiver threads")
+    ax.set_ylabel("Throughput (Mbps)")
+    ax.grid(True, alpha=0.3)
+    save_figure(fig, prefix)
+
+
+def plot_bursts(bursts, prefix):
+    """Distribution of per-burst Mbps for each thread count"""
+    threads = np.array([b["threads"] for b in bursts])
+    mbps = np.array([b["mbps"] for b in bursts])
+    keys = np.unique(threads)
+    fig, ax = plt.subplots(figsize=FIGURE_SIZE)
+    ax.boxplot([mbps[threads == k] for k in keys], showfliers=False)
+    ax.set_xticks(range(1, len(keys) + 1), [str(k) for k in keys])
+    ax.set_xlabel("Receiver threads")
+    ax.set_ylabel("Per-burst throughput (Mbps)")
+    ax.grid(True, axis="y", alpha=0.3)
+    save_figure(fig, prefix)
+
+
+def plot_latency(table, prefix):
+    """Latency percentiles per thread count"""
+    fig, ax = plt.subplots(figsize=FIGURE_SIZE)
+    x = [row["threads"] for row in table]
+    for p in PERCENTILES:
+        ax.plot(x, [row[f"lat_p{p}_ms"] for row in table], marker="o", markersize=3, linewidth=1,
+                label=f"p{p}")
+    ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.set_xlabel("Receiver threads")
+    ax.set_ylabel("One-way latency (ms)")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    save_figure(fig, prefix)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="tables, CIs and figures from captures and recv.py logs")
+    parser.add_argument("--captures", nargs="*", default=[], help="capture files (one trial each)")
+    parser.add_argument("--logs", nargs="*", default=[], help="saved recv.py output with RESULT lines")
+    parser.add_argument("--gap", type=float, default=IDLE_TIMEOUT, help="seconds of silence that end a burst")
+    parser.add_argument("--out", default="analysis", help="output prefix")
+    args = parser.parse_args()
+    if not args.captures and not args.logs:
+        parser.error("give --captures and/or --logs")
+    return args
+
+
+def main():
+    args = parse_args()
+    trials = []
+    bursts = []
+    for path in args.captures:
+        trial, rows = load_capture(path, args.gap)
+        trials.append(trial)
+        bursts.extend(rows)
+        print(f"{path}: {trial['packets']} packets, {len(rows)} bursts, {trial['mbps']:.2f} Mbps")
+    for path in args.logs:
+        rows = load_log(path)
+        trials.extend(rows)
+        print(f"{path}: {len(rows)} RESULT lines")
+    if not trials:
+        print("No trials found")
+        return
+
+    directory = os.path.dirname(args.out)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    table = thread_table(trials)
+    write_csv(f"{args.out}_trials.csv", TRIAL_FIELDS, trials)
+    write_csv(f"{args.out}_threads.csv", THREAD_FIELDS, table)
+    if bursts:
+        write_csv(f"{args.out}_bursts.csv", BURST_FIELDS, bursts)
+
+    print(f"\n{'Threads':<10} {'Trials':<8} {'Mean Mbps':<12} {'± 95% CI':<10} {'Std':<10} {'Loss %':<8} {'p99 ms':<8}")
+    for row in table:
+        print(f"{row['threads']:<10} {row['trials']:<8} {row['mean_mbps']:<12.2f} {row['ci95_mbps']:<10.2f} "
+              f"{row['std_mbps']:<10.2f} {row['loss_pct']:<8.2f} {row['lat_p99_ms']:<8.3f}")
+
+    if plt is None:
+        print("\nmatplotlib not installed - CSV only")
+        return
+    with plt.rc_context(FIGURE_RC):
+        plot_throughput(table, f"{args.out}_throughput")
+        if bursts:
+            plot_bursts(bursts, f"{args.out}_bursts")
+        if any(np.isfinite(row["lat_p50_ms"]) for row in table):
+            plot_latency(table, f"{args.out}_latency")
+    print(f"\nWrote {args.out}_*.csv and figures (.pdf, .png)")
+
+
+if __name__ == "__main__":
+    main()
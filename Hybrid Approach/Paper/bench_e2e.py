@@ -0,0 +1,218 @@
+# bench_e2e.py
+# Reproducible end-to-end loopback benchmark of the sender/receiver pair. Starts the
+# receivers in this process (recv.py's receiver code, any in-process backend) and
+# sender.py as a child process on a loopback broadcast address, sweeps packet size x
+# pacing x receiver count, and records pps, Mbps, loss, CPU% and latency percentiles.
+# Results go to JSON and CSV; --baseline compares against an earlier JSON so
+# regressions in the receive loop show up before a field experiment.
+#
+#   python bench_e2e.py --out results/today
+#   python bench_e2e.py --out results/today --baseline results/baseline.json
+#   python bench_e2e.py --sizes 1024 --rates 0 --receivers 1 10 --backend eventloop
+import argparse
+import csv
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+import recv
+from burst_stats import StatsAggregator
+from ratemeter import MIB, MeterGroup
+from recv_eventloop import WakeableEvent, start_event_loop
+from udp_async import start_async_receivers
+
+try:
+    import resource
+except ImportError:       # Windows: no child CPU accounting
+    resource = None
+
+# Configuration
+SENDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "April28 Method",
+                      "MacDesktopInstance", "Multithreaded", "sender.py")
+DEST = "127.255.255.255"          # loopback broadcast reaches every bound socket
+SIZES = [64, 1024, 8192]          # bytes per packet (>= the 24-byte header)
+RATES = [1000, 10000, 0]          # packets/s offered by the sender; 0 = --flood
+RECEIVERS = [1, 10, 50]
+BACKENDS = ("threads", "eventloop", "asyncio")
+DURATION = 3.0                    # seconds the sender runs per case
+DRAIN_TIME = 0.2                  # seconds to let receive queues empty after the sender exits
+STARTUP_TIMEOUT = 30.0
+TOLERANCE = 0.10                  # relative drop in pps/Mbps (or rise in CPU%) flagged as a regression
+LOSS_TOLERANCE = 1.0              # percentage points of extra loss flagged as a regression
+
+FIELDS = ["backend", "size", "rate_pps", "receivers", "sent", "received", "pps", "mbps",
+          "loss_pct", "recv_cpu_pct", "send_cpu_pct", "lat_p50_ms", "lat_p90_ms", "lat_p99_ms"]
+KEY = ("backend", "size", "rate_pps", "receivers")
+
+
+def start_receivers(backend, n, stop_event, aggregator, seq_stats, meters, ready):
+    lock = threading.Lock()
+    if backend == "asyncio":
+        return [start_async_receivers(n, stop_event, aggregator, lock, recv.PORT, recv.IDLE_TIMEOUT,
+                                      recv.PACKET_SIZE, seq_stats, meters=meters, ready=ready)]
+    if backend == "eventloop":
+        return [start_event_loop(n, stop_event, aggregator, lock, recv.PORT, recv.IDLE_TIMEOUT,
+                                 recv.PACKET_SIZE, seq_stats, meters=meters, ready=ready)]
+    threads = [threading.Thread(target=recv.receiver_function,
+                                args=(stop_event, aggregator, lock, seq_stats, meters, ready),
+                                name=f"T{i+1}") for i in range(n)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def child_cpu():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_sender(size, rate_pps, duration):
+    """Run sender.py to completion; returns (packets sent, seconds it reported)"""
+    cmd = [sys.executable, SENDER, "--dest", DEST, "--port", str(recv.PORT), "--size", str(size),
+           "--duration", str(duration), "--header"]
+    cmd += ["--pps", str(rate_pps)] if rate_pps else ["--flood"]
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    match = re.search(r"Sent (\d+) packets .* in ([\d.]+)s", out)
+    if match is None:
+        raise RuntimeError(f"unexpected sender output:\n{out}")
+    return int(match.group(1)), float(match.group(2))
+
+
+def run_case(backend, size, rate_pps, n, duration):
+    stop_event = WakeableEvent()
+    aggregator = StatsAggregator()
+    seq_stats = {}
+    meters = MeterGroup()
+    ready = threading.Barrier((n if backend == "threads" else 1) + 1)
+    threads = start_receivers(backend, n, stop_event, aggregator, seq_stats, meters, ready)
+    try:
+        ready.wait(STARTUP_TIMEOUT)
+    except threading.BrokenBarrierError:
+        print(f"⚠️  Not all receivers were ready after {STARTUP_TIMEOUT}s")
+
+    cpu0, child0 = time.process_time(), child_cpu()
+    sent, elapsed = run_sender(size, rate_pps, duration)
+    time.sleep(DRAIN_TIME)
+    recv_cpu = time.process_time() - cpu0
+    send_cpu = child_cpu() - child0
+
+    stop_event.set()
+    for thread in threads:
+        thread.join(timeout=recv.IDLE_TIMEOUT + 1.0)
+
+    totals = meters.aggregate(time.time())
+    received, nbytes = totals["packets"], totals["bytes"]
+    summaries = [t.summary() for t in seq_stats.values()]
+    summaries = [s for s in summaries if s is not None]
+    p50s = sorted(s["lat_p50_ms"] for s in summaries)
+    return {
+        "backend": backend,
+        "size": size,
+        "rate_pps": rate_pps,
+        "receivers": n,
+        "sent": sent,
+        "received": received,
+        # Per receiver: every receiver is offered the whole broadcast
+        "pps": received / n / elapsed if elapsed else 0.0,
+        "mbps": nbytes / n * 8 / MIB / elapsed if elapsed else 0.0,
+        "loss_pct": sum(s["loss_pct"] for s in summaries) / len(summaries) if summaries else 100.0,
+        "recv_cpu_pct": 100.0 * recv_cpu / (elapsed + DRAIN_TIME),
+        "send_cpu_pct": 100.0 * send_cpu / elapsed if elapsed else 0.0,
+        "lat_p50_ms": p50s[len(p50s) // 2] if p50s else 0.0,     # median receiver
+        "lat_p90_ms": max((s["lat_p90_ms"] for s in summaries), default=0.0),   # worst receiver
+        "lat_p99_ms": max((s["lat_p99_ms"] for s in summaries), default=0.0),
+    }
+
+
+def write_results(rows, prefix):
+    directory = os.path.dirname(prefix)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(prefix + ".json", "w") as f:
+        json.dump(rows, f, indent=1)
+    with open(prefix + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def compare(rows, baseline):
+    """(cases matched, lines describing regressions) against baseline rows
+
+    Rows match on backend/size/rate/receivers; cases missing from either side are skipped.
+    """
+    base = {tuple(row[k] for k in KEY): row for row in baseline}
+    matched = 0
+    regressions = []
+    for row in rows:
+        old = base.get(tuple(row[k] for k in KEY))
+        if old is None:
+            continue
+        matched += 1
+        label = "{}, {} B, {} pps, {} receivers".format(*(row[k] for k in KEY))
+        for metric in ("pps", "mbps"):
+            if old[metric] and row[metric] < old[metric] * (1 - TOLERANCE):
+                regressions.append(f"{label}: {metric} {old[metric]:.1f} -> {row[metric]:.1f}")
+        if old["recv_cpu_pct"] and row["recv_cpu_pct"] > old["recv_cpu_pct"] * (1 + TOLERANCE):
+            regressions.append(f"{label}: recv CPU {old['recv_cpu_pct']:.1f}% -> {row['recv_cpu_pct']:.1f}%")
+        if row["loss_pct"] > old["loss_pct"] + LOSS_TOLERANCE:
+            regressions.append(f"{label}: loss {old['loss_pct']:.2f}% -> {row['loss_pct']:.2f}%")
+    return matched, regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="loopback sender/receiver benchmark sweep")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="bytes per packet")
+    parser.add_argument("--rates", type=float, nargs="+", default=RATES, help="packets/s; 0 = flood")
+    parser.add_argument("--receivers", type=int, nargs="+", default=RECEIVERS)
+    parser.add_argument("--backend", choices=BACKENDS, default=recv.RECEIVER_BACKEND
+                        if recv.RECEIVER_BACKEND in BACKENDS else "threads")
+    parser.add_argument("--duration", type=float, default=DURATION, help="seconds per case")
+    parser.add_argument("--out", default="bench_e2e", help="output prefix for .json and .csv")
+    parser.add_argument("--baseline", help="earlier .json to compare against")
+    args = parser.parse_args()
+    if min(args.sizes) < 24:
+        parser.error("--sizes must be at least 24 bytes (sequence header)")
+    return args
+
+
+def main():
+    args = parse_args()
+    rows = []
+    for size in args.sizes:
+        for rate in args.rates:
+            for n in args.receivers:
+                print(f"Running {n} receivers ({args.backend}), {size} B at "
+                      f"{f'{rate:.0f} pps' if rate else 'flood'}...")
+                rows.append(run_case(args.backend, size, rate, n, args.duration))
+
+    print(f"\nLoopback end-to-end ({args.duration:.0f}s per case, per-receiver rates):")
+    print("{:<7} {:<9} {:<10} {:<10} {:<10} {:<8} {:<8} {:<8} {:<9} {:<9}".format(
+        "Size", "Rate", "Receivers", "pps", "Mbps", "Loss %", "Recv %", "Send %", "p50 ms", "p99 ms"))
+    for row in rows:
+        print("{:<7} {:<9} {:<10} {:<10.0f} {:<10.2f} {:<8.2f} {:<8.1f} {:<8.1f} {:<9.3f} {:<9.3f}".format(
+            row["size"], f"{row['rate_pps']:.0f}" if row["rate_pps"] else "flood", row["receivers"],
+            row["pps"], row["mbps"], row["loss_pct"], row["recv_cpu_pct"], row["send_cpu_pct"],
+            row["lat_p50_ms"], row["lat_p99_ms"]))
+    write_results(rows, args.out)
+    print(f"\nWrote {args.out}.json and {args.out}.csv")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            matched, regressions = compare(rows, json.load(f))
+        if regressions:
+            print(f"\n🚨 {len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline} ({matched} of {len(rows)} cases compared)")
+
+
+if __name__ == "__main__":
+    main()
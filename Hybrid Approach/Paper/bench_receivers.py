@@ -0,0 +1,98 @@
+# bench_receivers.py
+# Side-by-side loopback benchmark: thread-per-socket receivers (recv.receiver_function)
+# versus one selector thread emulating the same number of receivers (recv_eventloop).
+import multiprocessing as mp
+import socket
+import threading
+import time
+
+import recv
+from burst_stats import StatsAggregator
+from recv_eventloop import start_event_loop
+
+# Configuration
+DEST = ('127.255.255.255', recv.PORT)   # loopback broadcast reaches every bound socket
+PACKET_SIZE = 1024
+SOURCE_PPS = 1000                        # offered load per run (every receiver gets all of it)
+SOURCE_SECONDS = 3.0
+SIZES = [10, 50, 100, 200]               # receiver counts run with both models
+EVENTLOOP_ONLY_SIZES = [500, 1000]       # beyond what the thread model handles well
+
+
+def loopback_source(pps, seconds, result):
+    """Child process: paced broadcast sendto loop; reports how many datagrams went out"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    payload = b'A' * PACKET_SIZE
+    interval = 1.0 / pps
+    start = time.perf_counter()
+    sent = 0
+    while True:
+        now = time.perf_counter() - start
+        if now >= seconds:
+            break
+        if now >= sent * interval:
+            try:
+                sock.sendto(payload, DEST)
+                sent += 1
+            except OSError:
+                pass
+        else:
+            time.sleep(min(interval, sent * interval - now))
+    result.put(sent)
+
+
+def run_model(model, n):
+    stop_event = threading.Event()
+    aggregator = StatsAggregator()
+    lock = threading.Lock()
+    wall0 = time.perf_counter()
+    if model == "threads":
+        threads = [threading.Thread(target=recv.receiver_function, args=(stop_event, aggregator, lock, None),
+                                    name=f"T{i+1}") for i in range(n)]
+        for thread in threads:
+            thread.start()
+    else:
+        threads = [start_event_loop(n, stop_event, aggregator, lock, recv.PORT, recv.IDLE_TIMEOUT, PACKET_SIZE)]
+    setup = time.perf_counter() - wall0
+    time.sleep(0.5 + n / 1000)   # let every socket bind before traffic starts
+
+    result = mp.Queue()
+    source = mp.Process(target=loopback_source, args=(SOURCE_PPS, SOURCE_SECONDS, result))
+    cpu0 = time.process_time()
+    source.start()
+    sent = result.get()
+    source.join()
+    time.sleep(0.2)              # let the receive queues drain
+    cpu = time.process_time() - cpu0
+
+    stop_event.set()
+    for thread in threads:
+        thread.join(timeout=recv.IDLE_TIMEOUT + 2)
+    received = sum(stat[3] for stat in aggregator.snapshot())
+    return setup, sent, received, cpu
+
+
+def main():
+    runs = [(n, model) for n in SIZES for model in ("threads", "eventloop")]
+    runs += [(n, "eventloop") for n in EVENTLOOP_ONLY_SIZES]
+
+    rows = []
+    for n, model in runs:
+        print(f"Running {n} receivers ({model})...")
+        setup, sent, received, cpu = run_model(model, n)
+        delivered = 100.0 * received / (sent * n) if sent else 0.0
+        rows.append((n, model, setup, sent, received, delivered, cpu))
+
+    print(f"\nReceiver model comparison ({SOURCE_PPS} pps broadcast for {SOURCE_SECONDS:.0f}s, "
+          f"{PACKET_SIZE} B packets):")
+    # The source shares the CPU too, so "Sent" can fall short of the offered load on busy hosts
+    print("{:<10} {:<11} {:<10} {:<8} {:<12} {:<12} {:<10}".format(
+        "Receivers", "Model", "Setup s", "Sent", "Received", "Delivered %", "CPU s"))
+    for n, model, setup, sent, received, delivered, cpu in rows:
+        print("{:<10} {:<11} {:<10.3f} {:<8} {:<12} {:<12.2f} {:<10.2f}".format(
+            n, model, setup, sent, received, delivered, cpu))
+
+
+if __name__ == "__main__":
+    main()
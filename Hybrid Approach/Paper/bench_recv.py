@@ -0,0 +1,84 @@
+# bench_recv.py
+# Loopback packets/s of the receive path: recvfrom(65535) (allocates a bytes object per
+# datagram) versus recvfrom_into on one preallocated bytearray, with and without header decode.
+import socket
+import time
+
+from packet_header import SequenceTracker, new_run_id, pack_header
+
+# Configuration
+ADDR = ('127.0.0.1', 5099)
+PACKET_SIZE = 1024
+BUFFER_SIZE = 65535
+PACKETS_PER_ROUND = 2000        # fits in the receive buffer below, so the loop never waits
+ROUNDS = 30
+RCVBUF = 4 * 1024 * 1024
+
+
+def fill(sender, payload, run_id, first_seq):
+    """Queue one round of datagrams in the receiver's socket buffer, sequence numbers counting up"""
+    for seq in range(first_seq, first_seq + PACKETS_PER_ROUND):
+        pack_header(payload, 0, 1, run_id, seq, time.time_ns())
+        sender.sendto(payload, ADDR)
+
+
+def drain_recvfrom(sock, tracker):
+    start = time.perf_counter()
+    for _ in range(PACKETS_PER_ROUND):
+        data, addr = sock.recvfrom(BUFFER_SIZE)
+        now_ns = time.time_ns()          # every receiver stamps arrivals, decoding or not
+        if tracker is not None:
+            tracker.observe(data, now_ns)
+    return time.perf_counter() - start
+
+
+def drain_recvfrom_into(sock, tracker):
+    buf = bytearray(BUFFER_SIZE)
+    view = memoryview(buf)
+    start = time.perf_counter()
+    for _ in range(PACKETS_PER_ROUND):
+        nbytes, addr = sock.recvfrom_into(buf)
+        now_ns = time.time_ns()
+        if tracker is not None:
+            tracker.observe(view[:nbytes], now_ns)
+    return time.perf_counter() - start
+
+
+def main():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF)
+    receiver.bind(ADDR)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    payload = bytearray(b'A' * PACKET_SIZE)
+    run_id = new_run_id()
+    seq = 0
+
+    cases = [
+        ("recvfrom", drain_recvfrom, False),
+        ("recvfrom_into", drain_recvfrom_into, False),
+        ("recvfrom + header", drain_recvfrom, True),
+        ("recvfrom_into + header", drain_recvfrom_into, True),
+    ]
+    best = {name: float('inf') for name, _, _ in cases}
+    # Interleave the cases round by round so background noise hits them all alike
+    for _ in range(ROUNDS):
+        for name, drain, decode in cases:
+            fill(sender, payload, run_id, seq)
+            seq += PACKETS_PER_ROUND
+            elapsed = drain(receiver, SequenceTracker() if decode else None)
+            best[name] = min(best[name], elapsed)
+
+    print(f"\nLoopback receive path ({PACKET_SIZE} B packets, best of {ROUNDS} x {PACKETS_PER_ROUND}):")
+    print("{:<24} {:<12} {:<10} {:<10}".format("Path", "Packets/s", "us/packet", "Speedup"))
+    base = best["recvfrom"]
+    for name, _, _ in cases:
+        pps = PACKETS_PER_ROUND / best[name]
+        print("{:<24} {:<12.0f} {:<10.3f} {:<10.2f}".format(name, pps, 1e6 / pps, base / best[name]))
+
+    sender.close()
+    receiver.close()
+
+
+if __name__ == "__main__":
+    main()
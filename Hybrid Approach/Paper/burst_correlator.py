@@ -0,0 +1,141 @@
+# burst_correlator.py
+# Streaming assignment of per-receiver bursts to global broadcast events. Every receiver sees
+# (part of) the same broadcast, so its bursts line up with the other receivers'. Instead of
+# sorting all bursts after Ctrl+C and clustering on start time, each burst joins an event the
+# moment it closes - matched on the sender's sequence range when the packets carry the
+# packet_header, otherwise on start time - and the event's fan-out (how many receivers got
+# it, min/avg/max Mbps) stays current. An event completes once no burst has joined it for
+# SETTLE_TIME; poll() completes settled events and hands them to a callback, so the
+# callback runs on whichever thread polls (the main loop), never on a receiver thread.
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+CORRELATION_WINDOW = 0.1   # seconds: a burst joins an event that started within this of it
+SETTLE_TIME = 2.0          # seconds without a new burst before an event is complete
+COMPLETED_KEEP = 10000     # completed events retained for the final summary (oldest dropped)
+
+
+class BroadcastEvent:
+    """One broadcast as seen by all receivers: fan-out and throughput spread"""
+    __slots__ = ("event_id", "start", "last", "stream", "first_seq", "last_seq",
+                 "receivers", "packets", "mbps_min", "mbps_max", "mbps_sum", "updated")
+
+    def __init__(self, event_id, start, stream=None, first_seq=None, last_seq=None):
+        self.event_id = event_id
+        self.start = start
+        self.last = start
+        self.stream = stream
+        self.first_seq = first_seq
+        self.last_seq = last_seq
+        self.receivers = {}           # receiver name -> Mbps of its burst
+        self.packets = 0
+        self.mbps_min = float('inf')
+        self.mbps_max = 0.0
+        self.mbps_sum = 0.0
+        self.updated = 0.0
+
+    def __lt__(self, other):          # kept sorted by start in the open list
+        return (self.start, self.event_id) < (other.start, other.event_id)
+
+    def join(self, name, burst_last, packets, mbps, seq, now):
+        self.receivers[name] = mbps
+        self.last = max(self.last, burst_last)
+        self.packets += packets
+        self.mbps_min = min(self.mbps_min, mbps)
+        self.mbps_max = max(self.mbps_max, mbps)
+        self.mbps_sum += mbps
+        if seq is not None:
+            _, first, last = seq
+            self.first_seq = first if self.first_seq is None else min(self.first_seq, first)
+            self.last_seq = last if self.last_seq is None else max(self.last_seq, last)
+        self.updated = now
+
+    @property
+    def fan_out(self):
+        return len(self.receivers)
+
+    @property
+    def mbps_avg(self):
+        return self.mbps_sum / len(self.receivers) if self.receivers else 0.0
+
+
+class BurstCorrelator:
+    """Thread-safe: receivers call add() once per closed burst; one owner thread calls poll()"""
+
+    def __init__(self, window=CORRELATION_WINDOW, settle=SETTLE_TIME, on_complete=None,
+                 keep=COMPLETED_KEEP):
+        self.window = window
+        self.settle = settle
+        self.on_complete = on_complete
+        self.open = []                    # open events, sorted by start
+        self.starts = []                  # their start times, for bisect
+        self.completed = deque(maxlen=keep)
+        self.next_id = 1
+        self.lock = threading.Lock()
+
+    def add(self, stat, seq=None, now=None):
+        """Assign a closed burst (recv.py statistics tuple) to its event; returns the event
+
+        seq, if known, is ((run id, sender id), first seq, last seq) of the burst.
+        """
+        name, start, last, packets, _, mbps = stat
+        now = time.time() if now is None else now
+        with self.lock:
+            event = self._match(name, start, seq)
+            if event is None:
+                stream = seq[0] if seq is not None else None
+                event = BroadcastEvent(self.next_id, start, stream)
+                self.next_id += 1
+                i = bisect_left(self.starts, start)
+                self.starts.insert(i, start)
+                self.open.insert(i, event)
+            event.join(name, last, packets, mbps, seq, now)
+        return event
+
+    def _match(self, name, start, seq):
+        if seq is not None:
+            stream, first, last = seq
+            for event in self.open:
+                if (event.stream == stream and name not in event.receivers
+                        and first <= event.last_seq and last >= event.first_seq):
+                    return event
+            # No overlapping range yet: fall back to start time among events of this stream
+        # Nearest open event by start time, within the window, that this receiver is not already in
+        i = bisect_left(self.starts, start)
+        best = None
+        for j in (i - 1, i):
+            while 0 <= j < len(self.open) and abs(self.starts[j] - start) < self.window:
+                event = self.open[j]
+                if name not in event.receivers and (seq is None or event.stream in (None, seq[0])):
+                    if best is None or abs(event.start - start) < abs(best.start - start):
+                        best = event
+                    break
+                j += -1 if j < i else 1
+        return best
+
+    def poll(self, now=None):
+        """Complete events that have settled; returns them (also passed to on_complete)"""
+        now = time.time() if now is None else now
+        with self.lock:
+            done = [e for e in self.open if now - e.updated >= self.settle]
+            if done:
+                keep = [e for e in self.open if now - e.updated < self.settle]
+                self.open = keep
+                self.starts = [e.start for e in keep]
+                done.sort()
+                self.completed.extend(done)
+        if self.on_complete is not None:
+            for event in done:
+                self.on_complete(event)
+        return done
+
+    def flush(self):
+        """Complete every open event (at shutdown)"""
+        return self.poll(float('inf'))
+
+    def events(self):
+        """Completed then open events, each list in start order"""
+        with self.lock:
+            return list(self.completed) + list(self.open)
@@ -0,0 +1,291 @@
+# burst_stats.py
+# Per-thread burst statistics without a shared lock on the receive path.
+# Each receiver owns a ThreadStats: it alone updates the packet/byte counters. Finished bursts
+# are appended by exactly one closer - the receiver itself (socket-timeout mode) or the shared
+# BurstTimer (gap mode). The StatsAggregator only reads. A measurement window is a per-thread
+# cursor into the append-only burst stores, so starting a window never mutates shared state
+# (this replaces `with lock: statistics.clear()` in the middle of a run).
+import heapq
+import threading
+import time
+from array import array
+from collections import deque
+
+from burst_store import BurstStore
+
+THREAD_RETENTION = 4096    # finished bursts kept per receiver (ring) so soak runs stay flat
+
+# Slots of ThreadStats.live: cumulative packets/bytes, first/last arrival of the open burst
+PACKETS, BYTES, FIRST, LAST = range(4)
+
+
+class ThreadStats:
+    """One receiver thread's counters; add() and read_live() are the only hot-path calls
+
+    `bursts` is a BurstStore of (name, burst_start, burst_last, burst_count, mb_recv, mbps)
+    rows, the same tuples recv.py has always produced, bounded to THREAD_RETENTION.
+    `live` holds cumulative [packets, bytes] and the open burst's [first, last], guarded by
+    a sequence counter (odd while the owner is writing) so other threads can take a
+    consistent copy without a lock. `closed` is how much of the cumulative count has been
+    reported as finished bursts; the open burst is the difference.
+
+    With gap > 0 (BurstTimer mode) a packet arriving gap or more after the previous one
+    starts a new burst; the finished one is queued on `edges` for the timer, which also
+    closes bursts that simply went quiet. Only the timer then writes `closed` and `bursts`.
+    """
+    __slots__ = ("name", "bursts", "live", "gen", "closed", "gap", "edges", "timer")
+
+    def __init__(self, name, retention=THREAD_RETENTION):
+        self.name = name
+        self.bursts = BurstStore(retention)
+        self.live = array('d', bytes(8 * 4))
+        self.gen = 0
+        self.closed = array('d', bytes(8 * 3))   # packets, bytes, last arrival of the last closed burst
+        self.gap = 0
+        self.edges = deque()     # owner appends, timer pops: (packets, bytes, first, last) cumulative
+        self.timer = None
+
+    def add(self, packets, nbytes, now, first=None):
+        """Count packets/nbytes received at `now` (wall-clock seconds)
+
+        first, if given, is the arrival of the batch's first packet (kernel timestamps),
+        used as the burst start when the batch opens a burst.
+        """
+        live = self.live
+        self.gen += 1
+        if first is None:
+            first = now
+        if live[PACKETS] == self.closed[PACKETS]:
+            live[FIRST] = first                     # nothing open: a new burst starts
+            if self.timer is not None:
+                self.timer.arm(self, now)
+        elif self.gap and first - live[LAST] >= self.gap:
+            # The gap expired before the timer closed the burst: hand it over as an edge
+            self.edges.append(tuple(live))
+            live[FIRST] = first
+            self.timer.arm(self, now)
+        live[LAST] = now
+        live[PACKETS] += packets
+        live[BYTES] += nbytes
+        self.gen += 1
+
+    @property
+    def burst_count(self):
+        return int(self.live[PACKETS] - self.closed[PACKETS])
+
+    def end_burst(self, min_elapsed=0):
+        """Owner-side close of the open burst (socket-timeout mode only)
+
+        MiB come from the bytes actually received. min_elapsed substitutes for a
+        zero-length burst (recv.py uses 1 s for its final burst).
+        """
+        if self.timer is not None:
+            return None      # the BurstTimer is the only closer in gap mode
+        return self._close(tuple(self.live), min_elapsed)
+
+    def _close(self, snap, min_elapsed=0):
+        """Report snap (a copy of live) minus what is already closed as one burst"""
+        packets, nbytes, start, last = snap
+        closed = self.closed
+        count = int(packets - closed[PACKETS])
+        if count <= 0:
+            return None
+        if start <= closed[2]:
+            # Stragglers stamped just before the gap expired but counted just after the timer
+            # closed their burst; that row is already published, so they are only skipped
+            closed[PACKETS], closed[BYTES] = packets, nbytes
+            return None
+        elapsed = last - start
+        if elapsed <= 0:
+            elapsed = min_elapsed
+        mb_recv = (nbytes - closed[BYTES]) / (1024 * 1024)
+        mbps = mb_recv * 8 / elapsed if elapsed > 0 else 0
+        stat = (self.name, start, last, count, mb_recv, mbps)
+        closed[PACKETS], closed[BYTES], closed[2] = packets, nbytes, last
+        self.bursts.append(stat)
+        return stat
+
+    def append(self, stat):
+        """Record a finished burst tuple computed elsewhere (event loop, asyncio protocols)"""
+        self.bursts.append(stat)
+
+    def extend(self, stats):
+        self.bursts.extend(stats)
+
+    def read_live(self):
+        """Consistent (packets, bytes, first, last) of the burst in progress; any thread"""
+        snap = self.snapshot()
+        return [snap[PACKETS] - self.closed[PACKETS], snap[BYTES] - self.closed[BYTES],
+                snap[FIRST], snap[LAST]]
+
+    def snapshot(self):
+        """Consistent copy of the cumulative live counters; any thread"""
+        while True:
+            gen = self.gen
+            if gen & 1:
+                time.sleep(0)
+                continue
+            copy = tuple(self.live)
+            if self.gen == gen:
+                return copy
+
+
+class BurstTimer:
+    """Shared deadline heap that ends bursts `gap` seconds after each receiver's last packet
+
+    Decouples burst segmentation from socket timeouts: the gap can be a few milliseconds,
+    bursts are closed as soon as the timer thread wakes after the gap expires (typically
+    well under 1 ms on Linux), and idle receivers are not woken to do it. Receivers arm the timer once per burst (ThreadStats.add does it);
+    the timer re-arms itself from the receiver's last arrival until the gap has passed.
+    """
+
+    def __init__(self, gap):
+        self.gap = gap
+        self._heap = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._members = []
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="BurstTimer", daemon=True)
+
+    def watch(self, stats):
+        """Put a receiver's ThreadStats under this timer (before it receives anything)"""
+        stats.gap = self.gap
+        stats.timer = self
+        with self._cond:
+            self._members.append(stats)
+        return stats
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def arm(self, stats, last):
+        with self._cond:
+            self._push(last + self.gap, stats)
+            self._cond.notify()
+
+    def _push(self, deadline, stats):
+        self._seq += 1
+        heapq.heappush(self._heap, (deadline, self._seq, stats))
+
+    def stop(self):
+        """Stop the timer and close every open burst regardless of the gap (after receivers stop)"""
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+        for stats in self._members:
+            self._settle(stats, force=True)
+
+    def _run(self):
+        heap = self._heap
+        while True:
+            with self._cond:
+                while not self._stop and (not heap or heap[0][0] > time.time()):
+                    self._cond.wait(heap[0][0] - time.time() if heap else None)
+                if self._stop:
+                    return
+                due = []
+                now = time.time()
+                while heap and heap[0][0] <= now:
+                    due.append(heapq.heappop(heap)[2])
+            for stats in due:
+                deadline = self._settle(stats)
+                if deadline is not None:
+                    with self._cond:
+                        self._push(deadline, stats)
+
+    def _settle(self, stats, force=False):
+        """Close what has ended for one receiver; return the next deadline if a burst is still open"""
+        closed = stats.closed
+        while stats.edges:
+            edge = stats.edges.popleft()
+            if edge[PACKETS] > closed[PACKETS]:
+                stats._close(edge)
+        snap = stats.snapshot()
+        if snap[PACKETS] <= closed[PACKETS]:
+            return None
+        if force or time.time() - snap[LAST] >= self.gap:
+            stats._close(snap, min_elapsed=0)
+            return None
+        return snap[LAST] + self.gap
+
+
+class StatsAggregator:
+    """Registry of ThreadStats plus window/snapshot/tick merging; the only lock is for registration"""
+
+    def __init__(self, timer=None):
+        self.timer = timer
+        self._threads = []
+        self._marks = {}
+        self._window_start = time.time()
+        self._reg_lock = threading.Lock()
+        self._tick_stop = threading.Event()
+        self._ticker = None
+
+    def register(self, name):
+        """Create receiver `name`'s ThreadStats (once per receiver; a loop registers each of its own)"""
+        stats = ThreadStats(name)
+        if self.timer is not None:
+            self.timer.watch(stats)
+        with self._reg_lock:
+            self._threads.append(stats)
+        return stats
+
+    def _members(self):
+        with self._reg_lock:
+            return list(self._threads)
+
+    def start_window(self):
+        """Begin a measurement window: later snapshots only see bursts finished after this"""
+        marks = {}
+        for stats in self._members():
+            marks[id(stats)] = stats.bursts.appended
+        self._marks = marks
+        self._window_start = time.time()
+
+    def snapshot(self):
+        """Finished bursts in the current window, merged across threads
+
+        Each thread's store is copied with its own consistency check, so the result is a
+        consistent prefix per thread taken without stopping anyone. Bursts already rotated
+        out of a thread's ring are not included; overwritten() counts them.
+        """
+        merged = []
+        for stats in self._members():
+            merged.extend(stats.bursts.rows(self._marks.get(id(stats), 0)))
+        return merged
+
+    def overwritten(self):
+        """Bursts finished in the current window but rotated out before snapshot() read them"""
+        return sum(max(0, stats.bursts.overwritten - self._marks.get(id(stats), 0))
+                   for stats in self._members())
+
+    def live(self):
+        """{thread name: (packets, bytes, first, last)} for bursts still in progress"""
+        live = {stats.name: stats.read_live() for stats in self._members()}
+        return {name: values for name, values in live.items() if values[PACKETS] > 0}
+
+    def totals(self):
+        """(finished bursts, packets) in the window plus packets of bursts still in progress"""
+        bursts = self.snapshot()
+        packets = sum(stat[3] for stat in bursts)
+        packets += sum(int(live[PACKETS]) for live in self.live().values())
+        return len(bursts), packets
+
+    def start_tick(self, interval, callback):
+        """Call callback(snapshot()) every `interval` seconds on a daemon thread until stop_tick()"""
+        def run():
+            while not self._tick_stop.wait(interval):
+                callback(self.snapshot())
+        self._tick_stop.clear()
+        self._ticker = threading.Thread(target=run, name="StatsTick", daemon=True)
+        self._ticker.start()
+
+    def stop_tick(self):
+        self._tick_stop.set()
+        if self._ticker is not None:
+            self._ticker.join()
+            self._ticker = None
@@ -0,0 +1,127 @@
+# burst_store.py
+# Columnar, bounded store for burst results. Rows are the usual
+# (thread_name, burst_start, burst_last, burst_count, mb_recv, mbps) tuples, but kept as
+# parallel `array` columns with a small integer thread id instead of a string per row.
+# Once `capacity` rows exist the oldest is overwritten, so memory stays flat however long
+# a soak run lasts. Queries run over whole columns with C-level builtins (map/compress/
+# sorted with a C key), not a Python loop per row.
+import time
+from array import array
+from itertools import compress, repeat
+from operator import eq, ge, le
+
+DEFAULT_CAPACITY = 100_000   # rows kept (~44 bytes each) before the oldest are overwritten
+
+COLUMNS = (("tid", 'I'), ("start", 'd'), ("last", 'd'), ("packets", 'Q'), ("mib", 'd'), ("mbps", 'd'))
+
+
+class BurstStore:
+    """Ring of burst rows; one writer at a time (own thread or under the caller's lock)
+
+    `appended` counts every row ever added and doubles as a cursor: rows(since=mark)
+    returns the rows added after `mark` that are still retained. Readers need no lock:
+    `gen` is odd while a row is being written, and a reader retries its column copy if
+    `gen` was odd or moved while it copied.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.names = []          # thread id -> name
+        self.ids = {}            # name -> thread id
+        self.appended = 0
+        self.gen = 0
+        for column, typecode in COLUMNS:
+            setattr(self, column, array(typecode))   # grown on demand up to capacity
+
+    def __len__(self):
+        return min(self.appended, self.capacity)
+
+    @property
+    def overwritten(self):
+        """Rows dropped by ring retention"""
+        return max(0, self.appended - self.capacity)
+
+    def thread_id(self, name):
+        """Id for name, assigned in first-seen order (register names up front to fix the order)"""
+        tid = self.ids.get(name)
+        if tid is None:
+            tid = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return tid
+
+    def append(self, stat):
+        """O(1): add one (thread_name, start, last, packets, mb_recv, mbps) tuple"""
+        name, start, last, packets, mib, mbps = stat
+        row = (self.thread_id(name), start, last, packets, mib, mbps)
+        pos = self.appended % self.capacity
+        self.gen += 1
+        if self.appended < self.capacity:
+            for column, value in zip(COLUMNS, row):
+                getattr(self, column[0]).append(value)
+        else:
+            self.tid[pos], self.start[pos], self.last[pos] = row[0], start, last
+            self.packets[pos], self.mib[pos], self.mbps[pos] = packets, mib, mbps
+        self.appended += 1
+        self.gen += 1
+
+    def extend(self, stats):
+        for stat in stats:
+            self.append(stat)
+
+    def columns(self, since=0):
+        """Consistent copies of every column, oldest row first, limited to rows after `since`"""
+        while True:
+            gen = self.gen
+            if gen & 1:
+                time.sleep(0)
+                continue
+            appended = self.appended
+            n = min(appended, self.capacity)
+            head = appended % self.capacity if appended > self.capacity else 0
+            cols = {}
+            for column, _ in COLUMNS:
+                data = getattr(self, column)
+                cols[column] = data[head:n] + data[:head]   # unwrap the ring (memcpy)
+            if self.gen == gen:
+                break
+        skip = max(0, since - (appended - n))
+        if skip:
+            cols = {column: data[skip:] for column, data in cols.items()}
+        return cols
+
+    def rows(self, since=0):
+        """Rows after `since` as the classic tuples, oldest first"""
+        return self._rows(self.columns(since))
+
+    def _rows(self, cols, indices=None):
+        names = self.names
+        tids, start, last, packets, mib, mbps = (cols[c] for c, _ in COLUMNS)
+        if indices is None:
+            return list(zip(map(names.__getitem__, tids), start, last, packets, mib, mbps))
+        return [(names[tids[i]], start[i], last[i], packets[i], mib[i], mbps[i]) for i in indices]
+
+    def thread_rows(self, name, since=0):
+        """One thread's bursts in order (a thread's bursts never overlap, so also by start time)"""
+        tid = self.ids.get(name)
+        if tid is None:
+            return []
+        cols = self.columns(since)
+        mask = map(eq, cols["tid"], repeat(tid))
+        return self._rows(cols, compress(range(len(cols["tid"])), mask))
+
+    def window_rows(self, t0, t1, since=0):
+        """Bursts that overlap the wall-clock window [t0, t1]"""
+        cols = self.columns(since)
+        mask = map(bool.__and__, map(le, cols["start"], repeat(t1)), map(ge, cols["last"], repeat(t0)))
+        return self._rows(cols, compress(range(len(cols["tid"])), mask))
+
+    def sorted_rows(self, since=0):
+        """All bursts grouped by thread id (registration order), each thread chronological"""
+        cols = self.columns(since)
+        # Stable C-keyed sort: rows keep their append order within a thread
+        return self._rows(cols, sorted(range(len(cols["tid"])), key=cols["tid"].__getitem__))
+
+    def totals(self, since=0):
+        """(bursts, packets, sum of per-burst Mbps) over rows after `since`"""
+        cols = self.columns(since)
+        return len(cols["tid"]), sum(cols["packets"]), sum(cols["mbps"])
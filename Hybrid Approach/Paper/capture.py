@@ -0,0 +1,214 @@
+# capture.py
+# Per-packet capture files, so a run can be re-analysed afterwards instead of living only
+# as burst aggregates and terminal scrollback. Every datagram becomes one fixed-width
+# 40-byte record (receive time, send time/sequence/sender from the packet_header when
+# present, source address, size, receiver id) in a file preallocated to `capacity`
+# records and memory-mapped.
+#
+# Writing needs only the standard library: each receiver packs records into its own
+# CaptureBuffer (struct.pack_into into a bytearray, no lock) and copies the whole buffer
+# into the mapping in one slice assignment when it fills. The header's record count is
+# updated with every copy, so a capture cut short by a crash is still readable up to the
+# last flush. Reading uses NumPy: read_capture() maps the records with np.memmap as a
+# structured array, so multi-GB captures are sliced and reduced without loading them.
+#
+#   python capture.py captures/run-10t.cap      # summary per receiver
+import json
+import mmap
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+from packet_header import HEADER_SIZE as SEQ_HEADER_SIZE, MAGIC as SEQ_MAGIC, HEADER as SEQ_HEADER
+
+try:
+    import numpy as np
+except ImportError:       # writing works without NumPy; read_capture() needs it
+    np = None
+
+FILE_MAGIC = b"UDPCAP\x00\x01"
+VERSION = 1
+# magic, version, record size, reserved, capacity, record count, names offset, created (time_ns)
+FILE_HEADER = struct.Struct("<8sHHIQQQQ")
+HEADER_SIZE = 64                   # FILE_HEADER padded; records start here
+COUNT_OFFSET = 24                  # byte offset of the record count inside FILE_HEADER
+
+# receive ns, send ns, sequence, IPv4 source, size, receiver id, sender id, source port, flags
+RECORD = struct.Struct("<qqQIIHHHH")
+RECORD_SIZE = RECORD.size          # 40 bytes, no padding: matches RECORD_DTYPE
+FIELDS = (("t_ns", "<i8"), ("sent_ns", "<i8"), ("seq", "<u8"), ("addr", "<u4"), ("size", "<u4"),
+          ("receiver", "<u2"), ("sender", "<u2"), ("port", "<u2"), ("flags", "<u2"))
+RECORD_DTYPE = np.dtype(list(FIELDS)) if np is not None else None
+
+HAS_HEADER = 1                     # flags: sent_ns/seq/sender come from the packet_header
+KERNEL_STAMP = 2                   # flags: t_ns is a kernel (SO_TIMESTAMPNS) receive time
+
+DEFAULT_CAPACITY = 10_000_000      # records preallocated (400 MB; the file is sized, not written)
+BUFFER_RECORDS = 4096              # records staged per receiver between bulk copies
+
+_unpack_seq = SEQ_HEADER.unpack_from
+_pack_record = RECORD.pack_into
+
+
+class CaptureWriter:
+    """One capture file shared by every receiver of a run
+
+    buffer(name) hands each receiver its own CaptureBuffer; buffers copy into the file
+    under a lock once per BUFFER_RECORDS packets. Records past `capacity` are counted in
+    `dropped`, not written. close() records the receiver names and trims the file to the
+    records actually written.
+    """
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.capacity = capacity
+        self.count = 0
+        self.dropped = 0
+        self.names = []            # receiver id -> name
+        self.lock = threading.Lock()
+        self.file = open(path, "w+b")
+        self.file.truncate(HEADER_SIZE + capacity * RECORD_SIZE)
+        self.mm = mmap.mmap(self.file.fileno(), HEADER_SIZE + capacity * RECORD_SIZE)
+        FILE_HEADER.pack_into(self.mm, 0, FILE_MAGIC, VERSION, RECORD_SIZE, 0, capacity, 0, 0,
+                              time.time_ns())
+
+    def buffer(self, name, size=BUFFER_RECORDS):
+        """Register receiver `name` and return its staging buffer"""
+        with self.lock:
+            receiver_id = len(self.names)
+            self.names.append(name)
+        return CaptureBuffer(self, receiver_id, size)
+
+    def commit(self, data, n):
+        """Copy the first n packed records of data into the file"""
+        with self.lock:
+            if self.mm is None:
+                self.dropped += n
+                return
+            take = min(n, self.capacity - self.count)
+            if take:
+                offset = HEADER_SIZE + self.count * RECORD_SIZE
+                self.mm[offset:offset + take * RECORD_SIZE] = data[:take * RECORD_SIZE]
+                self.count += take
+                struct.pack_into("<Q", self.mm, COUNT_OFFSET, self.count)
+            self.dropped += n - take
+
+    def close(self):
+        """Finish the file: names trailer after the last record, file cut to size"""
+        with self.lock:
+            if self.mm is None:
+                return
+            names_offset = HEADER_SIZE + self.count * RECORD_SIZE
+            struct.pack_into("<Q", self.mm, COUNT_OFFSET + 8, names_offset)
+            self.mm.flush()
+            self.mm.close()
+            self.mm = None
+            self.file.truncate(names_offset)
+            self.file.seek(names_offset)
+            self.file.write(json.dumps(self.names).encode())
+            self.file.close()
+
+
+class CaptureBuffer:
+    """One receiver's staging area; only the owning thread calls add()/flush()"""
+
+    def __init__(self, writer, receiver_id, size):
+        self.writer = writer
+        self.receiver_id = receiver_id
+        self.size = size
+        self.data = bytearray(size * RECORD_SIZE)
+        self.n = 0
+        self.last_ip = None
+        self.last_ip_int = 0
+
+    def add(self, packet, nbytes, t_ns, addr, kernel=False):
+        """Record one datagram: its bytes (for the sequence header), size, receive ns, (ip, port)"""
+        flags = KERNEL_STAMP if kernel else 0
+        sender = seq = sent_ns = 0
+        if nbytes >= SEQ_HEADER_SIZE:
+            magic, header_sender, _, header_seq, header_sent = _unpack_seq(packet)
+            if magic == SEQ_MAGIC:
+                flags |= HAS_HEADER
+                sender, seq, sent_ns = header_sender, header_seq, header_sent
+        ip, port = addr if addr is not None else (None, 0)
+        if ip != self.last_ip:          # senders are few: convert each address once
+            self.last_ip = ip
+            self.last_ip_int = int.from_bytes(socket.inet_aton(ip), "big") if ip else 0
+        _pack_record(self.data, self.n * RECORD_SIZE, t_ns, sent_ns, seq, self.last_ip_int, nbytes,
+                     self.receiver_id, sender, port, flags)
+        self.n += 1
+        if self.n == self.size:
+            self.flush()
+
+    def flush(self):
+        if self.n:
+            self.writer.commit(self.data, self.n)
+            self.n = 0
+
+
+def read_header(path):
+    """(capacity, record count, names offset, created ns) of a capture file"""
+    with open(path, "rb") as f:
+        raw = f.read(FILE_HEADER.size)
+    magic, version, record_size, _, capacity, count, names_offset, created = FILE_HEADER.unpack(raw)
+    if magic != FILE_MAGIC or version != VERSION or record_size != RECORD_SIZE:
+        raise ValueError(f"{path}: not a version {VERSION} capture file")
+    return capacity, count, names_offset, created
+
+
+def read_capture(path):
+    """(records, receiver names, created ns) with records an np.memmap of RECORD_DTYPE
+
+    Nothing is read until it is indexed; a capture that was never closed (crash) still
+    opens, with its records up to the last flush and names "R<id>".
+    """
+    if np is None:
+        raise ImportError("read_capture needs NumPy (pip install numpy)")
+    _, count, names_offset, created = read_header(path)
+    if count:
+        records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+    else:
+        records = np.zeros(0, dtype=RECORD_DTYPE)
+    names = []
+    if names_offset:
+        with open(path, "rb") as f:
+            f.seek(names_offset)
+            names = json.loads(f.read().decode())
+    if count:
+        receivers = int(records["receiver"].max()) + 1
+        names += [f"R{i}" for i in range(len(names), receivers)]
+    return records, names, created
+
+
+def format_addr(addr):
+    """Dotted quad of a record's addr field"""
+    return socket.inet_ntoa(int(addr).to_bytes(4, "big"))
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("usage: python capture.py FILE.cap")
+        sys.exit(2)
+    records, names, created = read_capture(sys.argv[1])
+    print(f"{sys.argv[1]}: {len(records)} records from {len(names)} receivers, "
+          f"started {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created / 1e9))}")
+    if not len(records):
+        return
+    packets = np.bincount(records["receiver"], minlength=len(names))
+    nbytes = np.bincount(records["receiver"], weights=records["size"], minlength=len(names))
+    span = (records["t_ns"].max() - records["t_ns"].min()) / 1e9
+    print(f"{'Receiver':<10} {'Packets':<10} {'MiB':<10}")
+    for i, name in enumerate(names):
+        print(f"{name:<10} {packets[i]:<10} {nbytes[i] / (1024 * 1024):<10.2f}")
+    print(f"{np.count_nonzero(records['flags'] & HAS_HEADER)} with a sequence header, "
+          f"{np.count_nonzero(records['flags'] & KERNEL_STAMP)} kernel-stamped, over {span:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# gui_engine.py
+# The receiver engine behind receiverGUI.py, run in its own process so the Tk main loop and
+# the packet loops never share a GIL: dragging the window or scrolling the log cannot slow
+# the receivers, and a saturated receiver cannot freeze the window.
+#
+# The GUI talks to the engine over one multiprocessing Pipe:
+#   GUI -> engine   ("start", port, num_threads, decode_headers), ("stop",), ("quit",)
+#   engine -> GUI   ("stats", t, {thread: (packets, bytes, oversized, addr)}, [burst tuples], [log lines])
+#                   every SNAPSHOT_INTERVAL while listening (t is the engine's perf_counter)
+#                   ("stopped", {thread: sequence summary or None}) once the threads have exited
+#                   or JOIN_TIMEOUT passed (empty unless decode_headers was set; also the reply
+#                   to a start refused while threads from the last run are still stopping)
+# Snapshots carry running totals, so a snapshot the GUI reads late loses nothing.
+import multiprocessing as mp
+import socket
+import threading
+import time
+from collections import deque
+
+from packet_header import SequenceTracker
+
+# Configuration (defaults match the GUI's)
+PACKET_SIZE = 65535
+IDLE_TIMEOUT = 1.0
+SNAPSHOT_INTERVAL = 0.25       # seconds between stats snapshots sent to the GUI
+LOG_PENDING = 2000             # log lines held between snapshots (oldest dropped)
+JOIN_TIMEOUT = 2.0
+
+
+class PacketTally:
+    """Running packet/byte counts of one receiver thread; only the owner writes, the UI reads"""
+    __slots__ = ("packets", "bytes", "oversized", "addr")
+
+    def __init__(self):
+        self.packets = 0
+        self.bytes = 0
+        self.oversized = 0
+        self.addr = None
+
+
+class ReceiverEngine:
+    """Receiver threads plus the snapshot sender; lives in the engine process"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.send_lock = threading.Lock()       # snapshot thread and command loop share conn
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.tallies = {}
+        self.seq_stats = {}
+        self.bursts = deque()                   # closed bursts not yet sent
+        self.logs = deque(maxlen=LOG_PENDING)
+        self.snapshot_thread = None
+
+    def log(self, message):
+        self.logs.append(f"[{time.strftime('%H:%M:%S')}] {message}")
+
+    def send(self, message):
+        with self.send_lock:
+            self.conn.send(message)
+
+    def receiver_function(self, stop_event, port, thread_name, tally, tracker):
+        """UDP receiver loop (one thread per socket)"""
+        # Set up UDP socket for broadcast
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 0)
+        except Exception:
+            pass
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 256 * 1024)
+
+        try:
+            sock.bind(("", port))
+            sock.settimeout(IDLE_TIMEOUT)
+        except Exception as e:
+            self.log(f"{thread_name}: Failed to bind to port {port}: {e}")
+            sock.close()
+            return
+
+        burst_count = 0
+        burst_start = None
+        burst_last = None
+        total_bytes = 0
+        buf = bytearray(PACKET_SIZE)
+        view = memoryview(buf)
+
+        self.log(f"{thread_name}: Listening for broadcasts on port {port}...")
+
+        while not stop_event.is_set():
+            try:
+                packet_size, addr = sock.recvfrom_into(buf)
+                now_ns = time.time_ns()
+                now = now_ns / 1e9
+                if tracker is not None:
+                    tracker.observe(view[:packet_size], now_ns)
+                tally.packets += 1
+                tally.bytes += packet_size
+                tally.addr = addr[0]
+                if burst_count == 0:
+                    burst_start = now
+                    total_bytes = 0
+                burst_last = now
+                burst_count += 1
+                total_bytes += packet_size
+            except socket.timeout:
+                if burst_count > 0:
+                    elapsed = burst_last - burst_start
+                    mb_recv = total_bytes / (1024 * 1024)
+                    mbps = mb_recv * 8 / elapsed if elapsed > 0 else 0
+                    self.bursts.append((thread_name, burst_start, burst_last, burst_count, mb_recv, mbps))
+                    self.log(f"{thread_name}: Burst ended. Packets: {burst_count}, Bytes: {total_bytes}, MiB: {mb_recv:.2f}, Mbps: {mbps:.2f}")
+                    burst_count = 0
+                    burst_start = None
+                    burst_last = None
+                    total_bytes = 0
+                if stop_event.is_set():
+                    break
+            except OSError as e:
+                if getattr(e, 'winerror', None) == 10040:
+                    now = time.time()
+                    if burst_count == 0:
+                        burst_start = now
+                        total_bytes = 0
+                    burst_last = now
+                    burst_count += 1
+                    total_bytes += PACKET_SIZE  # Oversized packet, use max size
+                    tally.packets += 1
+                    tally.bytes += PACKET_SIZE
+                    tally.oversized += 1
+                else:
+                    self.log(f"{thread_name}: Socket error: {e}")
+                    break
+
+        sock.close()
+        self.log(f"{thread_name}: Stopped.")
+
+    def snapshot(self):
+        """("stats", ...) message with the running totals and everything queued since the last one"""
+        tallies = {name: (t.packets, t.bytes, t.oversized, t.addr) for name, t in list(self.tallies.items())}
+        bursts = [self.bursts.popleft() for _ in range(len(self.bursts))]
+        logs = [self.logs.popleft() for _ in range(len(self.logs))]
+        return ("stats", time.perf_counter(), tallies, bursts, logs)
+
+    def run_snapshots(self, stop_event):
+        while not stop_event.wait(SNAPSHOT_INTERVAL):
+            self.send(self.snapshot())
+
+    def start(self, port, num_threads, decode_headers=False):
+        self.threads = [thread for thread in self.threads if thread.is_alive()]
+        if self.threads:
+            if self.stop_event.is_set():
+                # Left over from a stop() that timed out: their bursts would land in this run
+                names = ", ".join(thread.name for thread in self.threads)
+                self.log(f"Not started: {names} still stopping; try again shortly")
+                self.send(self.snapshot())
+                self.send(("stopped", {}))
+            return
+        self.stop_event = threading.Event()
+        self.tallies = {}
+        self.seq_stats = {}
+        self.bursts.clear()
+        for i in range(num_threads):
+            thread_name = f"Thread-{i+1}"
+            tally = self.tallies[thread_name] = PacketTally()
+            tracker = None
+            if decode_headers:
+                tracker = self.seq_stats[thread_name] = SequenceTracker()   # decodes sender.py --header
+            thread = threading.Thread(
+                target=self.receiver_function,
+                args=(self.stop_event, port, thread_name, tally, tracker),
+                name=thread_name,
+                daemon=True
+            )
+            self.threads.append(thread)
+            thread.start()
+        self.log(f"Started listening with {num_threads} threads on port {port}")
+        self.snapshot_thread = threading.Thread(target=self.run_snapshots, args=(self.stop_event,),
+                                                name="Snapshots", daemon=True)
+        self.snapshot_thread.start()
+
+    def stop(self):
+        if not self.threads:
+            self.send(("stopped", {}))
+            return
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=JOIN_TIMEOUT)
+        self.snapshot_thread.join()
+        # Threads whose join timed out keep running; start() refuses to begin until they exit
+        self.threads = [thread for thread in self.threads if thread.is_alive()]
+        for thread in self.threads:
+            self.log(f"{thread.name}: did not stop within {JOIN_TIMEOUT}s, still running")
+        self.send(self.snapshot())     # final totals, last bursts and log lines
+        self.send(("stopped", {name: tracker.summary() for name, tracker in self.seq_stats.items()}))
+
+    def run(self):
+        """Serve commands until ("quit",) or the GUI end of the pipe closes"""
+        while True:
+            try:
+                command = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            if command[0] == "start":
+                self.start(command[1], command[2], command[3])
+            elif command[0] == "stop":
+                self.stop()
+            elif command[0] == "quit":
+                break
+        self.stop_event.set()
+
+
+def engine_main(conn):
+    """Entry point of the engine process"""
+    ReceiverEngine(conn).run()
+
+
+class EngineClient:
+    """GUI-side handle: start()/stop() send commands, poll() returns messages without blocking"""
+
+    def __init__(self):
+        self.conn = None
+        self.proc = None
+
+    def ensure_running(self):
+        if self.proc is not None and self.proc.is_alive():
+            return
+        self.conn, child_conn = mp.Pipe()
+        self.proc = mp.Process(target=engine_main, args=(child_conn,), name="ReceiverEngine", daemon=True)
+        self.proc.start()
+        child_conn.close()
+
+    def start(self, port, num_threads, decode_headers=False):
+        self.ensure_running()
+        self.conn.send(("start", port, num_threads, decode_headers))
+
+    def stop(self):
+        if self.conn is not None:
+            self.conn.send(("stop",))
+
+    def poll(self, limit):
+        """Up to `limit` pending messages; raises EOFError if the engine process has died"""
+        messages = []
+        if self.conn is None:
+            return messages
+        while len(messages) < limit and self.conn.poll():
+            messages.append(self.conn.recv())
+        return messages
+
+    def close(self):
+        if self.proc is None:
+            return
+        try:
+            self.conn.send(("quit",))
+        except OSError:
+            pass
+        self.proc.join(timeout=JOIN_TIMEOUT + IDLE_TIMEOUT)
+        if self.proc.is_alive():
+            self.proc.terminate()
+        self.conn.close()
+        self.proc = None
+        self.conn = None
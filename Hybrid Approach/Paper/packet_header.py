@@ -0,0 +1,254 @@
+# packet_header.py
+# Optional binary header at the front of each datagram, so receivers can measure
+# loss, duplicates, reordering and one-way latency instead of only counting packets.
+# Shared with the April28 sender/receivers, whose paper_modules.py puts this directory on sys.path.
+import os
+import struct
+import sys
+from array import array
+from itertools import islice
+from operator import lt, sub
+
+# magic, sender id, run id, 64-bit sequence number, send time (time.time_ns())
+HEADER = struct.Struct("!HHIQQ")
+HEADER_SIZE = HEADER.size        # 24 bytes
+_unpack_from = HEADER.unpack_from
+MAGIC = 0x5344                   # b'SD'
+MAGIC_HIGH = MAGIC >> 8          # magic bytes on the wire, checked one at a time by observe()
+MAGIC_LOW = MAGIC & 0xFF
+TRANSIT_LIMIT = 1 << 63          # |recv - send ns| must fit an int64; beyond it the row is not a header
+REORDER_WINDOW = 1024            # sequence numbers remembered behind the highest one (dup detection)
+WINDOW_MASK = (1 << REORDER_WINDOW) - 1
+FLUSH_EVERY = 1024               # headers buffered per receiver before they are decoded
+FLUSH_BYTES = FLUSH_EVERY * HEADER_SIZE
+LATENCY_SAMPLES = 100_000        # most recent transit times kept per stream for percentiles
+
+
+def new_run_id():
+    """Random 32-bit id so receivers can tell separate sender runs apart"""
+    return int.from_bytes(os.urandom(4), "big")
+
+
+def pack_header(buf, offset, sender_id, run_id, seq, send_ns):
+    HEADER.pack_into(buf, offset, MAGIC, sender_id, run_id, seq, send_ns)
+
+
+def peek_seq(data):
+    """((run id, sender id), seq) from a datagram, or None if it carries no header"""
+    if len(data) < HEADER_SIZE:
+        return None
+    magic, sender_id, run_id, seq, _ = _unpack_from(data)
+    if magic != MAGIC:
+        return None
+    return (run_id, sender_id), seq
+
+
+class StreamState:
+    """Sequence/latency state for one (run id, sender id) stream
+
+    SequenceTracker.decode() extends seqs/transits a chunk at a time; flush() folds the
+    chunk in with C-level builtins, falling back to a per-packet walk only when the
+    chunk is out of order.
+    """
+
+    def __init__(self):
+        self.seqs = array('Q')
+        self.transits = array('q')
+        self.first = None
+        self.highest = -1
+        self.window = 0          # bit i set => (highest - i) has been seen
+        self.received = 0
+        self.duplicates = 0
+        self.late = 0            # arrived after a higher sequence number
+        self.reorder_depth = 0
+        self.lat_min = None
+        self.lat_max = None
+        self.lat_sum = 0
+        self.last_transit = None
+        self.jitter_sum = 0      # sum of |transit(i) - transit(i-1)|, ns
+        self.jitter_n = 0
+        self.lat_samples = array('q')
+
+    def flush(self):
+        seqs, transits = self.seqs, self.transits
+        n = len(seqs)
+        if not n:
+            return
+
+        # Latency and jitter over the chunk
+        self.lat_sum += sum(transits)
+        lo, hi = min(transits), max(transits)
+        self.lat_min = lo if self.lat_min is None else min(self.lat_min, lo)
+        self.lat_max = hi if self.lat_max is None else max(self.lat_max, hi)
+        self.jitter_sum += sum(map(abs, map(sub, islice(transits, 1, None), transits)))
+        self.jitter_n += n - 1
+        if self.last_transit is not None:
+            self.jitter_sum += abs(transits[0] - self.last_transit)
+            self.jitter_n += 1
+        self.last_transit = transits[-1]
+        samples = self.lat_samples
+        samples.extend(transits)
+        if len(samples) >= 2 * LATENCY_SAMPLES:
+            del samples[:-LATENCY_SAMPLES]   # amortised: trimmed once per LATENCY_SAMPLES datagrams
+
+        lowest = min(seqs)
+        if self.first is None or lowest < self.first:
+            self.first = lowest
+        if seqs[0] > self.highest and all(map(lt, seqs, islice(seqs, 1, None))):
+            # In-order chunk (the normal case): everything is new, nothing is late
+            last = seqs[-1]
+            shift = last - self.highest
+            if last - seqs[0] == n - 1:
+                chunk_bits = (1 << n) - 1
+            else:
+                chunk_bits = 0
+                for seq in seqs:
+                    chunk_bits |= 1 << (last - seq)
+            window = (self.window << shift) if shift < REORDER_WINDOW else 0
+            self.window = (window | chunk_bits) & WINDOW_MASK
+            self.highest = last
+            self.received += n
+        else:
+            for seq in seqs:
+                self._observe_one(seq)
+
+        del seqs[:]
+        del transits[:]
+
+    def _observe_one(self, seq):
+        if seq > self.highest:
+            shift = seq - self.highest
+            self.window = ((self.window << shift) | 1) & WINDOW_MASK if shift < REORDER_WINDOW else 1
+            self.highest = seq
+        else:
+            depth = self.highest - seq
+            if depth < REORDER_WINDOW:
+                bit = 1 << depth
+                if self.window & bit:
+                    self.duplicates += 1
+                    return
+                self.window |= bit
+            self.late += 1
+            if depth > self.reorder_depth:
+                self.reorder_depth = depth
+        self.received += 1
+
+
+class SequenceTracker:
+    """Per-receiver decoder: call observe() for every datagram, summary() at the end
+
+    observe() is the per-datagram fast path: the two magic bytes are checked and the
+    raw header and receive time are copied. decode() unpacks FLUSH_EVERY headers at
+    once as 64-bit array columns (magic/sender/run, seq, send time) and hands them to
+    their StreamState. A stray datagram that merely starts with the magic is counted as
+    plain if its send time is not a plausible time_ns.
+    """
+
+    def __init__(self):
+        self.streams = {}        # first header word (magic, sender id, run id) -> StreamState
+        self.plain = 0           # datagrams without a header (old sender)
+        self.headers = bytearray()
+        self.recv_times = array('q')
+
+    def observe(self, data, recv_ns):
+        if len(data) < HEADER_SIZE or data[0] != MAGIC_HIGH or data[1] != MAGIC_LOW:
+            self.plain += 1
+            return
+        self.headers += data[:HEADER_SIZE]
+        self.recv_times.append(recv_ns)
+        if len(self.headers) >= FLUSH_BYTES:
+            self.decode()
+
+    def decode(self):
+        """Unpack the buffered headers into their streams"""
+        if not self.recv_times:
+            return
+        words = array('Q', self.headers)
+        if sys.byteorder == "little":
+            words.byteswap()     # headers are big-endian
+        keys, seqs, sent = words[0::3], words[1::3], words[2::3]
+        recv_times = self.recv_times
+        del self.headers[:]
+        self.recv_times = array('q')
+        if keys.count(keys[0]) == len(keys) and keys[0] >> 48 == MAGIC:
+            try:
+                transits = array('q', map(sub, recv_times, sent))
+            except OverflowError:
+                transits = None      # a garbage send time: sort it out row by row below
+            if transits is not None:
+                # One sender (the normal case): the whole chunk goes to one stream
+                st = self.streams.get(keys[0])
+                if st is None:
+                    st = self.streams[keys[0]] = StreamState()
+                st.seqs.extend(seqs)
+                st.transits.extend(transits)
+                st.flush()
+                return
+        touched = set()
+        for key, seq, recv_ns, send_ns in zip(keys, seqs, recv_times, sent):
+            transit = recv_ns - send_ns
+            if key >> 48 != MAGIC or not -TRANSIT_LIMIT <= transit < TRANSIT_LIMIT:
+                self.plain += 1
+                continue
+            st = self.streams.get(key)
+            if st is None:
+                st = self.streams[key] = StreamState()
+            st.seqs.append(seq)
+            st.transits.append(transit)
+            touched.add(key)
+        for key in touched:
+            self.streams[key].flush()
+
+    def summary(self):
+        """Totals over all streams seen by this receiver (latencies in ms), or None without headers"""
+        self.decode()
+        if not self.streams:
+            return None
+        streams = list(self.streams.values())
+        received = sum(s.received for s in streams)
+        expected = sum(s.highest - s.first + 1 for s in streams)
+        lost = max(expected - received, 0)
+        jitter_n = sum(s.jitter_n for s in streams)
+        latencies = sorted(t for s in streams for t in s.lat_samples[-LATENCY_SAMPLES:])
+        return {
+            "received": received,
+            "expected": expected,
+            "lost": lost,
+            "loss_pct": 100.0 * lost / expected if expected else 0.0,
+            "duplicates": sum(s.duplicates for s in streams),
+            "late": sum(s.late for s in streams),
+            "reorder_depth": max(s.reorder_depth for s in streams),
+            "lat_min_ms": min(s.lat_min for s in streams) / 1e6,
+            "lat_avg_ms": sum(s.lat_sum for s in streams) / (received + sum(s.duplicates for s in streams)) / 1e6,
+            "lat_max_ms": max(s.lat_max for s in streams) / 1e6,
+            "jitter_ms": sum(s.jitter_sum for s in streams) / jitter_n / 1e6 if jitter_n else 0.0,
+            "lat_p50_ms": _nearest_rank(latencies, 50) / 1e6,
+            "lat_p90_ms": _nearest_rank(latencies, 90) / 1e6,
+            "lat_p99_ms": _nearest_rank(latencies, 99) / 1e6,
+        }
+
+
+def _nearest_rank(sorted_values, p):
+    if not sorted_values:
+        return 0
+    return sorted_values[max(0, min(len(sorted_values) - 1, -(-p * len(sorted_values) // 100) - 1))]
+
+
+_SEQ_TABLE_HEADER = "{:<10} {:<10} {:<8} {:<8} {:<8} {:<8} {:<10} {:<10} {:<10}".format(
+    "Thread", "Received", "Loss %", "Dups", "Late", "Reorder", "Lat avg", "Lat max", "Jitter")
+
+
+def print_sequence_table(seq_summaries, write=print):
+    """Per-thread loss/reorder/latency table, one write() per line; nothing without headers
+
+    seq_summaries maps thread name ("Thread-3") -> SequenceTracker.summary() or None.
+    """
+    rows = [(name, s) for name, s in seq_summaries.items() if s is not None]
+    if not rows:
+        return
+    write("Sequence statistics (latency/jitter in ms):")
+    write(_SEQ_TABLE_HEADER)
+    for name, s in sorted(rows, key=lambda r: int(r[0].split('-')[1])):
+        write("{:<10} {:<10} {:<8.2f} {:<8} {:<8} {:<8} {:<10.3f} {:<10.3f} {:<10.3f}".format(
+            name, s["received"], s["loss_pct"], s["duplicates"], s["late"],
+            s["reorder_depth"], s["lat_avg_ms"], s["lat_max_ms"], s["jitter_ms"]))
@@ -0,0 +1,126 @@
+# ratelog.py
+# Asynchronous, rate-limited logging for the receive loops.
+# Receiver threads only append (time, format, args) tuples to their own bounded deque;
+# a background writer thread formats and writes them in bulk, so printing per packet no
+# longer costs a terminal write and a stdout-lock round trip on the hot path.
+# Shared with the April28 sender/receivers, whose paper_modules.py puts this directory on sys.path.
+import sys
+import threading
+import time
+from collections import deque
+
+RING_SIZE = 4096               # pending lines per thread before the oldest are overwritten
+FLUSH_INTERVAL = 0.1           # seconds between writer passes
+
+
+def stdout_sink(entries):
+    """Default sink: one write for the whole batch of (timestamp, text) entries"""
+    sys.stdout.write("".join(text + "\n" for _, text in entries))
+    sys.stdout.flush()
+
+
+class LogChannel:
+    """One thread's ring buffer; only its owning thread appends, only the writer pops"""
+    __slots__ = ("name", "ring", "every_n", "interval_ns", "count", "next_ns",
+                 "pending_suppressed", "suppressed", "dropped")
+
+    def __init__(self, name, every_n, interval, ring_size):
+        self.name = name
+        self.ring = deque(maxlen=ring_size)   # append/popleft are atomic, no lock needed
+        self.every_n = every_n
+        self.interval_ns = int(interval * 1e9) if interval else 0
+        self.count = 0
+        self.next_ns = 0
+        self.pending_suppressed = 0
+        self.suppressed = 0
+        self.dropped = 0
+
+    def event(self, fmt, *args):
+        """High-rate line (e.g. per packet): kept only every Nth call / once per interval"""
+        self.count += 1
+        if self.every_n > 1 and self.count % self.every_n:
+            self.pending_suppressed += 1
+            return
+        if self.interval_ns:
+            now = time.monotonic_ns()
+            if now < self.next_ns:
+                self.pending_suppressed += 1
+                return
+            self.next_ns = now + self.interval_ns
+        skipped = self.pending_suppressed
+        self.suppressed += skipped
+        self.pending_suppressed = 0
+        self._put(fmt, args, skipped)
+
+    def info(self, fmt, *args):
+        """Low-rate line (listening, burst ended, stopped): never sampled"""
+        self._put(fmt, args, 0)
+
+    def _put(self, fmt, args, skipped):
+        ring = self.ring
+        if len(ring) == ring.maxlen:
+            self.dropped += 1
+        ring.append((time.time(), fmt, args, skipped))
+
+
+class RateLimitedLogger:
+    """Owns the per-thread channels and the background writer thread"""
+
+    def __init__(self, every_n=0, interval=None, ring_size=RING_SIZE, sink=stdout_sink):
+        self.every_n = every_n
+        self.interval = interval
+        self.ring_size = ring_size
+        self.sink = sink
+        self.channels = []
+        self.lines_written = 0
+        self._lock = threading.Lock()          # guards channel registration only
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+
+    def channel(self, name):
+        ch = LogChannel(name, self.every_n, self.interval, self.ring_size)
+        with self._lock:
+            self.channels.append(ch)
+        return ch
+
+    def start(self):
+        self._writer.start()
+        return self
+
+    def stop(self):
+        """Stop the writer and flush what is left"""
+        self._stop.set()
+        if self._writer.is_alive():
+            self._writer.join()
+        self._drain()
+
+    def totals(self):
+        """(lines written, lines suppressed by sampling, lines dropped because a ring was full)"""
+        with self._lock:
+            channels = list(self.channels)
+        suppressed = sum(ch.suppressed + ch.pending_suppressed for ch in channels)
+        return self.lines_written, suppressed, sum(ch.dropped for ch in channels)
+
+    def _run(self):
+        while not self._stop.wait(FLUSH_INTERVAL):
+            self._drain()
+
+    def _drain(self):
+        with self._lock:
+            channels = list(self.channels)
+        entries = []
+        for ch in channels:
+            ring = ch.ring
+            try:
+                while True:
+                    t, fmt, args, skipped = ring.popleft()
+                    text = fmt.format(*args)
+                    if skipped:
+                        text += f" [+{skipped} suppressed]"
+                    entries.append((t, text))
+            except IndexError:
+                pass
+        if entries:
+            entries.sort(key=lambda e: e[0])
+            self.lines_written += len(entries)
+            self.sink(entries)
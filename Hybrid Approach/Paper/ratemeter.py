@@ -0,0 +1,209 @@
+# ratemeter.py
+# Streaming throughput meter that runs alongside burst-end reporting. Bytes are counted as
+# received (real datagram lengths, not packets x PACKET_SIZE) into fixed time buckets, so
+# rates over sliding windows (100 ms / 1 s / 10 s by default) are readable at any moment
+# while traffic is still flowing, not only after IDLE_TIMEOUT of silence.
+# add() is O(1) per packet or batch; rotation work is amortised over elapsed buckets.
+# Units follow the rest of the repo: Mbps = MiB * 8 / s.
+import math
+import threading
+from array import array
+from itertools import compress, repeat
+from operator import gt
+
+WINDOWS = (0.1, 1.0, 10.0)   # sliding windows reported by rates(), seconds
+RESOLUTION = 0.01            # bucket width, seconds
+EWMA_TAU = 1.0               # EWMA time constant, seconds
+HISTORY = 6000               # period samples kept for min/p50/p99 (10 min of 100 ms periods)
+
+MIB = 1024 * 1024
+
+
+def to_mbps(nbytes, seconds):
+    return nbytes * 8 / MIB / seconds if seconds > 0 else 0.0
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class RateMeter:
+    """One receiver's meter: only the owning thread calls add(); any thread may read
+
+    Buckets are indexed by absolute time (floor(t / RESOLUTION)), so meters of different
+    receivers line up and readers can discard buckets that went stale while the owner
+    was idle. Each completed period (the smallest window) that carried traffic becomes
+    one rate sample for the EWMA and the min/p50/p99 figures.
+    """
+
+    def __init__(self, windows=WINDOWS, resolution=RESOLUTION, ewma_tau=EWMA_TAU, history=HISTORY):
+        self.windows = tuple(windows)
+        self.resolution = resolution
+        self.inv_res = 1.0 / resolution
+        self.nbuckets = int(math.ceil(max(self.windows) / resolution))
+        self.bytes = array('Q', bytes(8 * self.nbuckets))
+        self.stamp = array('q', [-1]) * self.nbuckets   # absolute bucket index held by each slot
+        self.cur = -1                                   # absolute index of the newest bucket
+        self.per_period = max(1, int(round(self.windows[0] / resolution)))
+        self.period = -1
+        self.period_bytes = 0
+        self.samples_idx = array('q')                   # ring of (period index, bytes)
+        self.samples_bytes = array('Q')
+        self.history = history
+        self.samples_total = 0
+        self.ewma_tau = ewma_tau
+        self.ewma = 0.0                                 # Mbps
+        self.total_bytes = 0
+        self.total_packets = 0
+
+    def add(self, nbytes, now, packets=1):
+        """Count nbytes (packets datagrams) received at `now` (seconds, wall clock)"""
+        idx = int(now * self.inv_res)
+        if idx != self.cur:
+            idx = self._advance(idx)
+        slot = idx % self.nbuckets
+        self.bytes[slot] += nbytes
+        self.period_bytes += nbytes
+        self.total_bytes += nbytes
+        self.total_packets += packets
+
+    def _advance(self, idx):
+        """Move the newest bucket to idx; returns the bucket to count into"""
+        if idx < self.cur:
+            return self.cur   # clock stepped back: keep counting into the newest bucket
+        period = idx // self.per_period
+        if period != self.period:
+            self._close_period(period)
+        # Clear the slots being reused; at most nbuckets of them however long the gap
+        first = max(self.cur + 1, idx - self.nbuckets + 1)
+        nb = self.nbuckets
+        for i in range(first, idx + 1):
+            slot = i % nb
+            self.bytes[slot] = 0
+            self.stamp[slot] = i
+        self.cur = idx
+        return idx
+
+    def _close_period(self, period):
+        if self.period >= 0 and self.period_bytes:
+            rate = to_mbps(self.period_bytes, self.windows[0])
+            gap = period - self.period
+            # EWMA with dt-aware smoothing: periods skipped while idle decay it toward zero
+            decay = math.exp(-self.windows[0] / self.ewma_tau)
+            self.ewma = rate + (self.ewma - rate) * decay
+            if gap > 1:
+                self.ewma *= decay ** (gap - 1)
+            if self.samples_total < self.history:
+                self.samples_idx.append(self.period)
+                self.samples_bytes.append(self.period_bytes)
+            else:
+                pos = self.samples_total % self.history
+                self.samples_idx[pos] = self.period
+                self.samples_bytes[pos] = self.period_bytes
+            self.samples_total += 1
+        self.period = period
+        self.period_bytes = 0
+
+    def window_bytes(self, now):
+        """{window seconds: bytes received in the trailing window ending at `now`}"""
+        idx = int(now * self.inv_res)
+        bytes_, stamp = self.bytes[:], self.stamp[:]   # copy once; the owner may be writing
+        result = {}
+        for window in self.windows:
+            oldest = idx - int(round(window * self.inv_res))
+            result[window] = sum(compress(bytes_, map(gt, stamp, repeat(oldest))))
+        return result
+
+    def rates(self, now):
+        """{window seconds: Mbps} over each trailing window"""
+        return {w: to_mbps(b, w) for w, b in self.window_bytes(now).items()}
+
+    def period_samples(self):
+        """[(period index, bytes)] for completed periods that carried traffic, oldest first"""
+        n = min(self.samples_total, self.history)
+        idx, nbytes = self.samples_idx[:n], self.samples_bytes[:n]
+        return sorted(zip(idx, nbytes))
+
+    def ewma_at(self, now):
+        """EWMA as of `now`: folds in the open period and decays over idle periods since"""
+        period = int(now * self.inv_res) // self.per_period
+        ewma, last, pending = self.ewma, self.period, self.period_bytes
+        if last < 0 or period <= last:
+            return ewma
+        decay = math.exp(-self.windows[0] / self.ewma_tau)
+        if pending:
+            rate = to_mbps(pending, self.windows[0])
+            ewma = rate + (ewma - rate) * decay
+        return ewma * decay ** (period - last - 1)
+
+    def summary(self, now):
+        return summarize_samples(self.rates(now), self.ewma_at(now), self.period_samples(),
+                                 self.windows[0], self.total_bytes, self.total_packets)
+
+
+def summarize_samples(rates, ewma, samples, period, total_bytes, total_packets):
+    values = sorted(to_mbps(b, period) for _, b in samples)
+    return {
+        "rates": rates,
+        "ewma": ewma,
+        "min": values[0] if values else 0.0,
+        "p50": percentile(values, 50),
+        "p99": percentile(values, 99),
+        "bytes": total_bytes,
+        "packets": total_packets,
+    }
+
+
+class MeterGroup:
+    """Per-receiver meters plus an aggregate view merged at read time"""
+
+    def __init__(self, **meter_args):
+        self.meter_args = meter_args
+        self.meters = {}
+        self._lock = threading.Lock()   # registration only
+
+    def meter(self, name):
+        meter = RateMeter(**self.meter_args)
+        with self._lock:
+            self.meters[name] = meter
+        return meter
+
+    def _members(self):
+        with self._lock:
+            return dict(self.meters)
+
+    def per_receiver(self, now):
+        return {name: meter.summary(now) for name, meter in self._members().items()}
+
+    def aggregate(self, now):
+        """Summary of all receivers together: window rates and EWMAs add up; percentiles are
+        taken over periods summed across receivers (periods line up on absolute time)"""
+        meters = list(self._members().values())
+        if not meters:
+            return summarize_samples({}, 0.0, [], 1.0, 0, 0)
+        rates = {}
+        per_period = {}
+        for meter in meters:
+            for window, mbps in meter.rates(now).items():
+                rates[window] = rates.get(window, 0.0) + mbps
+            for period, nbytes in meter.period_samples():
+                per_period[period] = per_period.get(period, 0) + nbytes
+        return summarize_samples(rates, sum(m.ewma_at(now) for m in meters), list(per_period.items()),
+                                 meters[0].windows[0], sum(m.total_bytes for m in meters),
+                                 sum(m.total_packets for m in meters))
+
+
+def format_meter(summary):
+    """One-line rendering: windows, EWMA, min/p50/p99 (Mbps)"""
+    windows = ", ".join(f"{_format_window(w)} {mbps:.2f}" for w, mbps in summary["rates"].items())
+    return (f"{windows} Mbps | EWMA {summary['ewma']:.2f} | "
+            f"min/p50/p99 {summary['min']:.2f}/{summary['p50']:.2f}/{summary['p99']:.2f} Mbps | "
+            f"{summary['packets']} pkts, {summary['bytes'] / MIB:.2f} MiB")
+
+
+def _format_window(seconds):
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:g}s"
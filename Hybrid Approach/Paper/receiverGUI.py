@@ -1,33 +1,82 @@
-import socket
+import math
 import time
-import threading
-from collections import deque
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-import queue
 import subprocess
 import platform
+from collections import deque
+
+from burst_store import BurstStore
+from gui_engine import EngineClient, PacketTally
+from packet_header import print_sequence_table
+
+def nice_ceiling(value):
+    """Smallest 1/2/5 x 10^k at or above value: a chart's axis top"""
+    if value <= 0:
+        return 1.0
+    scale = 10 ** math.floor(math.log10(value))
+    for m in (1, 2, 5, 10):
+        if value <= m * scale:
+            return m * scale
+
+def minmax_columns(values, columns):
+    """Downsample to at most `columns` (index, min, max) buckets, one per pixel column
+
+    Keeping both extremes per column (instead of averaging) still shows every spike.
+    """
+    n = len(values)
+    if n <= columns:
+        return [(i, v, v) for i, v in enumerate(values)]
+    out = []
+    for c in range(columns):
+        chunk = values[c * n // columns:(c + 1) * n // columns]
+        out.append((c, min(chunk), max(chunk)))
+    return out
 
 class UDPReceiverGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("UDP Broadcast Receiver")
-        self.root.geometry("800x600")
-        
-        # Configuration
-        self.PACKET_SIZE = 65535
-        self.IDLE_TIMEOUT = 1.0
+        self.root.geometry("900x820")
+        
+        # Configuration (receive settings live in gui_engine, which runs in its own process)
+        self.LOG_MAX_LINES = 2000      # ring: the log widget keeps only the newest lines
+        self.LOG_MAX_PER_TICK = 200    # lines inserted per UI tick; the rest wait for the next one
+        self.LOG_TICK_MS = 100
+        self.SUMMARY_INTERVAL = 1.0    # seconds between per-thread packet summaries (replace per-packet lines)
+        self.DASH_TICK_MS = 250        # dashboard/statistics refresh
+        self.HISTORY_SECONDS = 300     # span of the aggregate Mbps plot
+        self.TREE_MAX_ROWS = 500       # bursts listed for a selected thread (newest kept)
+        self.BAR_MIN_PX = 3            # narrower than this and neighbouring threads share a bar
+        self.ENGINE_POLL_MS = 50
+        self.ENGINE_MAX_MESSAGES = 20  # engine messages handled per poll
         
         # State variables
-        self.threads = []
-        self.stop_event = threading.Event()
-        self.statistics = deque()
-        self.lock = threading.Lock()
+        self.engine = EngineClient()
+        self.statistics = BurstStore()   # bounded ring: memory stays flat on long runs
+        self.seq_summaries = {}
         self.is_listening = False
-        self.log_queue = queue.Queue()
+        self.is_stopping = False
+        self.log_pending = deque(maxlen=self.LOG_MAX_LINES)   # older lines could never be shown anyway
+        self.log_skipped = 0
+        self.tallies = {}
+        self.tally_marks = {}
+        self.summary_job = None
+        self.thread_names = []
+        self.history = deque(maxlen=self.HISTORY_SECONDS * 1000 // self.DASH_TICK_MS)
+        self.rates = {}              # thread -> Mbps over the last dashboard tick
+        self.rate_marks = {}         # thread -> bytes at the last snapshot
+        self.snapshot_time = None    # engine clock of the last snapshot
+        self.burst_cursor = 0        # BurstStore.appended already folded into burst_totals
+        self.burst_totals = {}       # thread -> [first start, last end, bursts, sum of burst Mbps]
+        self.tree_mode = None        # None = one row per thread, else the selected thread's bursts
+        self.tree_values = {}        # row iid -> values last written (skip unchanged rows)
+        self.bar_items = []
         
         self.create_widgets()
         self.update_log()
+        self.update_dashboard()
+        self.poll_engine()
         
     def create_widgets(self):
         # Main frame
@@ -88,6 +137,11 @@ class UDPReceiverGUI:
         self.threads_var = tk.StringVar(value="4")
         threads_entry = ttk.Entry(udp_frame, textvariable=self.threads_var, width=10)
         threads_entry.grid(row=0, column=3, sticky=tk.W, padx=(0, 20))
+
+        # Sequence header decoding costs CPU per datagram, so it is opt-in
+        self.decode_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(udp_frame, text="Decode sequence header", variable=self.decode_var).grid(
+            row=0, column=6, sticky=tk.W, padx=(20, 0))
         
         # Control buttons
         self.start_button = ttk.Button(udp_frame, text="Start Listening", command=self.start_listening)
@@ -108,9 +162,25 @@ class UDPReceiverGUI:
         self.log_text = scrolledtext.ScrolledText(log_frame, height=15, width=90)
         self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
+        # Live dashboard: per-thread rate bars and the aggregate Mbps over time
+        dash_frame = ttk.LabelFrame(main_frame, text="Live Throughput", padding="10")
+        dash_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        self.bar_canvas = tk.Canvas(dash_frame, height=140, width=400, background='white')
+        self.bar_canvas.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 5))
+        self.series_canvas = tk.Canvas(dash_frame, height=140, width=400, background='white')
+        self.series_canvas.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(5, 0))
+        dash_frame.columnconfigure(0, weight=1)
+        dash_frame.columnconfigure(1, weight=1)
+        
+        # Items are created once and moved with coords()/itemconfig() on every refresh
+        self.bar_label = self.bar_canvas.create_text(4, 2, anchor=tk.NW, text="Per-thread Mbps")
+        self.series_label = self.series_canvas.create_text(4, 2, anchor=tk.NW, text="Total Mbps")
+        self.series_line = self.series_canvas.create_line(0, 0, 0, 0, fill='darkgreen', state='hidden')
+        
         # Statistics frame
         stats_frame = ttk.LabelFrame(main_frame, text="Statistics", padding="10")
-        stats_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
+        stats_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         # Thread selector
         thread_frame = ttk.Frame(stats_frame)
@@ -153,108 +223,221 @@ class UDPReceiverGUI:
         self.root.rowconfigure(0, weight=1)
         main_frame.columnconfigure(0, weight=1)
         main_frame.rowconfigure(2, weight=1)
-        main_frame.rowconfigure(3, weight=1)
+        main_frame.rowconfigure(4, weight=1)
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
         stats_frame.columnconfigure(0, weight=1)
         stats_frame.rowconfigure(1, weight=1)
         
     def log_message(self, message):
-        """Thread-safe logging"""
-        self.log_queue.put(f"[{time.strftime('%H:%M:%S')}] {message}")
-        
+        """Queue a line for the log (the oldest pending line goes if full)"""
+        self.queue_log_lines([f"[{time.strftime('%H:%M:%S')}] {message}"])
+
+    def queue_log_lines(self, lines):
+        """Queue already timestamped lines, e.g. the engine's"""
+        pending = self.log_pending
+        self.log_skipped += max(0, len(pending) + len(lines) - pending.maxlen)
+        pending.extend(lines)
+
     def update_log(self):
-        """Update log display from queue"""
-        try:
-            while True:
-                message = self.log_queue.get_nowait()
-                self.log_text.insert(tk.END, message + "\n")
-                self.log_text.see(tk.END)
-        except queue.Empty:
-            pass
+        """Move up to LOG_MAX_PER_TICK pending lines into the log with one insert, then trim it"""
+        pending = self.log_pending
+        n = min(len(pending), self.LOG_MAX_PER_TICK)
+        if n:
+            lines = [pending.popleft() for _ in range(n)]
+            self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+            # Keep the widget a ring of LOG_MAX_LINES lines ('end-1c' is the last line + 1)
+            excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - self.LOG_MAX_LINES
+            if excess > 0:
+                self.log_text.delete('1.0', f'{excess + 1}.0')
+            self.log_text.see(tk.END)
         
         # Schedule next update
-        self.root.after(100, self.update_log)
-        
-    def receiver_function(self, stop_event, statistics, lock, thread_name):
-        """UDP receiver function (modified for GUI)"""
-        try:
-            port = int(self.port_var.get())
-        except ValueError:
-            self.log_message(f"{thread_name}: Invalid port number")
+        self.root.after(self.LOG_TICK_MS, self.update_log)
+
+    def summarize_packets(self):
+        """One line per thread that received since the last summary, instead of one per packet"""
+        for name, tally in list(self.tallies.items()):
+            packets, nbytes = tally.packets, tally.bytes
+            last_packets, last_bytes = self.tally_marks.get(name, (0, 0))
+            if packets > last_packets:
+                mib = (nbytes - last_bytes) / (1024 * 1024)
+                oversized = f", {tally.oversized} oversized so far" if tally.oversized else ""
+                self.log_message(f"{name}: {packets - last_packets} packets, {mib:.2f} MiB "
+                                 f"({mib * 8 / self.SUMMARY_INTERVAL:.2f} Mbps) from {tally.addr}{oversized}")
+            self.tally_marks[name] = (packets, nbytes)
+        if self.is_listening:
+            self.summary_job = self.root.after(int(self.SUMMARY_INTERVAL * 1000), self.summarize_packets)
+
+    def update_dashboard(self):
+        """Refresh charts and table from the running counters; cost depends on thread count only"""
+        # Fold in only the bursts closed since the last tick
+        new = self.statistics.rows(since=self.burst_cursor)
+        self.burst_cursor = self.statistics.appended
+        for stat in new:
+            thread_name, burst_start, burst_last, _, _, mbps = stat
+            totals = self.burst_totals.get(thread_name)
+            if totals is None:
+                self.burst_totals[thread_name] = [burst_start, burst_last, 1, mbps]
+            else:
+                totals[1] = burst_last
+                totals[2] += 1
+                totals[3] += mbps
+
+        self.draw_bars()
+        self.draw_series()
+        if self.tree_mode is None:
+            self.refresh_thread_rows()
+        else:
+            self.append_burst_rows([s for s in new if s[0] == self.tree_mode])
+        self.root.after(self.DASH_TICK_MS, self.update_dashboard)
+
+    def canvas_size(self, canvas):
+        """Drawable (width, height); the configured size until the canvas is first mapped"""
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if width <= 1:
+            width, height = int(canvas['width']), int(canvas['height'])
+        return width, height
+
+    def draw_bars(self):
+        """One bar per thread, or per group of neighbouring threads (their max) when they don't fit"""
+        canvas = self.bar_canvas
+        width, height = self.canvas_size(canvas)
+        rates = [self.rates.get(name, 0.0) for name in self.thread_names]
+        columns = min(len(rates), max(1, width // self.BAR_MIN_PX))
+        bars = minmax_columns(rates, columns) if rates else []
+        if len(self.bar_items) != len(bars):
+            for item in self.bar_items:
+                canvas.delete(item)
+            self.bar_items = [canvas.create_rectangle(0, 0, 0, 0, fill='steelblue', outline='')
+                              for _ in bars]
+        top = nice_ceiling(max(rates, default=0.0))
+        plot = height - 18
+        bar_width = width / max(1, len(bars))
+        for item, (i, _, peak) in zip(self.bar_items, bars):
+            x0 = i * bar_width + (1 if bar_width > 2 else 0)
+            canvas.coords(item, x0, height - plot * peak / top, (i + 1) * bar_width, height)
+        per_bar = -(-len(rates) // len(bars)) if bars else 1
+        canvas.itemconfig(self.bar_label, text=f"Per-thread Mbps (top {top:g})"
+                          + (f", max of {per_bar} threads per bar" if per_bar > 1 else ""))
+
+    def draw_series(self):
+        """Aggregate Mbps over the last HISTORY_SECONDS, at most two points per pixel column"""
+        canvas = self.series_canvas
+        width, height = self.canvas_size(canvas)
+        history = list(self.history)
+        latest = history[-1] if history else 0.0
+        top = nice_ceiling(max(history, default=0.0))
+        canvas.itemconfig(self.series_label, text=f"Total Mbps {latest:.1f} (top {top:g})")
+        if len(history) < 2:
+            canvas.itemconfig(self.series_line, state='hidden')
             return
+        plot = height - 18
+        used = width * len(history) / self.history.maxlen   # a full history spans the canvas
+        columns = minmax_columns(history, max(2, int(used)))
+        step = used / len(columns)
+        coords = []
+        for i, low, high in columns:
+            x = i * step
+            coords += (x, height - plot * low / top)
+            if high != low:
+                coords += (x, height - plot * high / top)
+        canvas.coords(self.series_line, *coords)
+        canvas.itemconfig(self.series_line, state='normal')
+
+    def thread_row_values(self, name):
+        """Per-thread row: first burst start, last burst end, packets/MiB so far, mean burst Mbps"""
+        tally = self.tallies.get(name)
+        packets = tally.packets if tally is not None else 0
+        mib = tally.bytes / (1024 * 1024) if tally is not None else 0.0
+        totals = self.burst_totals.get(name)
+        if totals is None:
+            return ("-", "-", packets, f"{mib:.2f}", "-")
+        first, last, bursts, mbps_sum = totals
+        return (time.strftime('%H:%M:%S', time.localtime(first)),
+                time.strftime('%H:%M:%S', time.localtime(last)),
+                packets, f"{mib:.2f}", f"{mbps_sum / bursts:.2f}")
+
+    def refresh_thread_rows(self):
+        """Rewrite only the per-thread rows whose values changed"""
+        for name in self.thread_names:
+            values = self.thread_row_values(name)
+            if self.tree_values.get(name) != values:
+                self.stats_tree.item(name, values=values)
+                self.tree_values[name] = values
+
+    def append_burst_rows(self, stats):
+        """Add the selected thread's new bursts; the table keeps the newest TREE_MAX_ROWS"""
+        for stat in stats:
+            thread_name, burst_start, burst_last, burst_count, mb_recv, mbps = stat
+            start_str = time.strftime('%H:%M:%S', time.localtime(burst_start))
+            end_str = time.strftime('%H:%M:%S', time.localtime(burst_last))
             
-        # Set up UDP socket for broadcast
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        try:
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 0)
-        except Exception:
-            pass
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 256 * 1024)
+            self.stats_tree.insert('', tk.END, text=thread_name,
+                                 values=(start_str, end_str, burst_count, f"{mb_recv:.2f}", f"{mbps:.2f}"))
+        children = self.stats_tree.get_children()
+        if len(children) > self.TREE_MAX_ROWS:
+            self.stats_tree.delete(*children[:len(children) - self.TREE_MAX_ROWS])
         
+    def poll_engine(self):
+        """Apply the engine's snapshots and replies; runs on the Tk loop, never blocks"""
         try:
-            sock.bind(("", port))
-            sock.settimeout(self.IDLE_TIMEOUT)
-        except Exception as e:
-            self.log_message(f"{thread_name}: Failed to bind to port {port}: {e}")
-            return
-
-        burst_count = 0
-        burst_start = None
-        burst_last = None
-        total_bytes = 0
+            messages = self.engine.poll(self.ENGINE_MAX_MESSAGES)
+        except (EOFError, OSError):
+            messages = [("stopped", {})]
+            self.log_message("Receiver engine exited unexpectedly")
+            self.engine.close()
+        for message in messages:
+            if message[0] == "stats":
+                self.apply_snapshot(*message[1:])
+            elif message[0] == "stopped":
+                self.engine_stopped(message[1])
+        self.root.after(self.ENGINE_POLL_MS, self.poll_engine)
 
-        self.log_message(f"{thread_name}: Listening for broadcasts on port {port}...")
+    def apply_snapshot(self, t, tallies, bursts, logs):
+        """Running totals -> tallies and rates (timed on the engine's clock), new bursts -> store"""
+        dt = t - self.snapshot_time if self.snapshot_time is not None else 0.0
+        self.snapshot_time = t
+        total = 0.0
+        for name, (packets, nbytes, oversized, addr) in tallies.items():
+            tally = self.tallies.get(name)
+            if tally is None:
+                tally = self.tallies[name] = PacketTally()
+            tally.packets, tally.bytes, tally.oversized, tally.addr = packets, nbytes, oversized, addr
+            if dt > 0:
+                rate = (nbytes - self.rate_marks.get(name, 0)) * 8 / (1024 * 1024) / dt
+                self.rates[name] = rate
+                total += rate
+            self.rate_marks[name] = nbytes
+        if dt > 0 and self.is_listening:
+            self.history.append(total)
+        self.statistics.extend(bursts)
+        self.queue_log_lines(logs)
 
-        while not stop_event.is_set():
-            try:
-                data, addr = sock.recvfrom(self.PACKET_SIZE)
-                now = time.time()
-                packet_size = len(data)
-                self.log_message(f"{thread_name}: Received packet from {addr} ({packet_size} bytes)")
-                if burst_count == 0:
-                    burst_start = now
-                    total_bytes = 0
-                burst_last = now
-                burst_count += 1
-                total_bytes += packet_size
-            except socket.timeout:
-                if burst_count > 0:
-                    elapsed = burst_last - burst_start
-                    mb_recv = total_bytes / (1024 * 1024)
-                    mbps = mb_recv * 8 / elapsed
-                    with lock:
-                        statistics.append((thread_name, burst_start, burst_last, burst_count, mb_recv, mbps))
-                    self.log_message(f"{thread_name}: Burst ended. Packets: {burst_count}, Bytes: {total_bytes}, MiB: {mb_recv:.2f}, Mbps: {mbps:.2f}")
-                    burst_count = 0
-                    burst_start = None
-                    burst_last = None
-                    total_bytes = 0
-                if stop_event.is_set():
-                    break
-                self.log_message(f"{thread_name}: Waiting for data...")
-            except OSError as e:
-                if getattr(e, 'winerror', None) == 10040:
-                    now = time.time()
-                    if burst_count == 0:
-                        burst_start = now
-                        total_bytes = 0
-                    burst_last = now
-                    burst_count += 1
-                    total_bytes += self.PACKET_SIZE  # Oversized packet, use max size
-                    self.log_message(f"{thread_name}: Received oversized packet (>{self.PACKET_SIZE} bytes)")
-                else:
-                    self.log_message(f"{thread_name}: Socket error: {e}")
-                    break
-                    
-        sock.close()
-        self.log_message(f"{thread_name}: Stopped.")
+    def engine_stopped(self, summaries):
+        """The engine's threads have exited: final summaries and UI state"""
+        self.seq_summaries = summaries
+        self.is_listening = False
+        self.is_stopping = False
+        if self.summary_job is not None:
+            self.root.after_cancel(self.summary_job)
+            self.summary_job = None
+        self.summarize_packets()   # the last partial interval
+        if self.log_skipped:
+            self.log_message(f"Log: {self.log_skipped} older lines skipped to keep the window responsive")
+            self.log_skipped = 0
+        self.rates = {}
+        self.start_button.config(state='normal')
+        self.stop_button.config(state='disabled')
+        self.status_var.set("Stopped")
+        
+        # The dashboard keeps the table current; log the sequence summary
+        self.log_sequence_stats()
+        self.log_message("All threads stopped. Statistics updated.")
         
     def start_listening(self):
         """Start UDP listening threads"""
-        if self.is_listening:
+        if self.is_listening or self.is_stopping:
             return
             
         try:
@@ -269,30 +452,29 @@ class UDPReceiverGUI:
             return
             
         # Clear previous data
-        self.statistics.clear()
-        self.stats_tree.delete(*self.stats_tree.get_children())
+        self.statistics = BurstStore()
+        self.seq_summaries = {}
+        self.tallies = {}
+        self.tally_marks = {}
+        self.history.clear()
+        self.rates = {}
+        self.rate_marks = {}
+        self.snapshot_time = None
+        self.burst_cursor = 0
+        self.burst_totals = {}
+        self.thread_names = [f"Thread-{i+1}" for i in range(num_threads)]
         self.thread_combo['values'] = []
         self.thread_var.set('')
+        self.show_all_stats()
+        
+        for thread_name in self.thread_names:
+            self.statistics.thread_id(thread_name)   # fixes the thread order: 1, 2, ..., 10
         
-        # Reset stop event
-        self.stop_event = threading.Event()
-        self.threads = []
-        
-        # Create and start threads
-        for i in range(num_threads):
-            thread_name = f"Thread-{i+1}"
-            thread = threading.Thread(
-                target=self.receiver_function,
-                args=(self.stop_event, self.statistics, self.lock, thread_name),
-                name=thread_name,
-                daemon=True
-            )
-            self.threads.append(thread)
-            thread.start()
+        # The engine process creates and starts the threads
+        self.engine.start(port, num_threads, self.decode_var.get())
             
         # Update thread selector
-        thread_names = [f"Thread-{i+1}" for i in range(num_threads)]
-        self.thread_combo['values'] = thread_names
+        self.thread_combo['values'] = self.thread_names
         
         # Update UI state
         self.is_listening = True
@@ -300,29 +482,22 @@ class UDPReceiverGUI:
         self.stop_button.config(state='normal')
         self.status_var.set(f"Listening on port {port} with {num_threads} threads")
         
-        self.log_message(f"Started listening with {num_threads} threads on port {port}")
+        self.summary_job = self.root.after(int(self.SUMMARY_INTERVAL * 1000), self.summarize_packets)
         
     def stop_listening(self):
-        """Stop UDP listening threads"""
-        if not self.is_listening:
+        """Ask the engine to stop; engine_stopped() finishes up when it reports back"""
+        if not self.is_listening or self.is_stopping:
             return
             
         self.log_message("Stopping all threads...")
-        self.stop_event.set()
-        
-        # Wait for threads to finish (with timeout)
-        for thread in self.threads:
-            thread.join(timeout=2.0)
-            
-        # Update UI state
-        self.is_listening = False
-        self.start_button.config(state='normal')
+        self.is_stopping = True
         self.stop_button.config(state='disabled')
-        self.status_var.set("Stopped")
-        
-        # Update statistics display
-        self.show_all_stats()
-        self.log_message("All threads stopped. Statistics updated.")
+        self.status_var.set("Stopping...")
+        self.engine.stop()
+
+    def log_sequence_stats(self):
+        """Log per-thread loss/reorder/latency, only when the sender used --header"""
+        print_sequence_table(self.seq_summaries, self.log_message)
         
     def toggle_ip_mode(self):
         """Toggle between DHCP and Static IP mode"""
@@ -429,40 +604,33 @@ class UDPReceiverGUI:
         if not selected_thread:
             return
             
-        # Clear current display
+        # Rebuild once for the new selection; update_dashboard appends its new bursts from here on
+        self.tree_mode = selected_thread
+        self.tree_values = {}
         self.stats_tree.delete(*self.stats_tree.get_children())
         
-        # Filter statistics for selected thread
-        thread_stats = [stat for stat in self.statistics if stat[0] == selected_thread]
-        
-        # Add to treeview
-        for stat in sorted(thread_stats, key=lambda x: x[1]):
-            thread_name, burst_start, burst_last, burst_count, mb_recv, mbps = stat
-            start_str = time.strftime('%H:%M:%S', time.localtime(burst_start))
-            end_str = time.strftime('%H:%M:%S', time.localtime(burst_last))
-            
-            self.stats_tree.insert('', tk.END, text=thread_name,
-                                 values=(start_str, end_str, burst_count, f"{mb_recv:.2f}", f"{mbps:.2f}"))
+        # Filter statistics for selected thread (column scan; rows come out in start order)
+        thread_stats = self.statistics.thread_rows(selected_thread)
+        pending = sum(1 for s in self.statistics.rows(since=self.burst_cursor) if s[0] == selected_thread)
+        if pending:
+            thread_stats = thread_stats[:-pending]   # the next tick appends these
+        self.append_burst_rows(thread_stats[-self.TREE_MAX_ROWS:])
                                  
     def show_all_stats(self):
-        """Show statistics for all threads"""
-        # Clear current display
+        """Show one row per thread; update_dashboard rewrites them in place as counters move"""
+        self.tree_mode = None
+        self.tree_values = {}
         self.stats_tree.delete(*self.stats_tree.get_children())
         self.thread_var.set('')
         
-        # Add all statistics to treeview
-        for stat in sorted(self.statistics, key=lambda x: (x[0], x[1])):
-            thread_name, burst_start, burst_last, burst_count, mb_recv, mbps = stat
-            start_str = time.strftime('%H:%M:%S', time.localtime(burst_start))
-            end_str = time.strftime('%H:%M:%S', time.localtime(burst_last))
-            
-            self.stats_tree.insert('', tk.END, text=thread_name,
-                                 values=(start_str, end_str, burst_count, f"{mb_recv:.2f}", f"{mbps:.2f}"))
+        for name in self.thread_names:
+            values = self.thread_row_values(name)
+            self.stats_tree.insert('', tk.END, iid=name, text=name, values=values)
+            self.tree_values[name] = values
                                  
     def on_closing(self):
-        """Handle window closing"""
-        if self.is_listening:
-            self.stop_listening()
+        """Handle window closing (quitting the engine stops its receivers)"""
+        self.engine.close()
         self.root.destroy()
 
 def main():
@@ -1,18 +1,55 @@
 import socket
 import time
 import threading
-from collections import deque
-from tqdm import tqdm
+
+from burst_stats import BurstTimer, StatsAggregator
+from capture import CaptureWriter
+from packet_header import SequenceTracker
+from ratemeter import MeterGroup, format_meter
+from recv_eventloop import WakeableEvent, signal_ready, start_event_loop
+from recv_pool import ReceiverPool, default_processes
+from results import (calculate_total_throughput, print_arrival_result, print_drop_result,
+                     print_overwritten_result, print_sequence_result)
+from rxstamps import ArrivalStats, merge_arrivals, wall_ns
+from sockdrops import RCVBUF, DropMonitor, summarize_drops
+from udp_async import start_async_receivers
+from udp_batch import BatchReceiver
 
 # Configuration
 PORT = 5005
 PACKET_SIZE = 65535        # Big enough for any UDP datagram
-IDLE_TIMEOUT = 1.0         # Seconds of silence → burst ends
+IDLE_TIMEOUT = 1.0         # Seconds of silence → burst ends (socket timeout; also the stop-check interval)
+BURST_GAP = None           # Seconds; set (e.g. 0.005) to end bursts with a shared timer instead of IDLE_TIMEOUT
+DECODE_HEADERS = False     # Decode sender.py --header per datagram (loss/latency lines); costs CPU per packet
+RECV_BATCH = 8             # Datagrams per receive syscall (recvmmsg on Linux); 1 = one recvfrom_into each
 TEST_DURATION = 7          # Seconds to test each thread count
-THREAD_INCREMENT = 5       # Increase threads by this amount each test
+THREAD_INCREMENT = 5       # Smallest thread count, and the resolution of the refined search
+MAX_THREADS = 200          # Safety limit for the search
+TRIALS_MIN = 3             # Repeated trials per thread count before the CI is checked
+TRIALS_MAX = 6             # ...and at most this many
+CI_TARGET = 0.05           # Stop repeating once the 95% CI half-width is within 5% of the mean
 DEGRADATION_THRESHOLD = 0.15  # 15% throughput degradation threshold
+METER_PRINT_INTERVAL = 0      # Seconds between live sliding-window meter lines during a test (0 = off)
+STARTUP_TIMEOUT = 30.0        # Seconds to wait for every receiver to bind before measuring anyway
+TRACK_DROPS = True            # Report kernel socket-buffer drops per test (SO_RXQ_OVFL / /proc/net/udp)
+RCVBUF_AUTOTUNE = False       # Double SO_RCVBUF (up to rmem_max) of sockets the kernel drops on
+KERNEL_TIMESTAMPS = False     # Stamp arrivals with SO_TIMESTAMPNS (threads/eventloop backends) and
+                              # report kernel->user delay and inter-arrival histograms
+CAPTURE_PATH = None           # Prefix for per-packet capture files, one per test (threads backend),
+                              # e.g. "captures/run" -> captures/run-10t-20250101-120000.cap; None = off
+CAPTURE_CAPACITY = 10_000_000 # Records preallocated per capture file (40 bytes each)
+GOLDEN = (1 + 5 ** 0.5) / 2
+T_95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228)  # Student t, 1..10 dof
+RECEIVER_BACKEND = "threads"  # "threads": one OS thread per socket; "eventloop": one thread multiplexing all sockets;
+                              # "pool": sockets spread over worker processes (SO_REUSEPORT), one event loop each
+                              #   (broadcast senders only: unicast datagrams are split across the sockets);
+                              # "asyncio": one DatagramProtocol per socket on an asyncio/uvloop loop
+POOL_PROCESSES = None         # "pool" worker count for test_thread_count; None = CPU count
+POOL_PROCESS_COUNTS = [1, 2, 4, 8]       # find_optimal_threads grid when RECEIVER_BACKEND == "pool"
+POOL_SOCKETS_PER_PROCESS = [1, 5, 10, 25]
 
-def receiver_function(stop_event, statistics, lock):
+def receiver_function(stop_event, aggregator, lock, seq_stats, meters=None, ready=None, drops=None,
+                      arrivals=None, capture=None):
     # Set up UDP socket for broadcast
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -21,190 +58,386 @@ def receiver_function(stop_event, statistics, lock):
     except Exception:
         pass
     sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 256 * 1024)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF)
     try:
         sock.bind(("", PORT))
     except:
         pass
     sock.settimeout(IDLE_TIMEOUT)
 
-    burst_count = 0
-    burst_start = None
-    burst_last = None
     thread_name = threading.current_thread().name
+    stats = aggregator.register(thread_name)   # thread-local counters: no shared lock per burst
+    meter = meters.meter(thread_name) if meters is not None else None
+    buf = bytearray(PACKET_SIZE)  # reused for every datagram: recvfrom_into, no per-packet allocation
+    view = memoryview(buf)
+    # seq_stats (a dict) turns on decoding of the optional sender.py --header
+    tracker = None
+    if seq_stats is not None:
+        tracker = SequenceTracker()
+        with lock:
+            seq_stats[thread_name] = tracker
+    # Batched receives also wait on stop_event (a WakeableEvent), so stopping is immediate;
+    # the single-datagram path blocks in recvfrom_into and sees stop within IDLE_TIMEOUT
+    wake = stop_event if hasattr(stop_event, "fileno") else None
+    # arrivals (a dict) turns on kernel receive timestamps; they need the batch path (recvmsg)
+    arrival = None
+    if arrivals is not None:
+        arrival = ArrivalStats()
+        with lock:
+            arrivals[thread_name] = arrival
+    batch = (BatchReceiver(sock, RECV_BATCH, wake=wake, drops=drops is not None,
+                           timestamps=arrival is not None)
+             if RECV_BATCH > 1 or arrival is not None else None)
+    # capture (a capture.CaptureWriter): this thread's records are staged here, written in bulk
+    cap = capture.buffer(thread_name) if capture is not None else None
+    if drops is not None:
+        # SO_RXQ_OVFL via the recvmmsg batches where available, else /proc/net/udp
+        drops.watch(thread_name, sock, (lambda: batch.kernel_drops) if batch is not None else None)
+    signal_ready(ready)   # bound and registered: counts toward the startup barrier
 
     while not stop_event.is_set():
         try:
-            data, addr = sock.recvfrom(PACKET_SIZE)
-            now = time.time()
-            if burst_count == 0:
-                burst_start = now
-            burst_last = now
-            burst_count += 1
+            if batch is not None:
+                n = batch.recv(IDLE_TIMEOUT)
+                if n == 0:
+                    continue
+                now_ns = time.time_ns()
+                first = None
+                if arrival is not None:
+                    # Per-datagram kernel stamps (monotonic fallback) for bursts, latency, gaps
+                    stamps = batch.stamps
+                    for i in range(n):
+                        kernel_ns = stamps[i]
+                        arrival_ns = kernel_ns or wall_ns()
+                        arrival.add(arrival_ns, now_ns, kernel_ns)
+                        if first is None:
+                            first = arrival_ns / 1e9     # the first datagram's own (fallback) time
+                        packet = batch.view(i)
+                        if tracker is not None:
+                            tracker.observe(packet, arrival_ns)
+                        if cap is not None:
+                            cap.add(packet, batch.size(i), arrival_ns, batch.addr(i), kernel_ns)
+                    now_ns = arrival_ns
+                elif tracker is not None or cap is not None:
+                    for i in range(n):
+                        packet = batch.view(i)
+                        if tracker is not None:
+                            tracker.observe(packet, now_ns)
+                        if cap is not None:
+                            cap.add(packet, batch.size(i), now_ns, batch.addr(i))
+                nbytes = batch.nbytes
+            else:
+                nbytes, addr = sock.recvfrom_into(buf)
+                now_ns = time.time_ns()
+                if tracker is not None:
+                    tracker.observe(view[:nbytes], now_ns)
+                if cap is not None:
+                    cap.add(buf, nbytes, now_ns, addr)
+                n = 1
+                first = None
+            # Burst bookkeeping once per batch
+            now = now_ns / 1e9
+            stats.add(n, nbytes, now, first)
+            if meter is not None:
+                meter.add(nbytes, now, n)
         except socket.timeout:
-            if burst_count > 0:
-                elapsed = burst_last - burst_start
-                mb_recv = burst_count * PACKET_SIZE / (1024 * 1024)
-                mbps = mb_recv * 8 / elapsed
-                with lock:
-                    statistics.append((thread_name, burst_start, burst_last, burst_count, mb_recv, mbps))
-                burst_count = 0
-                burst_start = None
-                burst_last = None
+            stats.end_burst()
+            if arrival is not None:
+                arrival.reset_gap()
             if stop_event.is_set():
                 break
         except OSError as e:
             if getattr(e, 'winerror', None) == 10040:
-                now = time.time()
-                if burst_count == 0:
-                    burst_start = now
-                burst_last = now
-                burst_count += 1
+                stats.add(1, PACKET_SIZE, time.time())
             else:
                 raise
     
     # Handle final burst if any
-    if burst_count > 0:
-        elapsed = burst_last - burst_start if burst_last > burst_start else 1
-        mb_recv = burst_count * PACKET_SIZE / (1024 * 1024)
-        mbps = mb_recv * 8 / elapsed
-        with lock:
-            statistics.append((thread_name, burst_start, burst_last, burst_count, mb_recv, mbps))
+    stats.end_burst(min_elapsed=1)
+    if cap is not None:
+        cap.flush()
     
     sock.close()
 
-def calculate_total_throughput(statistics):
-    """Calculate total throughput from all bursts in the statistics"""
-    total_mbps = 0
-    total_packets = 0
-    for stat in statistics:
-        _, _, _, packets, _, mbps = stat
-        total_mbps += mbps
-        total_packets += packets
-    return total_mbps, total_packets
-
-def test_thread_count(num_threads):
-    """Test a specific number of threads - completely clean test"""
-    print(f"\nTesting {num_threads} threads for {TEST_DURATION} seconds...")
+def test_thread_count(num_threads, processes=None):
+    """Test a specific number of threads - completely clean test
+
+    With RECEIVER_BACKEND == "pool", num_threads sockets are spread over `processes`
+    worker processes (default POOL_PROCESSES, else the CPU count).
+    """
+    if RECEIVER_BACKEND == "pool":
+        processes = processes or POOL_PROCESSES or default_processes()
+        print(f"\nTesting {num_threads} receivers over {processes} processes for {TEST_DURATION} seconds...")
+    else:
+        print(f"\nTesting {num_threads} threads for {TEST_DURATION} seconds...")
     
     # COMPLETELY FRESH START - new everything
-    stop_event = threading.Event()
-    statistics = deque()  # Fresh statistics
-    lock = threading.Lock()
+    stop_event = WakeableEvent()    # set() also wakes receivers blocked in poll/select
+    # Shared burst timer (BURST_GAP): threads backend; the loop backends split on the same gap themselves
+    timer = BurstTimer(BURST_GAP).start() if BURST_GAP and RECEIVER_BACKEND == "threads" else None
+    gap = BURST_GAP or IDLE_TIMEOUT
+    aggregator = StatsAggregator(timer)  # Fresh statistics; each receiver registers its own counters
+    lock = threading.Lock()         # guards seq_stats registration only
+    seq_stats = {} if DECODE_HEADERS else None
+    meters = MeterGroup()           # streaming per-receiver meters (all in-process backends)
     threads = []
+    pool = None
+    # Receivers (or the loop thread serving them) wait here once their sockets are bound
+    ready = threading.Barrier((num_threads if RECEIVER_BACKEND == "threads" else 1) + 1)
+    # Kernel drop counters of every in-process socket (pool workers keep their own sockets)
+    drops = DropMonitor(autotune=RCVBUF_AUTOTUNE) if TRACK_DROPS and RECEIVER_BACKEND != "pool" else None
+    # Receiver name -> ArrivalStats when kernel timestamps are on (asyncio/pool keep user-space stamps)
+    arrivals = {} if KERNEL_TIMESTAMPS and RECEIVER_BACKEND in ("threads", "eventloop") else None
+    # Per-packet capture file for this test (threads backend)
+    capture = None
+    if CAPTURE_PATH and RECEIVER_BACKEND == "threads":
+        capture = CaptureWriter(f"{CAPTURE_PATH}-{num_threads}t-{time.strftime('%Y%m%d-%H%M%S')}.cap",
+                                CAPTURE_CAPACITY)
 
-    # Create threads
-    for i in range(num_threads):
-        thread = threading.Thread(
-            target=receiver_function,
-            args=(stop_event, statistics, lock),
-            name=f"T{i+1}"
-        )
-        threads.append(thread)
+    if RECEIVER_BACKEND == "pool":
+        pool = ReceiverPool(num_threads, processes, PORT, gap, PACKET_SIZE, DECODE_HEADERS).start()
+    elif RECEIVER_BACKEND == "asyncio":
+        threads.append(start_async_receivers(num_threads, stop_event, aggregator, lock, PORT,
+                                             gap, PACKET_SIZE, seq_stats, meters=meters, ready=ready,
+                                             drops=drops))
+    elif RECEIVER_BACKEND == "eventloop":
+        # num_threads logical receivers (sockets) served by a single selector thread
+        threads.append(start_event_loop(num_threads, stop_event, aggregator, lock, PORT,
+                                        gap, PACKET_SIZE, seq_stats, meters=meters, ready=ready,
+                                        drops=drops, arrivals=arrivals))
+    else:
+        # Create threads
+        for i in range(num_threads):
+            thread = threading.Thread(
+                target=receiver_function,
+                args=(stop_event, aggregator, lock, seq_stats, meters, ready, drops, arrivals, capture),
+                name=f"T{i+1}"
+            )
+            threads.append(thread)
 
-    # Start all threads
-    for thread in threads:
-        thread.start()
+        # Start all threads
+        for thread in threads:
+            thread.start()
 
-    # Let threads fully initialize and start receiving
-    time.sleep(1)
+    # The window opens the moment every socket is live - no fixed settling sleep
+    try:
+        if pool is not None:
+            pool.wait_ready(STARTUP_TIMEOUT)
+        else:
+            ready.wait(STARTUP_TIMEOUT)
+    except threading.BrokenBarrierError:
+        print(f"⚠️  Not all receivers were ready (one failed, or {STARTUP_TIMEOUT}s passed) - measuring anyway")
     
-    # CLEAR ANY STARTUP RESIDUE - reset statistics after initialization
-    with lock:
-        statistics.clear()  # Start measurement from clean slate
+    # CLEAR ANY STARTUP RESIDUE - start the window after initialization
+    if pool is not None:
+        pool.begin_measurement()  # each worker starts its own window
+    aggregator.start_window()  # Start measurement from clean slate; nothing is cleared under a lock
+    if drops is not None:
+        drops.mark()
+        drops.start()
     
     print(f"Measurement started for {num_threads} threads...")
     
     # ACTUAL MEASUREMENT PERIOD - exactly TEST_DURATION seconds
-    time.sleep(TEST_DURATION)
+    if METER_PRINT_INTERVAL > 0 and pool is None:
+        deadline = time.time() + TEST_DURATION
+        while time.time() < deadline:
+            time.sleep(min(METER_PRINT_INTERVAL, max(0.0, deadline - time.time())))
+            print(f"  live: {format_meter(meters.aggregate(time.time()))}")
+    else:
+        time.sleep(TEST_DURATION)
+    meter_summary = meters.aggregate(time.time())
+    drop_summary = None
+    if drops is not None:
+        drops.stop()
+        drop_summary = summarize_drops(drops.counts(), drops.rcvbufs())   # while sockets are open
     
-    # Stop threads
+    # Stop threads - woken at once, so join returns as soon as final bursts are recorded
     stop_event.set()
     for thread in threads:
-        thread.join(timeout=2.0)
+        thread.join(timeout=IDLE_TIMEOUT + 1.0)
+    if timer is not None:
+        timer.stop()   # closes the bursts still open
+    if pool is not None:
+        statistics, seq_summaries = pool.stop()
+        overwritten = pool.overwritten
+        for name, reason in pool.failures.items():
+            print(f"⚠️  {name} failed: {reason} - its receivers are missing from the result")
+    else:
+        statistics = aggregator.snapshot()
+        overwritten = aggregator.overwritten()
+        seq_summaries = {name: tracker.summary() for name, tracker in (seq_stats or {}).items()}
 
     # Calculate results from this clean measurement period
     total_throughput, total_packets = calculate_total_throughput(statistics)
     
     print(f"RESULT: {num_threads} threads -> {total_throughput:.2f} Mbps ({total_packets} packets)")
-    
-    # Clean shutdown - let everything close properly
-    time.sleep(1)
+    print_overwritten_result(overwritten)
+    print_sequence_result(seq_summaries)
+    if meter_summary["packets"]:
+        print(f"        meter {format_meter(meter_summary)}")
+    print_drop_result(drop_summary)
+    if arrivals:
+        print_arrival_result(merge_arrivals(arrivals.values()))
+    if capture is not None:
+        capture.close()
+        dropped = f", {capture.dropped} over capacity not written" if capture.dropped else ""
+        print(f"        capture {capture.path}: {capture.count} packets{dropped}")
     
     return total_throughput, total_packets
 
+def mean_ci(samples):
+    """(mean, half-width of the 95% confidence interval) of a list of trial results"""
+    n = len(samples)
+    mean = sum(samples) / n
+    if n < 2:
+        return mean, float('inf')
+    var = sum((x - mean) ** 2 for x in samples) / (n - 1)
+    t = T_95[n - 2] if n - 2 < len(T_95) else 1.96
+    return mean, t * (var / n) ** 0.5
+
+def measure_point(num_threads, processes=None):
+    """Repeat test_thread_count until the 95% CI is within CI_TARGET of the mean (or TRIALS_MAX)"""
+    samples = []
+    packets = 0
+    while True:
+        throughput, trial_packets = test_thread_count(num_threads, processes)
+        samples.append(throughput)
+        packets += trial_packets
+        mean, ci = mean_ci(samples)
+        if len(samples) >= TRIALS_MAX:
+            break
+        if len(samples) >= TRIALS_MIN and (mean <= 0 or ci <= CI_TARGET * mean):
+            break
+    print(f"POINT: {num_threads} threads -> {mean:.2f} ± {ci:.2f} Mbps over {len(samples)} trials")
+    return {"threads": num_threads, "mean": mean, "ci": ci, "trials": len(samples), "packets": packets}
+
+def degraded(point, best):
+    """Worse than the best by more than DEGRADATION_THRESHOLD, and not just by noise"""
+    return (point["mean"] < best["mean"] * (1 - DEGRADATION_THRESHOLD)
+            and point["mean"] + point["ci"] < best["mean"] - best["ci"])
+
+def pick_optimal(points):
+    """Largest thread count statistically level with the best: CIs overlap and mean within 2%"""
+    best = max(points, key=lambda p: p["mean"])
+    level = [p for p in points
+             if p["mean"] >= best["mean"] * 0.98 and p["mean"] + p["ci"] >= best["mean"] - best["ci"]]
+    return max(level, key=lambda p: p["threads"])
+
+def find_optimal_pool():
+    """Sweep processes x sockets per process for the "pool" backend; return the best (processes, sockets)"""
+    print("UDP Process Pool Optimization - Processes x Sockets per Process")
+    print("=" * 60)
+    print(f"Testing {TEST_DURATION}s periods, processes {POOL_PROCESS_COUNTS}, "
+          f"sockets per process {POOL_SOCKETS_PER_PROCESS}, {TRIALS_MIN}-{TRIALS_MAX} trials each")
+
+    test_results = []
+    best = None
+    for processes in POOL_PROCESS_COUNTS:
+        for per_process in POOL_SOCKETS_PER_PROCESS:
+            print(f"\n{'='*50}")
+            print(f"STAGE: Testing {processes} processes x {per_process} sockets")
+            print(f"{'='*50}")
+            point = measure_point(processes * per_process, processes)
+            test_results.append((processes, per_process, point))
+            if best is None or point["mean"] > best[2]["mean"]:
+                best = (processes, per_process, point)
+
+    # Final summary
+    print(f"\n{'='*60}")
+    print("FINAL RESULTS (mean ± 95% CI):")
+    print("{:<10} {:<10} {:<10} {:<15} {:<10} {:<8} {:<10}".format(
+        "Processes", "Per proc", "Sockets", "Throughput", "± CI", "Trials", "Status"))
+    print("-" * 78)
+    for processes, per_process, point in test_results:
+        status = "OPTIMAL" if (processes, per_process) == best[:2] else ""
+        print("{:<10} {:<10} {:<10} {:<15.2f} {:<10.2f} {:<8} {:<10}".format(
+            processes, per_process, processes * per_process, point["mean"], point["ci"],
+            point["trials"], status))
+
+    return best[:2]
+
 def find_optimal_threads():
-    """Find the optimal number of threads with fair measurements"""
+    """Find the optimal number of threads: coarse doubling, then golden-section refinement
+
+    Every point is measured with repeated trials (measure_point), so both the degradation
+    test and the final choice compare means with their confidence intervals.
+    """
+    if RECEIVER_BACKEND == "pool":
+        processes, per_process = find_optimal_pool()
+        return processes * per_process
+
     print("UDP Thread Optimization - Finding Optimal Thread Count")
     print("=" * 60)
-    print(f"Testing {TEST_DURATION}s periods with {THREAD_INCREMENT} thread increments")
-    print(f"Looking for >{DEGRADATION_THRESHOLD*100}% throughput degradation")
-    
-    baseline_throughput = None
-    current_threads = THREAD_INCREMENT
-    optimal_threads = THREAD_INCREMENT
-    test_results = []
-    
-    while True:  # Keep going until degradation is found
-        print(f"\n{'='*50}")
-        print(f"STAGE: Testing {current_threads} threads")
-        print(f"{'='*50}")
-        
-        # Run completely clean test
-        throughput, packets = test_thread_count(current_threads)
-        test_results.append((current_threads, throughput, packets))
-        
-        if baseline_throughput is None:
-            if throughput > 0:
-                baseline_throughput = throughput
-                optimal_threads = current_threads
-                print(f"✅ BASELINE: {baseline_throughput:.2f} Mbps with {current_threads} threads")
-            else:
-                print(f"⚠️  No throughput detected - check broadcaster")
-        else:
-            # Check for degradation
-            if baseline_throughput > 0:
-                degradation = (baseline_throughput - throughput) / baseline_throughput
-                change_pct = ((throughput - baseline_throughput) / baseline_throughput) * 100
-                
-                print(f"Change vs baseline: {change_pct:+.1f}%")
-                
-                if degradation > DEGRADATION_THRESHOLD:
-                    print(f"\n🚨 DEGRADATION DETECTED!")
-                    print(f"Throughput dropped {degradation*100:.1f}% with {current_threads} threads")
-                    print(f"OPTIMAL THREAD COUNT: {optimal_threads}")
-                    break
-                else:
-                    # Update optimal if performance is still good
-                    if throughput >= baseline_throughput * 0.98:  # Within 2%
-                        optimal_threads = current_threads
-                        if throughput > baseline_throughput:
-                            baseline_throughput = throughput
-                            print(f"🚀 New best: {baseline_throughput:.2f} Mbps")
-        
-        # Move to next thread count
-        current_threads += THREAD_INCREMENT
-        print(f"➡️  Next test: {current_threads} threads")
-        
-        # Safety check to prevent infinite loop
-        if current_threads > 200:
-            print("Reached safety limit of 200 threads")
+    print(f"Testing {TEST_DURATION}s periods, {TRIALS_MIN}-{TRIALS_MAX} trials per point "
+          f"(stop when 95% CI <= {CI_TARGET*100:.0f}% of mean)")
+    print(f"Coarse doubling from {THREAD_INCREMENT} up to {MAX_THREADS} threads, "
+          f"stopping at >{DEGRADATION_THRESHOLD*100}% degradation; refined to {THREAD_INCREMENT} threads")
+
+    points = {}
+    def point(n):
+        if n not in points:
+            print(f"\n{'='*50}")
+            print(f"STAGE: Testing {n} threads")
+            print(f"{'='*50}")
+            points[n] = measure_point(n)
+        return points[n]
+
+    def snap(n):
+        """Nearest multiple of THREAD_INCREMENT inside [THREAD_INCREMENT, MAX_THREADS]"""
+        return min(MAX_THREADS, max(THREAD_INCREMENT, int(round(n / THREAD_INCREMENT)) * THREAD_INCREMENT))
+
+    # Coarse phase: double until throughput clearly degrades (or the limit is reached)
+    coarse = []
+    n = THREAD_INCREMENT
+    best = None
+    while True:
+        p = point(n)
+        coarse.append(n)
+        if best is None or p["mean"] > points[best]["mean"]:
+            best = n
+        elif degraded(p, points[best]):
+            print(f"\n🚨 DEGRADATION DETECTED at {n} threads: "
+                  f"{p['mean']:.2f} ± {p['ci']:.2f} vs best {points[best]['mean']:.2f} Mbps")
             break
-        
-        # Clean pause between tests
-        time.sleep(2)
-    
+        if n >= MAX_THREADS:
+            print(f"Reached safety limit of {MAX_THREADS} threads")
+            break
+        n = min(n * 2, MAX_THREADS)
+    if points[best]["mean"] <= 0:
+        print(f"⚠️  No throughput detected - check broadcaster")
+
+    # Refinement: golden-section search for the peak between the best's coarse neighbours
+    i = coarse.index(best)
+    lo = coarse[i - 1] if i > 0 else coarse[0]
+    hi = coarse[i + 1] if i + 1 < len(coarse) else coarse[i]
+    while hi - lo > 2 * THREAD_INCREMENT:
+        c = snap(hi - (hi - lo) / GOLDEN)
+        d = snap(lo + (hi - lo) / GOLDEN)
+        if c >= d:
+            break
+        if point(c)["mean"] >= point(d)["mean"]:
+            hi = d
+        else:
+            lo = c
+        print(f"➡️  Peak bracketed in [{lo}, {hi}] threads")
+
+    measured = sorted(points.values(), key=lambda p: p["threads"])
+    optimal = pick_optimal(measured)
+    print(f"OPTIMAL THREAD COUNT: {optimal['threads']}")
+
     # Final summary
     print(f"\n{'='*60}")
-    print("FINAL RESULTS:")
-    print("{:<10} {:<15} {:<10} {:<10}".format("Threads", "Throughput", "Packets", "Status"))
-    print("-" * 50)
+    print("FINAL RESULTS (mean ± 95% CI):")
+    print("{:<10} {:<15} {:<10} {:<8} {:<10} {:<10}".format("Threads", "Throughput", "± CI", "Trials", "Packets", "Status"))
+    print("-" * 66)
     
-    for threads, mbps, packets in test_results:
-        status = "OPTIMAL" if threads == optimal_threads else ""
-        print("{:<10} {:<15.2f} {:<10} {:<10}".format(threads, mbps, packets, status))
+    for p in measured:
+        status = "OPTIMAL" if p is optimal else ""
+        print("{:<10} {:<15.2f} {:<10.2f} {:<8} {:<10} {:<10}".format(
+            p["threads"], p["mean"], p["ci"], p["trials"], p["packets"], status))
     
-    return optimal_threads
+    return optimal["threads"]
 
 def main():
     try:
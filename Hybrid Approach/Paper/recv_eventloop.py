@@ -0,0 +1,277 @@
+# recv_eventloop.py
+# One thread multiplexing N sockets with selectors (epoll on Linux, kqueue on macOS).
+# Each socket is one logical receiver - the equivalent of a receiver_function thread in
+# recv.py - and reports the same per-"thread" burst tuples, but without an OS thread per
+# socket, so hundreds or thousands of receivers fit on one host.
+import selectors
+import socket
+import threading
+import time
+from array import array
+
+from packet_header import SequenceTracker
+from rxstamps import ArrivalStats, enable_kernel_timestamps, stamp_from_ancdata, wall_ns
+from sockdrops import RCVBUF
+
+DRAIN_LIMIT = 64           # datagrams taken from one socket before moving to the next (fairness)
+SWEEP_INTERVAL = 0.05      # seconds between idle sweeps that close finished bursts
+ANCBUF_SIZE = 64           # recvmsg ancillary buffer (one SO_TIMESTAMPNS cmsg)
+
+
+def raise_fd_limit(needed):
+    """Best effort: lift the soft open-files limit so `needed` sockets can be opened"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+def open_receiver_socket(port, reuseport=False):
+    """Same socket setup as receiver_function in recv.py, but non-blocking
+
+    reuseport adds SO_REUSEPORT (where the platform has it) so sockets in several
+    processes can share the port; every socket on the port must then set it.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuseport and hasattr(socket, "SO_REUSEPORT"):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 0)
+    except Exception:
+        pass
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF)
+    sock.bind(("", port))
+    sock.setblocking(False)
+    return sock
+
+
+class WakeableEvent(threading.Event):
+    """threading.Event whose set() also makes fileno() readable
+
+    Receivers that wait in select/poll/selectors include it in the wait, so stop is seen at
+    once instead of after the next socket timeout or sweep. The byte is never read, so the
+    descriptor stays readable for every waiter until clear().
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._r, self._w = socket.socketpair()
+        self._r.setblocking(False)
+
+    def fileno(self):
+        return self._r.fileno()
+
+    def set(self):
+        super().set()
+        try:
+            self._w.send(b"\0")
+        except OSError:
+            pass
+
+    def clear(self):
+        super().clear()
+        try:
+            while self._r.recv(64):
+                pass
+        except OSError:
+            pass
+
+
+def signal_ready(ready):
+    """Wait at the startup barrier (if any); a broken barrier just means the caller gave up waiting"""
+    if ready is not None:
+        try:
+            ready.wait()
+        except threading.BrokenBarrierError:
+            pass
+
+
+class BurstTable:
+    """Per-socket burst state as parallel arrays (one slot per logical receiver)
+
+    A batch arriving `gap` or more after the socket's previous one starts a new burst, so
+    segmentation does not depend on how often the idle sweep runs.
+    """
+
+    def __init__(self, names, gap):
+        n = len(names)
+        self.names = names
+        self.gap = gap
+        self.count = array('Q', bytes(8 * n))
+        self.nbytes = array('Q', bytes(8 * n))
+        self.start = array('d', bytes(8 * n))
+        self.last = array('d', bytes(8 * n))
+
+    def add(self, i, packets, nbytes, now, first=None):
+        """Count a batch; returns the burst it ended (a statistics tuple) or None
+
+        first is the arrival of the batch's first datagram when known (kernel timestamps).
+        """
+        ended = None
+        if first is None:
+            first = now
+        if self.count[i] and first - self.last[i] >= self.gap:
+            ended = self.close(i)
+        if self.count[i] == 0:
+            self.start[i] = first
+        self.last[i] = now
+        self.count[i] += packets
+        self.nbytes[i] += nbytes
+        return ended
+
+    def close(self, i, min_elapsed=0):
+        """End receiver i's burst; return the recv.py statistics tuple (MiB from real bytes)
+
+        min_elapsed substitutes for a zero-length burst, as in ThreadStats.end_burst.
+        """
+        count, start, last = self.count[i], self.start[i], self.last[i]
+        elapsed = last - start
+        if elapsed <= 0:
+            elapsed = min_elapsed
+        mb_recv = self.nbytes[i] / (1024 * 1024)
+        mbps = mb_recv * 8 / elapsed if elapsed > 0 else 0
+        self.count[i] = 0
+        self.nbytes[i] = 0
+        return (self.names[i], start, last, count, mb_recv, mbps)
+
+
+def event_loop_receiver(num_receivers, stop_event, aggregator, lock, port, idle_timeout,
+                        packet_size, seq_stats=None, name_prefix="T", reuseport=False, meters=None,
+                        ready=None, drops=None, arrivals=None):
+    """Run num_receivers logical receivers on the calling thread until stop_event is set
+
+    Finished bursts go to each logical receiver's own ThreadStats from aggregator (no
+    lock), so one busy receiver cannot rotate another's bursts out of a shared ring;
+    lock only guards the seq_stats registration. packet_size is the receive buffer size;
+    meters, a ratemeter.MeterGroup, gets one streaming meter per logical receiver.
+    ready, a threading.Barrier, is waited on once every socket is bound. A WakeableEvent
+    as stop_event ends the loop immediately rather than at the next sweep. drops, a
+    sockdrops.DropMonitor, watches every socket under its receiver name. With arrivals (a
+    dict, filled with name -> rxstamps.ArrivalStats under lock) sockets are read with
+    recvmsg_into and SO_TIMESTAMPNS, and bursts and latency use the kernel stamps.
+    seq_stats (a dict) turns on sender.py --header decoding: name -> SequenceTracker.
+    """
+    raise_fd_limit(num_receivers + 64)
+    names = [f"{name_prefix}{i+1}" for i in range(num_receivers)]
+    stats = [aggregator.register(name) for name in names]
+    table = BurstTable(names, idle_timeout)
+    trackers = None
+    meter_adds = [meters.meter(name).add for name in names] if meters is not None else None
+    if seq_stats is not None:
+        trackers = [SequenceTracker() for _ in names]
+        with lock:
+            seq_stats.update(zip(names, trackers))
+    stamping = arrivals is not None
+    if stamping:
+        arrival_stats = [ArrivalStats() for _ in names]
+        with lock:
+            arrivals.update(zip(names, arrival_stats))
+
+    sel = selectors.DefaultSelector()
+    socks = []
+    for i in range(num_receivers):
+        sock = open_receiver_socket(port, reuseport)
+        socks.append(sock)
+        sel.register(sock, selectors.EVENT_READ, i)
+        if stamping:
+            enable_kernel_timestamps(sock)
+        if drops is not None:
+            drops.watch(names[i], sock)
+    if hasattr(stop_event, "fileno"):
+        sel.register(stop_event, selectors.EVENT_READ, None)
+    signal_ready(ready)
+
+    buf = bytearray(packet_size)
+    view = memoryview(buf)
+    count, last = table.count, table.last
+    # Sweep at least as often as the gap so short gaps (ms) are closed promptly
+    sweep = min(SWEEP_INTERVAL, idle_timeout)
+    next_sweep = time.time() + sweep
+
+    while not stop_event.is_set():
+        events = sel.select(timeout=sweep)
+        now_ns = time.time_ns()
+        now = now_ns / 1e9
+        for key, _ in events:
+            i = key.data
+            if i is None:
+                continue     # stop_event woke us; the while condition ends the loop
+            observe = trackers[i].observe if trackers is not None else None
+            got = 0
+            nbytes = 0
+            first = None
+            arrived = now
+            if stamping:
+                recvmsg_into = key.fileobj.recvmsg_into
+                add_arrival = arrival_stats[i].add
+                try:
+                    while got < DRAIN_LIMIT:
+                        n, ancdata, _, _ = recvmsg_into([buf], ANCBUF_SIZE)
+                        user_ns = time.time_ns()
+                        kernel_ns = stamp_from_ancdata(ancdata)
+                        arrival_ns = kernel_ns or wall_ns()
+                        add_arrival(arrival_ns, user_ns, kernel_ns)
+                        if observe is not None:
+                            observe(view[:n], arrival_ns)
+                        if first is None:
+                            first = arrival_ns / 1e9
+                        got += 1
+                        nbytes += n
+                except BlockingIOError:
+                    pass
+                if got:
+                    arrived = arrival_ns / 1e9
+            else:
+                recv_into = key.fileobj.recv_into
+                try:
+                    while got < DRAIN_LIMIT:
+                        n = recv_into(buf)
+                        if observe is not None:
+                            observe(view[:n], now_ns)
+                        got += 1
+                        nbytes += n
+                except BlockingIOError:
+                    pass
+            if got:
+                ended = table.add(i, got, nbytes, arrived, first)
+                if ended is not None:
+                    stats[i].append(ended)
+                if meter_adds is not None:
+                    meter_adds[i](nbytes, now, got)
+
+        if now >= next_sweep:
+            next_sweep = now + sweep
+            ended = [i for i in range(num_receivers) if count[i] and now - last[i] >= idle_timeout]
+            for i in ended:
+                stats[i].append(table.close(i))
+                if stamping:
+                    arrival_stats[i].reset_gap()
+
+    # Handle final bursts, as receiver_function does (1 s for a zero-length one)
+    for i in range(num_receivers):
+        if count[i]:
+            stats[i].append(table.close(i, min_elapsed=1))
+    sel.close()
+    for sock in socks:
+        sock.close()
+
+
+def start_event_loop(num_receivers, stop_event, aggregator, lock, port, idle_timeout,
+                     packet_size, seq_stats=None, name_prefix="T", reuseport=False, meters=None,
+                     ready=None, drops=None, arrivals=None):
+    """Start event_loop_receiver on its own thread and return the thread"""
+    thread = threading.Thread(
+        target=event_loop_receiver,
+        args=(num_receivers, stop_event, aggregator, lock, port, idle_timeout, packet_size,
+              seq_stats, name_prefix, reuseport, meters, ready, drops, arrivals),
+        name="EventLoop",
+        daemon=True,
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,181 @@
+# recv_pool.py
+# Spread the logical receivers over worker processes so per-packet work is no longer
+# limited to the one core the GIL allows. Each worker runs recv_eventloop over its share
+# of the sockets (bound with SO_REUSEADDR + SO_REUSEPORT) and ships its burst tuples and
+# sequence summaries back to the parent when stopped.
+#
+# Broadcast only: every socket gets its own copy of a broadcast datagram, as with the
+# other backends, but a unicast datagram (including loopback tests to 127.0.0.1) goes to
+# just one of the SO_REUSEPORT sockets on the port, so the receivers split the traffic
+# instead of each seeing all of it. Send to a broadcast address (127.255.255.255 on
+# loopback) when comparing the pool with the other backends.
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+
+from burst_stats import StatsAggregator
+from recv_eventloop import WakeableEvent, event_loop_receiver
+
+BIND_TIMEOUT = 30.0          # seconds for a worker's event loop to bind its sockets
+RESULT_TIMEOUT = 5.0         # seconds after stop() (plus the idle timeout) for a worker to report
+POLL_INTERVAL = 0.5          # seconds between worker liveness checks while collecting results
+
+
+def default_processes():
+    return os.cpu_count() or 1
+
+
+def split_receivers(num_receivers, processes):
+    """Sockets per worker, as even as possible; workers that would get none are dropped"""
+    base, extra = divmod(num_receivers, processes)
+    return [base + (1 if w < extra else 0) for w in range(processes) if base or w < extra]
+
+
+def await_command(control):
+    """The parent's next command on a worker's control pipe (a closed pipe counts as "stop")"""
+    try:
+        return control.recv()
+    except EOFError:
+        return "stop"
+
+
+def pool_worker(worker_id, num_sockets, port, idle_timeout, packet_size, decode_headers, ready, control,
+                results):
+    """One worker process: an event loop over num_sockets receivers named P<w>.T<i>
+
+    Waits at the shared `ready` barrier once all of its sockets are bound, then for
+    "measure" and "stop" on its own control pipe (a shared mp.Event would hang the
+    parent's set() if a worker died waiting on it). Puts (worker id, burst tuples,
+    bursts overwritten before the snapshot, sequence summaries, error or None) on
+    results. If the event loop fails before binding, `ready` is aborted so the parent
+    does not wait it out.
+    """
+    aggregator = StatsAggregator()
+    lock = threading.Lock()
+    seq_stats = {} if decode_headers else None
+    loop_stop = WakeableEvent()
+    bound = threading.Barrier(2)
+
+    def run_loop():
+        try:
+            event_loop_receiver(num_sockets, loop_stop, aggregator, lock, port, idle_timeout, packet_size,
+                                seq_stats, name_prefix=f"P{worker_id+1}.T", reuseport=True, ready=bound)
+        except BaseException:
+            bound.abort()    # still waiting for the bind below
+            raise
+
+    thread = threading.Thread(target=run_loop, name="EventLoop")
+    thread.start()
+    try:
+        bound.wait(BIND_TIMEOUT)
+    except threading.BrokenBarrierError:
+        ready.abort()
+        loop_stop.set()
+        results.put((worker_id, [], 0, {}, "event loop failed or timed out before binding its sockets"))
+        return
+    try:
+        ready.wait()
+    except threading.BrokenBarrierError:
+        pass
+
+    # Same startup-residue handling as test_thread_count: drop what arrived before the window
+    if await_command(control) == "measure":
+        aggregator.start_window()
+        await_command(control)
+    loop_stop.set()
+    thread.join()
+    summaries = {name: tracker.summary() for name, tracker in (seq_stats or {}).items()}
+    results.put((worker_id, aggregator.snapshot(), aggregator.overwritten(), summaries, None))
+
+
+class ReceiverPool:
+    """Parent-side handle: start(), wait_ready(), begin_measurement(), then stop() -> merged results
+
+    Workers that fail or never report are listed in `failures` (worker name -> reason)
+    after stop(); their receivers are missing from the results. `overwritten` totals the
+    bursts the workers' rings dropped before they were read.
+    """
+
+    def __init__(self, num_receivers, processes, port, idle_timeout, packet_size, decode_headers=False):
+        self.shares = split_receivers(num_receivers, processes)
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.packet_size = packet_size
+        self.decode_headers = decode_headers
+        self.ready = mp.Barrier(len(self.shares) + 1)
+        self.results = mp.Queue()
+        self.procs = []
+        self.controls = []
+        self.measuring = False
+        self.failures = {}
+        self.overwritten = 0
+
+    def start(self):
+        for w, num_sockets in enumerate(self.shares):
+            child_control, control = mp.Pipe(duplex=False)   # the worker reads, the parent writes
+            proc = mp.Process(
+                target=pool_worker,
+                args=(w, num_sockets, self.port, self.idle_timeout, self.packet_size, self.decode_headers,
+                      self.ready, child_control, self.results),
+                name=f"Receiver-P{w+1}",
+                daemon=True,
+            )
+            self.procs.append(proc)
+            self.controls.append(control)
+            proc.start()
+            child_control.close()
+        return self
+
+    def command(self, message):
+        """Send message to every worker; a worker that has died is skipped"""
+        for control in self.controls:
+            try:
+                control.send(message)
+            except OSError:
+                pass
+
+    def wait_ready(self, timeout=None):
+        """Block until every worker has bound its sockets; BrokenBarrierError on timeout"""
+        self.ready.wait(timeout)
+
+    def begin_measurement(self):
+        if not self.measuring:
+            self.measuring = True
+            self.command("measure")
+
+    def stop(self):
+        """Stop every worker; return (burst tuples, {receiver name: sequence summary or None})"""
+        self.begin_measurement()
+        self.command("stop")
+        statistics = []
+        summaries = {}
+        reported = set()
+        deadline = time.monotonic() + self.idle_timeout + RESULT_TIMEOUT
+        # Drain before join so a full result pipe can't block a worker's exit
+        while len(reported) < len(self.procs):
+            try:
+                worker_id, stats, overwritten, seq, error = self.results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                timed_out = time.monotonic() > deadline
+                for w, proc in enumerate(self.procs):
+                    # exitcode 0 means its result is still in flight: wait for it
+                    if w not in reported and ((not proc.is_alive() and proc.exitcode != 0) or timed_out):
+                        reported.add(w)
+                        self.failures[proc.name] = (f"exited with code {proc.exitcode}" if not proc.is_alive()
+                                                    else "no result before the timeout")
+                continue
+            reported.add(worker_id)
+            if error is not None:
+                self.failures[self.procs[worker_id].name] = error
+            statistics.extend(stats)
+            self.overwritten += overwritten
+            summaries.update(seq)
+        for proc in self.procs:
+            proc.join(timeout=POLL_INTERVAL)
+            if proc.is_alive():
+                proc.terminate()
+        for control in self.controls:
+            control.close()
+        return statistics, summaries
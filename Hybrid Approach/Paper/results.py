@@ -0,0 +1,79 @@
+# results.py
+# The RESULT line and the indented detail lines under it, shared by recv.py and
+# udp_async.py: burst throughput totals, bursts lost to ring retention, sequence (loss/latency) aggregates, kernel
+# drops and arrival-time percentiles.
+from rxstamps import format_histogram, histogram_percentile
+
+
+def calculate_total_throughput(statistics):
+    """Calculate total throughput from all bursts in the statistics"""
+    total_mbps = 0
+    total_packets = 0
+    for stat in statistics:
+        _, _, _, packets, _, mbps = stat
+        total_mbps += mbps
+        total_packets += packets
+    return total_mbps, total_packets
+
+
+def print_overwritten_result(overwritten):
+    """The indented warning under a RESULT line when bursts rotated out of a receiver's ring"""
+    if overwritten:
+        print(f"        ⚠️  {overwritten} bursts were overwritten (THREAD_RETENTION) before they were "
+              f"read - the RESULT under-reports")
+
+
+def summarize_sequences(seq_summaries):
+    """Aggregate loss/reorder/latency over all threads, or None if the sender sent no headers
+
+    seq_summaries maps receiver name -> SequenceTracker.summary() (None if no headers seen).
+    """
+    summaries = [s for s in seq_summaries.values() if s is not None]
+    if not summaries:
+        return None
+    received = sum(s["received"] for s in summaries)
+    return {
+        "threads": len(summaries),
+        "mean_loss_pct": sum(s["loss_pct"] for s in summaries) / len(summaries),
+        "max_loss_pct": max(s["loss_pct"] for s in summaries),
+        "duplicates": sum(s["duplicates"] for s in summaries),
+        "reorder_depth": max(s["reorder_depth"] for s in summaries),
+        "lat_avg_ms": sum(s["lat_avg_ms"] * s["received"] for s in summaries) / received,
+        "lat_max_ms": max(s["lat_max_ms"] for s in summaries),
+        "jitter_ms": max(s["jitter_ms"] for s in summaries),
+    }
+
+
+def print_sequence_result(seq_summaries):
+    """The indented loss/latency line under a RESULT line (nothing if no headers were seen)"""
+    seq = summarize_sequences(seq_summaries)
+    if seq:
+        print(f"        loss {seq['mean_loss_pct']:.2f}% avg / {seq['max_loss_pct']:.2f}% worst thread, "
+              f"dups {seq['duplicates']}, reorder depth {seq['reorder_depth']}, "
+              f"latency {seq['lat_avg_ms']:.3f} ms avg / {seq['lat_max_ms']:.3f} ms max, "
+              f"jitter {seq['jitter_ms']:.3f} ms")
+
+
+def print_drop_result(drop_summary):
+    """The indented kernel-drop line under a RESULT line (nothing where the platform has no counter)"""
+    if drop_summary:
+        total, worst, worst_drops, low, high = drop_summary
+        print(f"        kernel drops {total} (worst {worst}: {worst_drops}), "
+              f"SO_RCVBUF {low // 1024}-{high // 1024} KiB")
+
+
+def print_arrival_result(merged):
+    """Kernel->user delay and inter-arrival percentiles, then both histograms (log2 buckets)"""
+    stamped = merged.kernel + merged.fallback
+    if not stamped:
+        return
+    print(f"        timestamps {100.0 * merged.kernel / stamped:.1f}% kernel (SO_TIMESTAMPNS), "
+          f"kernel->user delay p50/p99 < {histogram_percentile(merged.delay, 50) / 1e3:.0f}/"
+          f"{histogram_percentile(merged.delay, 99) / 1e3:.0f} us, inter-arrival p50/p99 < "
+          f"{histogram_percentile(merged.gaps, 50) / 1e3:.0f}/{histogram_percentile(merged.gaps, 99) / 1e3:.0f} us")
+    for title, hist in (("kernel->user delay", merged.delay), ("inter-arrival", merged.gaps)):
+        lines = format_histogram(hist)
+        if lines:
+            print(f"        {title}:")
+            for line in lines:
+                print(f"        {line}")
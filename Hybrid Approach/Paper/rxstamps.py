@@ -0,0 +1,120 @@
+# rxstamps.py
+# Receive timestamps taken by the kernel (SO_TIMESTAMPNS) instead of time.time() after
+# recvfrom returns, which with many threads contending for the GIL mostly measures Python
+# scheduling delay. Where the kernel gives no stamp, arrivals are stamped with
+# perf_counter_ns anchored to the wall clock once, so durations and inter-arrival gaps are
+# monotonic while start/end times still line up with time.time() and the sender's header.
+#
+# ArrivalStats keeps two log2 histograms per receiver: kernel -> user delay (how long a
+# datagram sat queued before Python read it) and inter-arrival gaps (kernel stamps).
+import socket
+import time
+from array import array
+
+from udp_batch import SO_TIMESTAMPNS, TIMESPEC
+
+BUCKETS = 48                         # log2 ns buckets: up to ~2.8 days, far beyond any gap
+
+_ANCHOR_WALL = time.time_ns()
+_ANCHOR_PERF = time.perf_counter_ns()
+
+
+def wall_ns():
+    """Monotonic nanoseconds on the time.time_ns() timeline (perf_counter_ns + fixed offset)"""
+    return _ANCHOR_WALL + (time.perf_counter_ns() - _ANCHOR_PERF)
+
+
+def enable_kernel_timestamps(sock):
+    """Ask for SO_TIMESTAMPNS on sock; False where the platform has no such option"""
+    if SO_TIMESTAMPNS is None:
+        return False
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+    except OSError:
+        return False
+    return True
+
+
+def stamp_from_ancdata(ancdata):
+    """Kernel receive time in ns from socket.recvmsg ancillary data, or 0 if absent"""
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS and len(data) >= TIMESPEC.size:
+            sec, nsec = TIMESPEC.unpack_from(data)
+            return sec * 1_000_000_000 + nsec
+    return 0
+
+
+class ArrivalStats:
+    """Per-receiver delay and inter-arrival histograms; only the owning thread calls add()"""
+
+    def __init__(self):
+        self.delay = array('Q', bytes(8 * BUCKETS))       # kernel -> user, ns, log2 buckets
+        self.gaps = array('Q', bytes(8 * BUCKETS))        # between consecutive arrivals, ns
+        self.last = 0
+        self.kernel = 0       # datagrams with a kernel stamp
+        self.fallback = 0     # datagrams stamped in user space
+
+    def add(self, arrival_ns, user_ns, kernel):
+        """One datagram: arrival time (kernel stamp or wall_ns()) and the time Python saw it"""
+        if kernel:
+            self.kernel += 1
+            self.delay[min(BUCKETS - 1, max(0, user_ns - arrival_ns).bit_length())] += 1
+        else:
+            self.fallback += 1
+        if self.last:
+            self.gaps[min(BUCKETS - 1, max(0, arrival_ns - self.last).bit_length())] += 1
+        self.last = arrival_ns
+
+    def reset_gap(self):
+        """Do not count the silence between bursts as an inter-arrival gap"""
+        self.last = 0
+
+
+def merge_arrivals(stats):
+    """ArrivalStats summed over receivers (histograms and counters)"""
+    merged = ArrivalStats()
+    for s in stats:
+        for i in range(BUCKETS):
+            merged.delay[i] += s.delay[i]
+            merged.gaps[i] += s.gaps[i]
+        merged.kernel += s.kernel
+        merged.fallback += s.fallback
+    return merged
+
+
+def histogram_percentile(hist, p):
+    """Upper bound (ns) of the log2 bucket holding the p-th percentile; 0 for an empty histogram"""
+    total = sum(hist)
+    if not total:
+        return 0
+    rank = -(-p * total // 100)
+    seen = 0
+    for i, count in enumerate(hist):
+        seen += count
+        if seen >= rank:
+            return (1 << i) - 1 if i else 0
+    return (1 << (len(hist) - 1)) - 1
+
+
+def _format_ns(ns):
+    if ns < 1_000:
+        return f"{ns} ns"
+    if ns < 1_000_000:
+        return f"{ns / 1_000:.0f} us"
+    if ns < 1_000_000_000:
+        return f"{ns / 1_000_000:.1f} ms"
+    return f"{ns / 1_000_000_000:.1f} s"
+
+
+def format_histogram(hist, width=40):
+    """Lines '  < 16 us  12.3% ######' for the non-empty log2 buckets"""
+    total = sum(hist)
+    if not total:
+        return []
+    lines = []
+    peak = max(hist)
+    for i, count in enumerate(hist):
+        if count:
+            bar = "#" * max(1, round(width * count / peak))
+            lines.append(f"  < {_format_ns(1 << i):>7} {100.0 * count / total:5.1f}% {bar}")
+    return lines
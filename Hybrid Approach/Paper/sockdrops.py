@@ -0,0 +1,165 @@
+# sockdrops.py
+# Kernel-side drop accounting for receive sockets, and optional SO_RCVBUF growth.
+# When throughput falls with more threads, this separates "the socket buffer overflowed"
+# (the kernel counted a drop) from "Python was too slow" or loss on the air (no drop here,
+# but the sequence header shows a gap). Drops come from SO_RXQ_OVFL ancillary data where
+# the receive path delivers it (udp_batch.BatchReceiver with drops=True) and otherwise
+# from the `drops` column of /proc/net/udp, matched on the socket's inode. Both are the
+# kernel's cumulative per-socket counter; elsewhere (macOS, Windows) drops read as None.
+# SO_RXQ_OVFL is stamped when a datagram is queued, so it trails /proc by the drops that
+# happened after the last datagram read - it costs no file read per check, though.
+import os
+import socket
+import threading
+
+RCVBUF = 256 * 1024              # initial receive buffer (the value recv.py always used)
+TUNE_INTERVAL = 0.5              # seconds between auto-tune checks
+PROC_UDP = ("/proc/net/udp", "/proc/net/udp6")
+RMEM_MAX = "/proc/sys/net/core/rmem_max"
+
+
+def rmem_max():
+    """Largest SO_RCVBUF an unprivileged setsockopt may request, or None if unknown"""
+    try:
+        with open(RMEM_MAX) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def proc_udp_drops():
+    """{socket inode: cumulative drops} for every UDP socket on the host ({} off Linux)"""
+    drops = {}
+    for path in PROC_UDP:
+        try:
+            with open(path) as f:
+                lines = f.readlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            fields = line.split()
+            if len(fields) >= 13:
+                drops[int(fields[9])] = int(fields[12])
+    return drops
+
+
+def get_rcvbuf(sock):
+    """Effective receive buffer (Linux reports twice the requested size, for bookkeeping)"""
+    return sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+
+
+class DropMonitor:
+    """Per-socket kernel drop counters for a set of receivers; safe to read from any thread
+
+    Receivers call watch() once their socket is bound. mark() starts a measurement window;
+    counts() reports drops since then. With autotune, start() runs a daemon thread that
+    doubles SO_RCVBUF (up to rmem_max) of every socket whose drop count grew since its
+    last check; a watch() after start() is picked up on the next check.
+    """
+
+    def __init__(self, autotune=False, limit=None):
+        self.autotune = autotune
+        self.limit = limit or rmem_max()
+        self._sockets = {}          # name -> [sock, inode, ovfl getter, requested rcvbuf, mark, last seen]
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def watch(self, name, sock, ovfl=None, rcvbuf=RCVBUF):
+        """Track sock under name; ovfl() returns the SO_RXQ_OVFL count or None if it has none"""
+        try:
+            inode = os.fstat(sock.fileno()).st_ino
+        except OSError:
+            inode = None
+        with self._lock:
+            self._sockets[name] = [sock, inode, ovfl, rcvbuf, 0, 0]
+
+    def _members(self):
+        with self._lock:
+            return list(self._sockets.items())
+
+    def _read(self, members):
+        """{name: cumulative drops or None}; /proc is read once, only if some socket needs it"""
+        table = None
+        values = {}
+        for name, (sock, inode, ovfl, _, _, _) in members:
+            value = ovfl() if ovfl is not None else None
+            if value is None and inode is not None:
+                if table is None:
+                    table = proc_udp_drops()
+                value = table.get(inode)
+            values[name] = value
+        return values
+
+    def mark(self):
+        """Start counting from now"""
+        members = self._members()
+        for name, value in self._read(members).items():
+            entry = self._sockets[name]
+            entry[4] = entry[5] = value or 0
+
+    def counts(self):
+        """{name: drops since mark(), or None where the platform has no counter}"""
+        members = self._members()
+        return {name: (value - self._sockets[name][4] if value is not None else None)
+                for name, value in self._read(members).items()}
+
+    def rcvbufs(self):
+        """{name: effective SO_RCVBUF bytes} (sockets already closed are skipped)"""
+        sizes = {}
+        for name, (sock, *_) in self._members():
+            try:
+                sizes[name] = get_rcvbuf(sock)
+            except OSError:
+                pass
+        return sizes
+
+    def tune(self):
+        """Double the receive buffer of each socket that dropped since the last call; returns names grown"""
+        grown = []
+        members = self._members()
+        for name, value in self._read(members).items():
+            entry = self._sockets[name]
+            if value is None or value <= entry[5]:
+                continue
+            entry[5] = value
+            requested = entry[3] * 2
+            if self.limit is not None:
+                requested = min(requested, self.limit)
+            if requested <= entry[3]:
+                continue        # already at rmem_max
+            try:
+                entry[0].setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, requested)
+            except OSError:
+                continue        # socket closed meanwhile
+            entry[3] = requested
+            grown.append(name)
+        return grown
+
+    def start(self, interval=TUNE_INTERVAL):
+        """Run tune() every `interval` seconds on a daemon thread until stop() (autotune only)"""
+        if not self.autotune:
+            return self
+        def run():
+            while not self._stop.wait(interval):
+                self.tune()
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="RcvbufTune", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def summarize_drops(counts, rcvbufs):
+    """(total drops, worst name, its drops, min rcvbuf, max rcvbuf) or None without counters"""
+    known = {name: n for name, n in counts.items() if n is not None}
+    if not known:
+        return None
+    worst = max(known, key=known.get)
+    sizes = list(rcvbufs.values()) or [0]
+    return sum(known.values()), worst, known[worst], min(sizes), max(sizes)
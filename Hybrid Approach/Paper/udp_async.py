@@ -0,0 +1,311 @@
+# udp_async.py
+# asyncio versions of both roles: receivers are DatagramProtocol instances on one event
+# loop (burst bookkeeping in datagram_received, idle detection on loop timers instead of a
+# blocking settimeout per thread), and the sender is a paced datagram endpoint.
+# Runs on uvloop when it is installed, otherwise on the default asyncio loop.
+#
+#   python udp_async.py recv --receivers 50 --duration 10
+#   python udp_async.py send --dest 255.255.255.255 --rate-mbps 100 --duration 10
+#
+# recv.py can also drive it: RECEIVER_BACKEND = "asyncio".
+import argparse
+import asyncio
+import socket
+import threading
+import time
+
+from burst_stats import StatsAggregator
+from packet_header import HEADER_SIZE, SequenceTracker, new_run_id, pack_header
+from recv_eventloop import open_receiver_socket, raise_fd_limit, signal_ready
+from results import calculate_total_throughput, print_overwritten_result, print_sequence_result
+
+# Configuration (defaults match recv.py)
+PORT = 5005
+PACKET_SIZE = 65535
+IDLE_TIMEOUT = 1.0
+SEND_SIZE = 1024
+STOP_POLL = 0.05           # seconds between checks of a plain threading.Event stop_event
+
+
+def install_loop_policy():
+    """Use uvloop if installed; return the name of the loop in use
+
+    Sets the process-wide event loop policy, so only this script's main() calls it.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return "asyncio"
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return "uvloop"
+
+
+def new_event_loop():
+    """A uvloop loop if installed, else asyncio's, without touching the global policy"""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.new_event_loop()
+    return uvloop.new_event_loop()
+
+
+def run_on_new_loop(coro):
+    """asyncio.run(coro) on a loop from new_event_loop()"""
+    loop = new_event_loop()
+    try:
+        loop.run_until_complete(coro)
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    finally:
+        loop.close()
+
+
+class BurstProtocol(asyncio.DatagramProtocol):
+    """One logical receiver: the asyncio counterpart of recv.receiver_function"""
+
+    def __init__(self, name, stats, idle_timeout, tracker, meter=None):
+        self.name = name
+        self.meter = meter
+        self.stats = stats      # this receiver's own ThreadStats; only this protocol appends to it
+        self.idle_timeout = idle_timeout
+        self.tracker = tracker
+        self.loop = None
+        self.timer = None
+        self.burst_count = 0
+        self.burst_bytes = 0
+        self.burst_start = 0.0
+        self.burst_last = 0.0   # wall clock, for the statistics tuple
+        self.last_mono = 0.0    # loop clock, for the idle timer
+
+    def connection_made(self, transport):
+        self.loop = asyncio.get_running_loop()
+
+    def datagram_received(self, data, addr):
+        now_ns = time.time_ns()
+        if self.tracker is not None:
+            self.tracker.observe(data, now_ns)
+        now = now_ns / 1e9
+        if self.burst_count and now - self.burst_last >= self.idle_timeout:
+            self.end_burst()        # gap passed but the loop had not run the timer yet
+        if self.burst_count == 0:
+            self.burst_start = now
+        self.burst_last = now
+        self.burst_count += 1
+        self.burst_bytes += len(data)
+        if self.meter is not None:
+            self.meter.add(len(data), now)
+        self.last_mono = self.loop.time()
+        # One timer per burst, re-armed lazily: no cancel/reschedule per datagram
+        if self.timer is None:
+            self.timer = self.loop.call_at(self.last_mono + self.idle_timeout, self._idle_check)
+
+    def _idle_check(self):
+        self.timer = None
+        if not self.burst_count:
+            return
+        deadline = self.last_mono + self.idle_timeout
+        if self.loop.time() < deadline:
+            self.timer = self.loop.call_at(deadline, self._idle_check)
+        else:
+            self.end_burst()
+
+    def end_burst(self, min_elapsed=0):
+        """Close the open burst; min_elapsed substitutes for a zero-length one (ThreadStats.end_burst)"""
+        if not self.burst_count:
+            return
+        elapsed = self.burst_last - self.burst_start
+        if elapsed <= 0:
+            elapsed = min_elapsed
+        mb_recv = self.burst_bytes / (1024 * 1024)
+        mbps = mb_recv * 8 / elapsed if elapsed > 0 else 0
+        self.stats.append((self.name, self.burst_start, self.burst_last,
+                           self.burst_count, mb_recv, mbps))
+        self.burst_count = 0
+        self.burst_bytes = 0
+
+    def connection_lost(self, exc):
+        # Handle final burst, as receiver_function does
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        self.end_burst(min_elapsed=1)
+
+
+async def run_receivers(num_receivers, stop_event, aggregator, lock, port, idle_timeout,
+                        packet_size, seq_stats=None, name_prefix="T", meters=None, ready=None,
+                        drops=None):
+    """Serve num_receivers sockets on the running loop until stop_event is set
+
+    packet_size is accepted for parity with start_event_loop; the loop sizes its own buffers.
+    ready (a threading.Barrier) is waited on once every endpoint exists; a WakeableEvent as
+    stop_event is watched with add_reader, so stopping does not wait for a poll tick.
+    drops (sockdrops.DropMonitor) watches each socket.
+    """
+    loop = asyncio.get_running_loop()
+    raise_fd_limit(num_receivers + 64)
+    transports = []
+    for i in range(num_receivers):
+        name = f"{name_prefix}{i+1}"
+        tracker = None
+        if seq_stats is not None:
+            tracker = SequenceTracker()
+            with lock:
+                seq_stats[name] = tracker
+        meter = meters.meter(name) if meters is not None else None
+        proto = BurstProtocol(name, aggregator.register(name), idle_timeout, tracker, meter)
+        sock = open_receiver_socket(port)
+        if drops is not None:
+            drops.watch(name, sock)
+        transport, _ = await loop.create_datagram_endpoint(lambda: proto, sock=sock)
+        transports.append(transport)
+    signal_ready(ready)
+
+    if hasattr(stop_event, "fileno"):
+        stopped = loop.create_future()
+        loop.add_reader(stop_event.fileno(), lambda: stopped.done() or stopped.set_result(None))
+        try:
+            await stopped
+        finally:
+            loop.remove_reader(stop_event.fileno())
+    else:
+        while not stop_event.is_set():
+            await asyncio.sleep(STOP_POLL)
+    for transport in transports:
+        transport.close()
+    await asyncio.sleep(0)   # let connection_lost run
+
+
+def start_async_receivers(num_receivers, stop_event, aggregator, lock, port, idle_timeout,
+                          packet_size, seq_stats=None, name_prefix="T", meters=None, ready=None,
+                          drops=None):
+    """Run run_receivers on its own thread and event loop; same contract as start_event_loop"""
+    thread = threading.Thread(
+        target=run_on_new_loop,
+        args=(run_receivers(num_receivers, stop_event, aggregator, lock, port, idle_timeout,
+                            packet_size, seq_stats, name_prefix, meters, ready, drops),),
+        name="AsyncLoop",
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+class SendProtocol(asyncio.DatagramProtocol):
+    """Pauses the send loop while the transport's write buffer is above its high-water mark"""
+
+    def __init__(self):
+        self.can_write = asyncio.Event()
+        self.can_write.set()
+
+    def pause_writing(self):
+        self.can_write.clear()
+
+    def resume_writing(self):
+        self.can_write.set()
+
+    def error_received(self, exc):
+        pass   # ENOBUFS and friends: the datagram is dropped, as with sendto
+
+
+async def send_paced(dest, port, size, duration, rate_pps, header, sender_id=1):
+    """Send size-byte datagrams to dest at rate_pps (0 = as fast as the loop allows)"""
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    transport, proto = await loop.create_datagram_endpoint(SendProtocol, sock=sock)
+    payload = bytearray(b'A' * size)
+    run_id = new_run_id()
+    addr = (dest, port)
+
+    count = 0
+    start = time.perf_counter()
+    end = start + duration
+    interval = 1.0 / rate_pps if rate_pps else 0.0
+    while True:
+        now = time.perf_counter()
+        if now >= end:
+            break
+        if not proto.can_write.is_set():
+            await proto.can_write.wait()
+        # Everything that is due by now goes out before yielding to the loop
+        due = int((now - start) / interval) + 1 - count if interval else 64
+        for _ in range(due):
+            if header:
+                pack_header(payload, 0, sender_id, run_id, count, time.time_ns())
+            transport.sendto(bytes(payload) if header else payload, addr)
+            count += 1
+        if interval:
+            await asyncio.sleep(max(0.0, start + count * interval - time.perf_counter()))
+        else:
+            await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    transport.close()
+    return count, elapsed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="asyncio UDP burst receiver / sender")
+    sub = parser.add_subparsers(dest="role", required=True)
+
+    r = sub.add_parser("recv", help="run N cooperative receivers and print the recv.py summary")
+    r.add_argument("--receivers", type=int, default=5)
+    r.add_argument("--duration", type=float, default=7.0)
+    r.add_argument("--port", type=int, default=PORT)
+    r.add_argument("--idle", type=float, default=IDLE_TIMEOUT, help="seconds of silence that end a burst")
+    r.add_argument("--headers", action="store_true",
+                   help="decode the sender's sequence header (loss/latency; costs CPU per datagram)")
+
+    s = sub.add_parser("send", help="paced datagram sender")
+    s.add_argument("--dest", default="255.255.255.255")
+    s.add_argument("--port", type=int, default=PORT)
+    s.add_argument("--size", type=int, default=SEND_SIZE)
+    s.add_argument("--duration", type=float, default=10.0)
+    rate = s.add_mutually_exclusive_group()
+    rate.add_argument("--rate-mbps", type=float, help="target rate in Mbps (MiB-based, as sender.py)")
+    rate.add_argument("--pps", type=float, help="target rate in packets/s")
+    s.add_argument("--header", action="store_true", help="stamp the sequence/timestamp header")
+    args = parser.parse_args()
+    if args.role == "send" and args.header and args.size < HEADER_SIZE:
+        parser.error(f"--header needs --size >= {HEADER_SIZE}")
+    return args
+
+
+def main():
+    args = parse_args()
+    loop_name = install_loop_policy()
+
+    if args.role == "send":
+        rate_pps = args.pps or (args.rate_mbps * 1024 * 1024 / 8 / args.size if args.rate_mbps else 0)
+        count, elapsed = asyncio.run(send_paced(args.dest, args.port, args.size, args.duration,
+                                                rate_pps, args.header))
+        mb = count * args.size / (1024 * 1024)
+        mbps = mb * 8 / elapsed if elapsed > 0 else 0
+        print(f"[{loop_name}] Sent {count} packets ({mb:.2f} MiB) in {elapsed:.2f}s — "
+              f"throughput: {mbps:.2f} Mbps")
+        return
+
+    stop_event = threading.Event()
+    aggregator = StatsAggregator()
+    lock = threading.Lock()
+    seq_stats = {} if args.headers else None
+    print(f"[{loop_name}] {args.receivers} receivers on port {args.port} for {args.duration}s...")
+
+    async def session():
+        task = asyncio.ensure_future(run_receivers(args.receivers, stop_event, aggregator, lock, args.port,
+                                                   args.idle, PACKET_SIZE, seq_stats))
+        await asyncio.sleep(args.duration)
+        stop_event.set()
+        await task
+
+    try:
+        asyncio.run(session())
+    except KeyboardInterrupt:
+        print("\nInterrupted by user")
+
+    total_throughput, total_packets = calculate_total_throughput(aggregator.snapshot())
+    print(f"RESULT: {args.receivers} receivers -> {total_throughput:.2f} Mbps ({total_packets} packets)")
+    print_overwritten_result(aggregator.overwritten())
+    print_sequence_result({name: t.summary() for name, t in (seq_stats or {}).items()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+# udp_batch.py
+# Batched UDP send and receive paths: preallocated buffers, many datagrams per syscall.
+# Uses sendmmsg(2)/recvmmsg(2) through ctypes on Linux and falls back to a sendmsg loop
+# and a non-blocking recvfrom_into drain loop elsewhere.
+# Shared with the April28 sender/receivers, whose paper_modules.py puts this directory on sys.path.
+import ctypes
+import errno
+import os
+import select
+import socket
+import struct
+import sys
+import time
+
+from packet_header import pack_header
+
+MAX_BATCH = 64                   # datagrams per sendmmsg call
+RECV_BATCH = 16                  # datagrams per recvmmsg call
+MAX_DATAGRAM = 65535
+RECV_SLOT_SIZE = 2048            # bytes per recvmmsg slot; longer datagrams keep their true length
+RECV_BUFFER_LIMIT = 128 * 1024   # slot bytes per receiver without recvmmsg (full-size slots, fewer of them)
+FILL_BYTE = b'A'                 # payload content (same as the original b'A' * PACKET_SIZE)
+CONTROL_SIZE = 64                # ancillary-data bytes per received message (room for a few cmsgs)
+# Linux SO_RXQ_OVFL: each datagram carries the socket's cumulative drop count (socket module lacks it)
+SO_RXQ_OVFL = getattr(socket, "SO_RXQ_OVFL", 40 if sys.platform.startswith("linux") else None)
+# Linux SO_TIMESTAMPNS (also the SCM_TIMESTAMPNS cmsg type): kernel receive time per datagram
+SO_TIMESTAMPNS = getattr(socket, "SO_TIMESTAMPNS", 35 if sys.platform.startswith("linux") else None)
+TIMESPEC = struct.Struct("@qq")     # struct timespec: tv_sec, tv_nsec
+_CMSG_HDR = struct.Struct("@Nii")   # struct cmsghdr: cmsg_len, cmsg_level, cmsg_type
+_CMSG_ALIGN = ctypes.sizeof(ctypes.c_size_t)
+_U32 = struct.Struct("@I")
+
+
+class iovec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class msghdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(iovec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class mmsghdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", msghdr), ("msg_len", ctypes.c_uint)]
+
+
+def _load_libc_call(name):
+    """Return the libc function `name`, or None if this platform doesn't have it"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        return getattr(libc, name)
+    except (OSError, AttributeError):
+        return None
+
+
+_sendmmsg = _load_libc_call("sendmmsg")
+if _sendmmsg is not None:
+    _sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(mmsghdr), ctypes.c_uint, ctypes.c_int]
+    _sendmmsg.restype = ctypes.c_int
+
+
+_recvmmsg = _load_libc_call("recvmmsg")
+if _recvmmsg is not None:
+    _recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(mmsghdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+    _recvmmsg.restype = ctypes.c_int
+
+
+def have_sendmmsg():
+    return _sendmmsg is not None
+
+
+def have_recvmmsg():
+    return _recvmmsg is not None
+
+
+def sockaddr_in(ip, port):
+    """Linux struct sockaddr_in for (ip, port) as a ctypes buffer"""
+    raw = struct.pack("=H", socket.AF_INET) + struct.pack("!H", port) + socket.inet_aton(ip) + bytes(8)
+    return ctypes.create_string_buffer(raw, len(raw))
+
+
+class PayloadBuffer:
+    """One preallocated payload; view(size) hands out zero-copy slices of it"""
+
+    def __init__(self, max_size, fill=FILL_BYTE):
+        self.data = bytearray(fill * max_size)
+        self.view_all = memoryview(self.data)
+        # Pin a ctypes view so sendmmsg can point its iovecs straight at the buffer
+        self.cbuf = (ctypes.c_char * max_size).from_buffer(self.data)
+        self.address = ctypes.addressof(self.cbuf)
+
+    def view(self, size):
+        return self.view_all[:size]
+
+
+def header_slots(batch, header):
+    """Payload slots a BatchSender needs: one per batch entry with headers, else one shared"""
+    return batch if header else 1
+
+
+class BatchSender:
+    """Send up to `batch` copies of the payload to dest per call to send()
+
+    With header=(sender_id, run_id) every datagram gets its own slot in the payload
+    buffer (size * batch bytes) and a packet_header stamped just before the syscall.
+    """
+
+    def __init__(self, sock, dest, payload, size, batch=MAX_BATCH, use_mmsg=True, header=None):
+        self.sock = sock
+        self.dest = dest
+        self.payload = payload
+        self.size = size
+        self.batch = batch
+        self.header = header
+        self.seq = 0
+        self.slots = header_slots(batch, header)
+        if len(payload.data) < size * self.slots:
+            raise ValueError(f"payload buffer too small for {self.slots} slot(s) of {size} bytes")
+        self.views = [payload.view_all[i * size:(i + 1) * size] for i in range(self.slots)]
+        self.use_mmsg = use_mmsg and have_sendmmsg()
+        if self.use_mmsg:
+            self._build_msgvec()
+
+    def _build_msgvec(self):
+        # Messages share the destination (and the iovec, without headers), so the vector is built once
+        ip = socket.gethostbyname(self.dest[0])
+        self.addr = sockaddr_in(ip, self.dest[1])
+        self.iovs = (iovec * self.slots)()
+        for i, iov in enumerate(self.iovs):
+            iov.iov_base = self.payload.address + i * self.size
+            iov.iov_len = self.size
+        self.msgvec = (mmsghdr * self.batch)()
+        for i, m in enumerate(self.msgvec):
+            m.msg_hdr.msg_name = ctypes.addressof(self.addr)
+            m.msg_hdr.msg_namelen = ctypes.sizeof(self.addr)
+            m.msg_hdr.msg_iov = ctypes.pointer(self.iovs[i % self.slots])
+            m.msg_hdr.msg_iovlen = 1
+
+    def _stamp(self, chunk):
+        sender_id, run_id = self.header
+        data, size, seq = self.payload.data, self.size, self.seq
+        now = time.time_ns()
+        for i in range(chunk):
+            pack_header(data, i * size, sender_id, run_id, seq + i, now)
+
+    def send(self, n):
+        """Send n datagrams (in chunks of at most `batch`); return how many the kernel accepted"""
+        sent = 0
+        while sent < n:
+            chunk = min(n - sent, self.batch)
+            if self.header is not None:
+                self._stamp(chunk)
+            if self.use_mmsg:
+                done = _sendmmsg(self.sock.fileno(), self.msgvec, chunk, 0)
+                if done < 0:
+                    err = ctypes.get_errno()
+                    if sent:
+                        return sent
+                    raise OSError(err, os.strerror(err))
+            else:
+                sendmsg = self.sock.sendmsg
+                views, slots = self.views, self.slots
+                done = 0
+                try:
+                    for i in range(chunk):
+                        sendmsg([views[i % slots]], (), 0, self.dest)
+                        done += 1
+                except OSError:
+                    self.seq += done
+                    if sent + done:
+                        return sent + done
+                    raise
+            self.seq += done
+            sent += done
+            if done < chunk:
+                break
+        return sent
+
+
+class BatchReceiver:
+    """Drain up to `batch` datagrams per call to recv() into preallocated slots
+
+    The socket is switched to non-blocking; recv() waits for readability itself, so it
+    raises socket.timeout after `timeout` seconds of silence just like a socket with
+    settimeout() would, and the receivers' burst logic stays unchanged. `wake`, anything
+    with fileno() (recv_eventloop.WakeableEvent), joins the wait: once it is readable
+    recv() returns 0 at once so the caller can check its stop flag.
+
+    With drops=True the socket gets SO_RXQ_OVFL and `kernel_drops` follows the kernel's
+    cumulative drop count for it (read from the last datagram of each recvmmsg batch);
+    it stays None where that is unavailable (no recvmmsg, not Linux).
+
+    With timestamps=True the socket gets SO_TIMESTAMPNS and stamp(i) is datagram i's kernel
+    receive time in time.time_ns() units (0 if the kernel gave none); `kernel_stamps`
+    says whether the option took. Without recvmmsg the drain loop uses recvmsg_into.
+
+    recvmmsg slots are slot_size bytes and the call passes MSG_TRUNC, so a longer datagram
+    is cut to its first slot_size bytes (enough for the packet_header) while size(i) and
+    nbytes still count its true length; `truncated` counts them. The recvfrom_into
+    fallback cannot tell a truncated length, so it uses MAX_DATAGRAM slots and takes at
+    most RECV_BUFFER_LIMIT bytes of them per call.
+    """
+
+    def __init__(self, sock, batch=RECV_BATCH, slot_size=RECV_SLOT_SIZE, use_mmsg=True, wake=None,
+                 drops=False, timestamps=False):
+        self.sock = sock
+        self.wake = wake
+        self.use_mmsg = use_mmsg and have_recvmmsg()
+        if not self.use_mmsg:
+            slot_size = MAX_DATAGRAM
+            batch = max(1, min(batch, RECV_BUFFER_LIMIT // slot_size))
+        self.batch = batch
+        self.slot_size = slot_size
+        self.truncated = 0
+        self.buf = bytearray(batch * slot_size)
+        self.view_all = memoryview(self.buf)
+        self.views = [self.view_all[i * slot_size:(i + 1) * slot_size] for i in range(batch)]
+        self.lengths = [0] * batch
+        self.count = 0
+        self.nbytes = 0
+        sock.setblocking(False)
+        if hasattr(select, "poll"):
+            self.poller = select.poll()
+            self.poller.register(sock, select.POLLIN)
+            if wake is not None:
+                self.poller.register(wake, select.POLLIN)
+        else:
+            self.poller = None
+        self.control = None
+        self.kernel_drops = None
+        self.kernel_stamps = False
+        self.stamps = [0] * batch
+        if timestamps and SO_TIMESTAMPNS is not None:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+                self.kernel_stamps = True
+            except OSError:
+                pass
+        if self.use_mmsg:
+            if drops and SO_RXQ_OVFL is not None:
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+                    self.kernel_drops = 0   # no cmsg until the kernel has dropped something
+                except OSError:
+                    pass
+            if self.kernel_drops is not None or self.kernel_stamps:
+                self.control = bytearray(batch * CONTROL_SIZE)
+            self._build_msgvec()
+        else:
+            self.addrs = [None] * batch
+
+    def _build_msgvec(self):
+        cbuf = (ctypes.c_char * len(self.buf)).from_buffer(self.buf)
+        base = ctypes.addressof(cbuf)
+        self._cbuf = cbuf
+        self.iovs = (iovec * self.batch)()
+        self.names = (ctypes.c_char * 16 * self.batch)()     # struct sockaddr_in per message
+        self.msgvec = (mmsghdr * self.batch)()
+        for i, m in enumerate(self.msgvec):
+            self.iovs[i].iov_base = base + i * self.slot_size
+            self.iovs[i].iov_len = self.slot_size
+            m.msg_hdr.msg_iov = ctypes.pointer(self.iovs[i])
+            m.msg_hdr.msg_iovlen = 1
+            m.msg_hdr.msg_name = ctypes.addressof(self.names[i])
+        if self.control is not None:
+            ccontrol = (ctypes.c_char * len(self.control)).from_buffer(self.control)
+            self._ccontrol = ccontrol
+            for i, m in enumerate(self.msgvec):
+                m.msg_hdr.msg_control = ctypes.addressof(ccontrol) + i * CONTROL_SIZE
+
+    def _wait(self, timeout):
+        """True if the socket is readable, False if only `wake` is; raises socket.timeout"""
+        if self.poller is not None:
+            ready = [fd for fd, _ in self.poller.poll(timeout * 1000)]
+        else:
+            waits = [self.sock] if self.wake is None else [self.sock, self.wake]
+            ready, _, _ = select.select(waits, [], [], timeout)
+            ready = [r if isinstance(r, int) else r.fileno() for r in ready]
+        if not ready:
+            raise socket.timeout("timed out")
+        return self.sock.fileno() in ready
+
+    def recv(self, timeout):
+        """Block up to `timeout` s for data, then take what is queued (at most `batch`)
+
+        Returns the number of datagrams; view(i) and addr(i) give each one, and
+        self.nbytes holds the batch's byte total.
+        """
+        if not self._wait(timeout):
+            self.count = self.nbytes = 0   # woken by `wake`
+            return 0
+        n = 0
+        if self.use_mmsg:
+            control = self.control is not None
+            for m in self.msgvec:
+                m.msg_hdr.msg_namelen = 16
+                if control:
+                    m.msg_hdr.msg_controllen = CONTROL_SIZE
+            n = _recvmmsg(self.sock.fileno(), self.msgvec, self.batch, socket.MSG_DONTWAIT | socket.MSG_TRUNC,
+                          None)
+            if n < 0:
+                err = ctypes.get_errno()
+                if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                    n = 0
+                else:
+                    raise OSError(err, os.strerror(err))
+            msgvec, lengths = self.msgvec, self.lengths
+            for i in range(n):
+                lengths[i] = msgvec[i].msg_len
+            if n and max(lengths[:n]) > self.slot_size:
+                self.truncated += sum(1 for length in lengths[:n] if length > self.slot_size)
+            if control and n:
+                self._parse_control(n)
+        elif self.kernel_stamps:
+            recvmsg_into, views, lengths, addrs, stamps = (self.sock.recvmsg_into, self.views, self.lengths,
+                                                           self.addrs, self.stamps)
+            try:
+                while n < self.batch:
+                    lengths[n], ancdata, _, addrs[n] = recvmsg_into([views[n]], CONTROL_SIZE)
+                    stamps[n] = 0
+                    for level, kind, data in ancdata:
+                        if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS:
+                            sec, nsec = TIMESPEC.unpack_from(data)
+                            stamps[n] = sec * 1_000_000_000 + nsec
+                    n += 1
+            except BlockingIOError:
+                pass
+        else:
+            recv_into, views, lengths, addrs = self.sock.recvfrom_into, self.views, self.lengths, self.addrs
+            try:
+                while n < self.batch:
+                    lengths[n], addrs[n] = recv_into(views[n])
+                    n += 1
+            except BlockingIOError:
+                pass
+        self.count = n
+        self.nbytes = sum(self.lengths[:n])
+        return n
+
+    def view(self, i):
+        """Datagram i's bytes (its first slot_size bytes if it was truncated)"""
+        return self.views[i][:self.lengths[i]]
+
+    def size(self, i):
+        """Datagram i's true length"""
+        return self.lengths[i]
+
+    def stamp(self, i):
+        """Kernel receive time (ns since the epoch) of datagram i, or 0 without one"""
+        return self.stamps[i]
+
+    def _parse_control(self, n):
+        """Pick SO_TIMESTAMPNS (every datagram) and SO_RXQ_OVFL (last datagram) out of the cmsgs"""
+        control, stamps, last = self.control, self.stamps, n - 1
+        stamping = self.kernel_stamps
+        for i in range(0 if stamping else last, n):
+            stamps[i] = 0
+            for level, kind, offset in self.cmsgs(i):
+                if level != socket.SOL_SOCKET:
+                    continue
+                if kind == SO_TIMESTAMPNS and stamping:
+                    sec, nsec = TIMESPEC.unpack_from(control, offset)
+                    stamps[i] = sec * 1_000_000_000 + nsec
+                elif kind == SO_RXQ_OVFL and i == last:
+                    self.kernel_drops = _U32.unpack_from(control, offset)[0]
+
+    def cmsgs(self, i):
+        """(level, type, data offset in self.control) of each control message of datagram i"""
+        base = i * CONTROL_SIZE
+        end = base + self.msgvec[i].msg_hdr.msg_controllen
+        offset = base
+        while offset + _CMSG_HDR.size <= end:
+            length, level, kind = _CMSG_HDR.unpack_from(self.control, offset)
+            if length < _CMSG_HDR.size:
+                break
+            yield level, kind, offset + _CMSG_HDR.size
+            offset += (length + _CMSG_ALIGN - 1) & ~(_CMSG_ALIGN - 1)
+
+    def addr(self, i):
+        """Source (ip, port) of datagram i from the last recv()"""
+        if not self.use_mmsg:
+            return self.addrs[i]
+        raw = bytes(self.names[i])
+        return socket.inet_ntoa(raw[4:8]), struct.unpack("!H", raw[2:4])[0]